@@ -0,0 +1,342 @@
+"""
+Throughput, peak memory and retained memory blocks of the simulation engine, with a regression gate.
+
+Every case is timed in `--repeat` samples, each of enough runs to last `SAMPLE_SECONDS`, and `months_per_sec`
+comes from the median sample. The samples alternate with runs of `calibration`, a fixed Decimal and NumPy
+workload that doesn't use the engine, so `months_per_calibration`, the months simulated in the time
+of one calibration run, is measured under the same load as the case and doesn't depend on the machine.
+`noise` is the relative spread of its samples.
+
+One more run under tracemalloc gives `peak_bytes`, the most memory the run held at once, and `retained_blocks`,
+the memory blocks still allocated once it returns, i.e. its result and what it cached. tracemalloc doesn't count
+the allocations made and freed during the run, they only show in `peak_bytes`.
+The mortgage schedule cache is cleared before every run, so each one starts cold.
+
+With `--baseline` the script exits with 1 when a metric is worse than the baseline by more than `--threshold`,
+plus `NOISE_MARGIN` times the noise of the case for `months_per_calibration`.
+
+    python benchmarks/bench_engine.py
+    python benchmarks/bench_engine.py --output results.json
+    python benchmarks/bench_engine.py --baseline benchmarks/engine_baseline.json
+    python benchmarks/bench_engine.py --save-baseline benchmarks/engine_baseline.json
+"""
+
+import argparse
+import json
+import math
+import platform
+import statistics
+import sys
+import time
+import tracemalloc
+from dataclasses import dataclass
+from datetime import date
+from decimal import Decimal
+from pathlib import Path
+from typing import Any, Callable, Optional
+
+import numpy as np
+
+project_root = Path(__file__).resolve().parent.parent
+sys.path.append(str(project_root / "src"))
+
+from finsim.inflation import inflation_from_file_gen, rate_from_file_gen  # noqa: E402
+from finsim.mortgage import schedules  # noqa: E402
+from finsim.properties import InvestmentProperty  # noqa: E402
+from finsim.simulations import (  # noqa: E402
+    FireSimulation,
+    run_fire_simulation,
+    run_simulation,
+    simulate_next,
+)
+from finsim.fire_curve import run_fire_monte_carlo  # noqa: E402
+from finsim.montecarlo import NormalRates  # noqa: E402
+from finsim.sweep import run_sweep  # noqa: E402
+
+REPEAT = 9
+# the spread of fewer samples says little about the noise of a case
+MIN_REPEAT = 5
+# a sample repeats a short case until it lasts this long, a single run of a few ms is mostly timer noise
+SAMPLE_SECONDS = 0.05
+# how much worse than the baseline a metric may get before the gate fails
+THRESHOLD = 0.1
+# how many times the noise of a case its throughput may drop on top of the threshold
+NOISE_MARGIN = 3
+# the metrics the gate tracks and whether a higher value is better
+TRACKED = {
+    "months_per_calibration": True,
+    "peak_bytes": False,
+    "retained_blocks": False,
+}
+# the metrics that are timed, their margin grows with the noise of the case
+_TIMED_METRICS = ("months_per_calibration",)
+
+
+@dataclass
+class Case:
+    name: str
+    # the simulated months of one run, what the throughput is counted in
+    months: int
+    run: Callable[[], Any]
+
+
+def _property(value: int, mortgage: int, rate: str, months: int) -> InvestmentProperty:
+    return InvestmentProperty(
+        market_value=Decimal(value),
+        monthly_income=Decimal(value) / 250,
+        mortgage_left=Decimal(mortgage),
+        mortgage_rate=Decimal(rate),
+        mortgage_months=months,
+        annual_rent_increase_rate=Decimal("0.02"),
+    )
+
+
+def _init(properties: int = 1) -> FireSimulation:
+    return FireSimulation(
+        stock_investments=Decimal("250_000"),
+        bonds_investments=Decimal("50_000"),
+        cash=Decimal("20_000"),
+        monthly_expenses=Decimal("4_000"),
+        monthly_income=Decimal("7_500"),
+        investment_properties=[
+            _property(
+                300_000 + 25_000 * i,
+                180_000 + 10_000 * i,
+                f"{4 + i % 4}.5",
+                300 - 12 * i,
+            )
+            for i in range(properties)
+        ],
+        stock_return_rate=Decimal("0.05"),
+        bonds_return_rate=Decimal("0.02"),
+        annual_inflation_rate=Decimal("0.02"),
+        annual_income_increase_rate=Decimal("0.02"),
+        annual_property_appreciation_rate=Decimal("0.02"),
+        invest_cash_surplus=True,
+        invest_cash_threshold=Decimal("30_000"),
+        date=date(2024, 1, 1),
+    )
+
+
+def _steps(months: int) -> Callable[[], Any]:
+    init = _init()
+
+    def run() -> Any:
+        return [simulate_next(init) for _ in range(months)]
+
+    return run
+
+
+def _csv_rates(months: int) -> Callable[[], Any]:
+    inflation = project_root / "data" / "monthly_cpi_simulated_USD.csv"
+    stocks = project_root / "data" / "acwi_monthly_simulation.csv"
+
+    def run() -> Any:
+        return run_simulation(
+            _init(),
+            months,
+            inflation_rates=inflation_from_file_gen(str(inflation), monthly=True),
+            stock_returns=rate_from_file_gen(str(stocks), monthly=True),
+        )
+
+    return run
+
+
+def _sweep() -> Callable[[], Any]:
+    axes = {
+        "stock_return_rate": [Decimal(i) / 1000 for i in range(50)],
+        "annual_inflation_rate": [Decimal(i) / 1000 for i in range(50)],
+        "monthly_expenses": [Decimal(3_000 + 250 * i) for i in range(20)],
+    }
+
+    def run() -> Any:
+        return run_sweep(_init(), 480, axes)
+
+    return run
+
+
+def _fire_curve(paths: int, months: int) -> Callable[[], Any]:
+    def run() -> Any:
+        return run_fire_monte_carlo(
+            _init(),
+            months,
+            paths,
+            NormalRates(0.002, 0.003),
+            NormalRates(0.005, 0.045),
+            seed=1,
+        )
+
+    return run
+
+
+CASES = [
+    Case("simulate_next", 120, _steps(120)),
+    Case("run_simulation/10y", 120, lambda: run_simulation(_init(), 120)),
+    Case("run_simulation/40y", 480, lambda: run_simulation(_init(), 480)),
+    Case("run_simulation/100y", 1200, lambda: run_simulation(_init(), 1200)),
+    Case(
+        "run_simulation/40y/cents",
+        480,
+        lambda: run_simulation(_init(), 480, engine="cents"),
+    ),
+    Case(
+        "run_simulation/40y/float",
+        480,
+        lambda: run_simulation(_init(), 480, engine="float"),
+    ),
+    Case("run_fire_simulation/80y", 960, lambda: run_fire_simulation(_init(), 960)),
+    Case(
+        "run_fire_simulation/80y/cents",
+        960,
+        lambda: run_fire_simulation(_init(), 960, engine="cents"),
+    ),
+    Case("properties/40y", 480, lambda: run_simulation(_init(properties=12), 480)),
+    Case("csv_rates/40y", 480, _csv_rates(480)),
+    # every point of the 50 x 50 x 20 grid is a 40 year run
+    Case("sweep/50x50x20/40y", 50 * 50 * 20 * 480, _sweep()),
+    # the retirement months of 1000 paths, counted as one 80 year run per path
+    Case("fire_curve/1000x80y", 1000 * 960, _fire_curve(1000, 960)),
+]
+
+
+def _calibration_workload() -> None:
+    value = Decimal("1000")
+    rate = Decimal("1.0004")
+    for _ in range(20_000):
+        value = (value * rate).quantize(Decimal("0.01"))
+
+    # in place on an array that fits in the cache, fresh large arrays time the page faults of the kernel
+    array = np.arange(50_000, dtype=np.float64)
+    for _ in range(100):
+        np.multiply(array, 1.0001, out=array)
+        np.add(array, 1, out=array)
+        np.sqrt(array, out=array)
+
+
+def _time(run: Callable[[], Any], number: int) -> float:
+    start = time.perf_counter()
+    for _ in range(number):
+        schedules.clear()
+        run()
+    return (time.perf_counter() - start) / number
+
+
+def _spread(values: list[float]) -> float:
+    """The relative spread of the values, the median absolute deviation scaled to a standard deviation."""
+    median = statistics.median(values)
+    deviation = statistics.median(abs(v - median) for v in values)
+    return 1.4826 * deviation / median
+
+
+def measure(case: Case, repeat: int) -> dict[str, float]:
+    # the first run also warms up the imports and caches the case relies on
+    number = max(1, math.ceil(SAMPLE_SECONDS / _time(case.run, 1)))
+
+    timings, calibrations = [], []
+    for _ in range(repeat):
+        calibrations.append(_time(_calibration_workload, 1))
+        timings.append(_time(case.run, number))
+    relative = [case.months * c / t for c, t in zip(calibrations, timings)]
+
+    schedules.clear()
+    tracemalloc.start()
+    try:
+        before = tracemalloc.take_snapshot()
+        result = case.run()  # noqa: F841, held so the snapshot counts it
+        _, peak = tracemalloc.get_traced_memory()
+        after = tracemalloc.take_snapshot()
+    finally:
+        tracemalloc.stop()
+    retained = sum(s.count_diff for s in after.compare_to(before, "filename"))
+
+    return {
+        "months_per_sec": case.months / statistics.median(timings),
+        "months_per_calibration": statistics.median(relative),
+        "noise": _spread(relative),
+        "peak_bytes": peak,
+        "retained_blocks": retained,
+    }
+
+
+def regressions(
+    results: dict[str, dict[str, float]],
+    baseline: dict[str, dict[str, float]],
+    threshold: float,
+) -> list[str]:
+    """
+    The metrics worse than the baseline by more than their margin, cases missing from either side are skipped.
+
+    The margin is `threshold`, plus `NOISE_MARGIN` times the larger noise of the two runs for the timed metrics.
+    """
+    found = []
+    for name, metrics in results.items():
+        base = baseline.get(name)
+        if base is None:
+            continue
+        for metric, higher_is_better in TRACKED.items():
+            if metric not in base or base[metric] <= 0:
+                continue
+            margin = threshold
+            if metric in _TIMED_METRICS:
+                noise = max(metrics.get("noise", 0), base.get("noise", 0))
+                margin += NOISE_MARGIN * noise
+            change = metrics[metric] / base[metric] - 1
+            if (-change if higher_is_better else change) > margin:
+                found.append(
+                    f"{name} {metric}: {base[metric]:.0f} -> {metrics[metric]:.0f} "
+                    f"({change:+.0%}, margin {margin:.0%})"
+                )
+    return found
+
+
+def main(argv: Optional[list[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--repeat", type=int, default=REPEAT)
+    parser.add_argument("--only", help="run the cases whose name starts with this")
+    parser.add_argument("--output", type=Path, help="write the results as JSON")
+    parser.add_argument(
+        "--baseline", type=Path, help="fail when a metric regresses against this file"
+    )
+    parser.add_argument(
+        "--save-baseline", type=Path, help="write the results as the new baseline"
+    )
+    parser.add_argument("--threshold", type=float, default=THRESHOLD)
+    args = parser.parse_args(argv)
+    if args.repeat < MIN_REPEAT:
+        parser.error(f"--repeat needs at least {MIN_REPEAT} samples")
+
+    cases = [c for c in CASES if args.only is None or c.name.startswith(args.only)]
+
+    results = {}
+    print(
+        f"{'case':<32}{'months/s':>12}{'per calib':>12}{'noise':>8}{'peak':>12}{'retained':>10}"
+    )
+    for case in cases:
+        results[case.name] = metrics = measure(case, args.repeat)
+        print(
+            f"{case.name:<32}{metrics['months_per_sec']:>12.0f}{metrics['months_per_calibration']:>12.0f}"
+            f"{metrics['noise']:>8.1%}{metrics['peak_bytes'] / 1024:>10.0f}kB{metrics['retained_blocks']:>10.0f}"
+        )
+
+    report = {
+        "python": platform.python_version(),
+        "machine": platform.machine(),
+        "repeat": args.repeat,
+        "results": results,
+    }
+    for path in (args.output, args.save_baseline):
+        if path is not None:
+            path.write_text(json.dumps(report, indent=2, sort_keys=True) + "\n")
+
+    if args.baseline is None:
+        return 0
+
+    baseline = json.loads(args.baseline.read_text())
+    found = regressions(results, baseline["results"], args.threshold)
+    for line in found:
+        print(f"REGRESSION {line}")
+    return 1 if found else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
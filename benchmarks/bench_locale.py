@@ -0,0 +1,86 @@
+"""
+Rerun latency of the fire page with and without the translation cache.
+
+`disk` loads the catalog on every `_()` call and reads the intro on every rerun, like the pages used to,
+`cached` goes through the process-wide cache of `view.locale`.
+`lookups` is the same comparison for the `_()` calls of a single rerun alone.
+
+    python benchmarks/bench_locale.py
+"""
+
+import os
+import sys
+import time
+from pathlib import Path
+
+project_root = Path(__file__).resolve().parent.parent
+sys.path.append(str(project_root / "src"))
+os.chdir(project_root)
+
+from babel.support import Translations  # noqa: E402
+from streamlit.testing.v1 import AppTest  # noqa: E402
+
+from view import locale  # noqa: E402
+
+REPEAT = 10
+
+
+def load_from_disk(code: str) -> Translations:
+    return Translations.load(os.path.join(os.getcwd(), "locale"), [code])
+
+
+def read_intro_from_disk(valid_locale: locale.Locale) -> str:
+    with open(f"docs/firesim_intro_{valid_locale.lang}.md", "r") as f:
+        return f.read()
+
+
+def best_of(fn) -> float:
+    timings = []
+    for _ in range(REPEAT):
+        start = time.perf_counter()
+        fn()
+        timings.append(time.perf_counter() - start)
+    return min(timings)
+
+
+def main() -> None:
+    cached_load, cached_intro = locale.load_translations, locale.load_intro
+
+    calls = []
+
+    def counting_load(code: str) -> Translations:
+        calls.append(code)
+        return cached_load(code)
+
+    at = AppTest.from_file("firesim.py", default_timeout=60)
+    locale.load_translations = counting_load
+    at.run()
+    lookups = len(calls)
+
+    def rerun() -> None:
+        at.run()
+        assert not at.exception
+
+    results = {}
+    for name, load, intro in [
+        ("disk", load_from_disk, read_intro_from_disk),
+        ("cached", cached_load, cached_intro),
+    ]:
+        locale.load_translations, locale.load_intro = load, intro
+
+        def translate() -> None:
+            for _ in range(lookups):
+                locale.load_translations("pl_PL").gettext("Retire in")
+
+        results[name] = (best_of(translate), best_of(rerun))
+
+    locale.load_translations, locale.load_intro = cached_load, cached_intro
+
+    print(f"{lookups} translated strings per rerun")
+    print(f"{'':<8}{'lookups':>12}{'rerun':>12}")
+    for name, (lookup_time, rerun_time) in results.items():
+        print(f"{name:<8}{lookup_time * 1e3:>10.2f}ms{rerun_time * 1e3:>10.2f}ms")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,77 @@
+"""
+Cold and warm load times of the rate files.
+
+`generator` reads one cycle of the file with `inflation_from_file_gen`, like every rerun used to.
+`cold` parses the CSV and writes the sidecar, `sidecar` loads it in a new process
+and `memory` is a process that already loaded the file.
+
+    python benchmarks/bench_rate_loading.py
+"""
+
+import os
+import sys
+import tempfile
+import time
+from itertools import islice
+from pathlib import Path
+
+project_root = Path(__file__).resolve().parent.parent
+sys.path.append(str(project_root / "src"))
+
+from finsim import inflation  # noqa: E402
+
+FILES = [
+    ("acwi_monthly_simulation.csv", True),
+    ("monthly_cpi_simulated_PLN.csv", True),
+    ("monthly_cpi_simulated_USD.csv", True),
+    ("poland_monthly_cpi.csv", True),
+    ("inflation_PLN.csv", False),
+]
+REPEAT = 50
+
+
+def best_of(fn, setup=lambda: None) -> float:
+    timings = []
+    for _ in range(REPEAT):
+        setup()
+        start = time.perf_counter()
+        fn()
+        timings.append(time.perf_counter() - start)
+    return min(timings)
+
+
+def main() -> None:
+    cache_dir = tempfile.mkdtemp()
+    os.environ[inflation.RATE_CACHE_DIR_ENV] = cache_dir
+
+    def remove_sidecars() -> None:
+        inflation.clear_loaded_rate_paths()
+        for f in Path(cache_dir).glob("*"):
+            f.unlink()
+
+    print(f"{'file':<32}{'generator':>12}{'cold':>12}{'sidecar':>12}{'memory':>12}")
+    for name, monthly in FILES:
+        path = project_root / "data" / name
+        months = len(inflation.rate_path_from_file(path, monthly))
+
+        def generator() -> None:
+            list(islice(inflation.inflation_from_file_gen(path, monthly), months))
+
+        def load() -> None:
+            inflation.load_rate_path(path, monthly)
+
+        generator_time = best_of(generator)
+        cold = best_of(load, setup=remove_sidecars)
+        sidecar = best_of(load, setup=inflation.clear_loaded_rate_paths)
+        memory = best_of(load)
+
+        print(
+            f"{name:<32}"
+            + "".join(
+                f"{t * 1e6:>10.0f}us" for t in (generator_time, cold, sidecar, memory)
+            )
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -7,20 +7,16 @@ src_path = project_root / "src"
 sys.path.append(str(src_path))
 
 import streamlit as st
-import pandas as pd
 import datetime
-from decimal import Decimal
 from streamlit.web.server.websocket_headers import _get_websocket_headers
-from view.locale import set_locale, _
-from view.helpers import first_day_of_the_month
+from view.locale import load_intro, prewarm_locales, set_locale, _
 from view.sidebar import (
     fire_sidebar,
     get_fire_sidebar_defaults,
     query_to_attrs,
     update_query_params,
 )
-from finsim.simulations import FireSimulation, run_fire_simulation
-from finsim.properties import InvestmentProperty
+from view.results import fire_simulation, prewarm_default_results
 from logging import getLogger
 
 logger = getLogger(__name__)
@@ -31,6 +27,8 @@ try:
 except Exception as e:
     logger.error(f"Error while getting headers: {e}")
     headers = {}
+prewarm_locales()
+prewarm_default_results(project_root)
 locale = set_locale(headers)
 
 if "query_params_read" not in st.session_state:
@@ -49,54 +47,15 @@ with st.sidebar:
 
 with st.container(border=False):
 
-    def to_d(v: float) -> Decimal:
-        return Decimal(str(v))
-
-    with open(f"docs/firesim_intro_{locale.lang}.md", "r") as f:
-        st.markdown(f.read())
-
-    init = FireSimulation(
-        stock_investments=to_d(sidebarAttrs.stock_investment),
-        bonds_investments=to_d(sidebarAttrs.bond_investment),
-        cash=to_d(sidebarAttrs.cash),
-        monthly_income=to_d(sidebarAttrs.monthly_income),
-        monthly_expenses=to_d(sidebarAttrs.monthly_expenses),
-        investment_properties=[
-            InvestmentProperty(
-                market_value=to_d(i.market_value),
-                mortgage_left=to_d(i.mortgage_left),
-                mortgage_months=i.mortgage_months,
-                monthly_income=to_d(i.monthly_income),
-                mortgage_rate=to_d(i.mortgage_rate),
-            )
-            for i in sidebarAttrs.investment_properties
-        ],
-        stock_return_rate=to_d(sidebarAttrs.stock_return_rate),
-        bonds_return_rate=to_d(sidebarAttrs.bonds_return_rate),
-        annual_inflation_rate=to_d(sidebarAttrs.annual_inflation_rate),
-        annual_income_increase_rate=to_d(sidebarAttrs.annual_income_increase_rate),
-        annual_property_appreciation_rate=to_d(
-            sidebarAttrs.annual_property_appreciation_rate
-        ),
-        invest_cash_surplus=sidebarAttrs.invest_cash_surplus,
-        invest_cash_threshold=to_d(sidebarAttrs.invest_cash_threshold),
-        invest_cash_surplus_strategy=sidebarAttrs.invest_cash_surplus_strategy,
-        date=first_day_of_the_month(),
-    )
+    st.markdown(load_intro(locale))
 
-    simulation, nmb_of_sims = run_fire_simulation(
-        init,
-        expected_number_of_months=sidebarAttrs.expected_number_of_months,
-        inflation_rate_gen=sidebarAttrs.inflation_gen(root_path=project_root),
-        stock_gen=sidebarAttrs.stock_gen(root_path=project_root),
-    )
+    simulation, nmb_of_sims = fire_simulation(sidebarAttrs, project_root)
     if len(simulation) < 2:
         st.error("No simulation data")
         st.stop()
 
-    df = pd.DataFrame([s.to_dict() for s in simulation])
-    # set date as an index
-    df.set_index("date", inplace=True)
+    # indexed by date
+    df = simulation.to_pandas(settings=True)
 
     first_month_with_zero_income = df[df["monthly_income"] == 0]
     if not first_month_with_zero_income.empty:
@@ -7,6 +7,8 @@ PYTHON_DEFAULT_VERSION = PYTHON_VERSIONS[-1]
 
 nox.options.stop_on_first_error = True
 nox.options.reuse_existing_virtualenvs = True
+# the benchmarks depend on the machine, they only run when asked for with `nox -s bench`
+nox.options.sessions = ["test"]
 
 
 @nox.session(python=PYTHON_DEFAULT_VERSION)
@@ -17,3 +19,16 @@ def test(session: nox.Session):
     files = list(ROOT.glob("notebooks/*.ipynb"))
     for file in files:
         session.run("pytest", "--nbval-lax", file)
+
+
+@nox.session(python=PYTHON_DEFAULT_VERSION)
+def bench(session: nox.Session):
+    session.run("poetry", "install", external=True)
+    # fails when the engine got slower, for the speed of the machine, or takes more memory than the stored baseline
+    session.run(
+        "python",
+        "benchmarks/bench_engine.py",
+        "--baseline",
+        "benchmarks/engine_baseline.json",
+        *session.posargs,
+    )
@@ -0,0 +1,156 @@
+from dataclasses import dataclass
+from datetime import date
+from pathlib import Path
+from typing import Literal, Optional, Union
+
+import numpy as np
+import pandas as pd
+
+from finsim.batch import run_batch_simulation
+from finsim.inflation import is_monthly_file, load_rate_path, rate_dates_from_file
+from finsim.instrumentation import timed
+from finsim.rates import RatePath
+from finsim.simulations import FireSimulation
+from finsim.summary import Statistic
+
+# what happens to the runs that start too late to fit in the history
+Alignment = Literal["wrap", "truncate"]
+
+
+@dataclass
+class RateHistory:
+    """Monthly rates of a historical series and the month of every rate."""
+
+    dates: list[date]
+    rates: RatePath
+
+    def __post_init__(self) -> None:
+        if len(self.dates) != len(self.rates):
+            raise ValueError(
+                f"{len(self.dates)} dates for a history of {len(self.rates)} rates"
+            )
+
+    @classmethod
+    def from_file(
+        cls, rate_path: Union[str, Path], monthly: Optional[bool] = None
+    ) -> "RateHistory":
+        """
+        The rates of `load_rate_path` with the dates of the file.
+
+        Unless `monthly` says otherwise, a file whose rows are consecutive months is read as monthly rates.
+        """
+        if monthly is None:
+            monthly = is_monthly_file(rate_path)
+        return cls(
+            rate_dates_from_file(rate_path, monthly), load_rate_path(rate_path, monthly)
+        )
+
+    def __len__(self) -> int:
+        return len(self.rates)
+
+    def windows(self, starts: int, months: int) -> np.ndarray:
+        """(starts x months) rates of the runs starting at every row, wrapping around the end of the history."""
+        offsets = np.arange(starts)[:, None] + np.arange(months)[None, :]
+        return self.rates.values[offsets % len(self)]
+
+
+@dataclass
+class Backtest:
+    """
+    The runs of a scenario started at every month of a history, one entry per start.
+
+    `final_wealth` is the wealth including properties of the last month a run was solvent.
+    """
+
+    starts: list[date]
+    months: int
+    months_survived: np.ndarray
+    final_wealth: np.ndarray
+
+    @property
+    def success(self) -> np.ndarray:
+        return self.months_survived >= self.months
+
+    @property
+    def success_rate(self) -> float:
+        return float(self.success.mean())
+
+    def _ranked(self) -> np.ndarray:
+        # the earlier the money runs out the worse, then the less is left
+        return np.lexsort((self.final_wealth, self.months_survived))
+
+    @property
+    def worst_start(self) -> date:
+        return self.starts[self._ranked()[0]]
+
+    @property
+    def median_start(self) -> date:
+        ranked = self._ranked()
+        return self.starts[ranked[(len(ranked) - 1) // 2]]
+
+    def to_pandas(self) -> pd.DataFrame:
+        return pd.DataFrame(
+            {
+                "months_survived": self.months_survived,
+                "final_wealth": self.final_wealth,
+                "success": self.success,
+            },
+            index=pd.Index(self.starts, name="start"),
+        )
+
+
+@timed("backtest")
+def run_backtest(
+    init: FireSimulation,
+    months: int,
+    stock_returns: Optional[RateHistory] = None,
+    inflation_rates: Optional[RateHistory] = None,
+    alignment: Alignment = "wrap",
+    engine: Literal["float", "cents"] = "float",
+) -> Backtest:
+    """
+    Runs `init` from every start month of the histories at once, one path of a batch run per start.
+
+    The start offset applies to both series, the same row of each, the way the file generators
+    read them together from the first row. A start is labeled with its date in the longer series,
+    a missing series uses the fixed rate of `init`.
+
+    With `wrap` every month of the longer history is a start, a run that reaches the end of a series
+    continues from its beginning. With `truncate` only the starts whose whole run fits in both series are run.
+    """
+    histories = [h for h in (stock_returns, inflation_rates) if h is not None]
+    if not histories:
+        raise ValueError(
+            "a backtest needs the history of the stock returns or the inflation"
+        )
+
+    if alignment == "wrap":
+        starts = max(len(h) for h in histories)
+    elif alignment == "truncate":
+        starts = min(len(h) for h in histories) - months + 1
+        if starts < 1:
+            raise ValueError(
+                f"a history of {min(len(h) for h in histories)} months doesn't fit a {months} months run"
+            )
+    else:
+        raise ValueError(f"unknown alignment: {alignment}")
+
+    final_wealth = Statistic("wealth_inc_properties", "last")
+    batch = run_batch_simulation(
+        init,
+        months,
+        None if inflation_rates is None else inflation_rates.windows(starts, months),
+        None if stock_returns is None else stock_returns.windows(starts, months),
+        paths=starts,
+        record=(),
+        engine=engine,
+        summary=[final_wealth],
+    )
+
+    labels = max(histories, key=len).dates
+    return Backtest(
+        starts=labels[:starts],
+        months=months,
+        months_survived=batch.months_survived,
+        final_wealth=batch.summary[final_wealth.name],
+    )
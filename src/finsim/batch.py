@@ -0,0 +1,548 @@
+from dataclasses import dataclass, field
+from datetime import date
+from decimal import Decimal
+from typing import Any, Callable, Literal, Mapping, Optional, Sequence, Union
+
+import numpy as np
+import pandas as pd
+
+from finsim.context import decimal_context
+from finsim.properties import InvestmentProperty, property_timeline
+from finsim.rates import RatePath
+from finsim.simulations import FireSimulation, month_dates
+from finsim.sketch import BAND_QUANTILES, QuantileSketch, quantile_bands
+from finsim.summary import BatchStatistics, Statistic, check_statistics
+
+# the stock / bonds split applied to the cash surplus, same strategies as in simulate_next
+SURPLUS_STRATEGIES: dict[str, tuple[float, float]] = {
+    "80-20": (0.8, 0.2),
+    "100": (1.0, 0.0),
+    "60-40": (0.6, 0.4),
+    "50-50": (0.5, 0.5),
+}
+
+# the `FireSimulation` fields the float engine can set per path, see `run_batch_simulation`
+PATH_PARAMETERS = (
+    "stock_investments",
+    "bonds_investments",
+    "cash",
+    "monthly_expenses",
+    "stock_return_rate",
+    "bonds_return_rate",
+    "annual_inflation_rate",
+    "invest_cash_surplus",
+    "invest_cash_threshold",
+    "invest_cash_surplus_strategy",
+)
+
+BATCH_FIELDS = (
+    "stock_investments",
+    "bonds_investments",
+    "cash",
+    "monthly_expenses",
+    "monthly_income",
+    "properties_market_value",
+    "properties_net_cash_value",
+    "properties_mortgage_left",
+    "properties_monthly_income",
+    "liquid_wealth",
+    "wealth_inc_properties",
+)
+
+
+@dataclass
+class BatchSimulation:
+    """
+    Result of a batch run, every array has one row per path.
+
+    `months_survived` is the number of months a path was simulated before its wealth went negative,
+    it equals the number of simulated months for paths that never ran out of money.
+    State arrays hold the last state of every path, `history` holds the recorded fields
+    as (paths x months + 1) arrays with NaN after the path ran out of money.
+    `summary` holds the statistics of every path over the months it was simulated.
+    `sketches` hold the quantiles of the sketched fields on every month, over the paths
+    that still had money that month, see `bands`.
+    """
+
+    dates: list[date]
+    months_survived: np.ndarray
+    stock_investments: np.ndarray
+    bonds_investments: np.ndarray
+    cash: np.ndarray
+    monthly_expenses: np.ndarray
+    monthly_income: np.ndarray
+    properties_alive: np.ndarray
+    history: dict[str, np.ndarray] = field(default_factory=dict)
+    summary: dict[str, np.ndarray] = field(default_factory=dict)
+    sketches: dict[str, QuantileSketch] = field(default_factory=dict)
+
+    @property
+    def paths(self) -> int:
+        return len(self.months_survived)
+
+    @property
+    def months(self) -> int:
+        return len(self.dates) - 1
+
+    @property
+    def depleted(self) -> np.ndarray:
+        return self.months_survived < self.months
+
+    @property
+    def liquid_wealth(self) -> np.ndarray:
+        return self.stock_investments + self.bonds_investments + self.cash
+
+    def bands(
+        self, name: str, quantiles: Sequence[float] = BAND_QUANTILES
+    ) -> pd.DataFrame:
+        """The p5 ... p95 bands of a sketched field on every month, for a fan chart."""
+        return quantile_bands(self.sketches[name], self.dates, quantiles)
+
+    @classmethod
+    def concat(cls, parts: Sequence["BatchSimulation"]) -> "BatchSimulation":
+        """Joins the paths of batches over the same months, in the given order."""
+        first = parts[0]
+        return cls(
+            dates=first.dates,
+            months_survived=np.concatenate([p.months_survived for p in parts]),
+            stock_investments=np.concatenate([p.stock_investments for p in parts]),
+            bonds_investments=np.concatenate([p.bonds_investments for p in parts]),
+            cash=np.concatenate([p.cash for p in parts]),
+            monthly_expenses=np.concatenate([p.monthly_expenses for p in parts]),
+            monthly_income=np.concatenate([p.monthly_income for p in parts]),
+            properties_alive=np.concatenate([p.properties_alive for p in parts]),
+            history={
+                name: np.concatenate([p.history[name] for p in parts])
+                for name in first.history
+            },
+            summary={
+                name: np.concatenate([p.summary[name] for p in parts])
+                for name in first.summary
+            },
+            sketches={
+                name: merge_sketches([p.sketches[name] for p in parts])
+                for name in first.sketches
+            },
+        )
+
+
+def merge_sketches(sketches: Sequence[QuantileSketch]) -> QuantileSketch:
+    merged = sketches[0].copy()
+    for sketch in sketches[1:]:
+        merged.merge(sketch)
+    return merged
+
+
+@dataclass
+class _PropertyArrays:
+    """The shared property timeline as (months + 1 x properties) float arrays."""
+
+    market_value: np.ndarray
+    monthly_income: np.ndarray
+    mortgage_left: np.ndarray
+
+    @property
+    def net_cash_value(self) -> np.ndarray:
+        return self.market_value - self.mortgage_left
+
+    @classmethod
+    def from_init(cls, init: FireSimulation, dates: list[date]) -> "_PropertyArrays":
+        return cls.from_timeline(
+            property_timeline(
+                init.investment_properties,
+                init.annual_property_appreciation_rate,
+                dates,
+            )
+        )
+
+    @classmethod
+    def from_timeline(
+        cls, timeline: list[list[InvestmentProperty]]
+    ) -> "_PropertyArrays":
+        shape = (len(timeline), len(timeline[0]))
+
+        def to_array(attr: str) -> np.ndarray:
+            values = [float(getattr(p, attr)) for month in timeline for p in month]
+            return np.array(values, dtype=np.float64).reshape(shape)
+
+        return cls(
+            market_value=to_array("market_value"),
+            monthly_income=to_array("monthly_income"),
+            mortgage_left=to_array("mortgage_left"),
+        )
+
+
+def field_values(
+    name: str,
+    k: int,
+    state: dict[str, np.ndarray],
+    alive: np.ndarray,
+    props: _PropertyArrays,
+) -> np.ndarray:
+    """The value of a `BATCH_FIELDS` field for every path, from the month `k` state arrays."""
+    if name in state:
+        return state[name]
+    if name == "liquid_wealth":
+        return state["stock_investments"] + state["bonds_investments"] + state["cash"]
+    if name == "wealth_inc_properties":
+        return (
+            state["stock_investments"]
+            + state["bonds_investments"]
+            + state["cash"]
+            + state["properties_net_cash_value"]
+        )
+    if name == "properties_market_value":
+        return alive @ props.market_value[k]
+    if name == "properties_mortgage_left":
+        return alive @ props.mortgage_left[k]
+    return alive @ props.monthly_income[k]
+
+
+@decimal_context
+def income_schedule(
+    init: FireSimulation, dates: list[date]
+) -> tuple[np.ndarray, np.ndarray]:
+    """
+    The salary doesn't depend on the market, so it's computed once with Decimal math.
+
+    Returns the unrounded income used for the cash flow of every month and the rounded one
+    that is stored in the state.
+    """
+    unrounded = [init.monthly_income]
+    rounded = [init.monthly_income]
+    for sim_date in dates[1:]:
+        income = rounded[-1]
+        if sim_date.month == 1:
+            income = rounded[-1] * (1 + init.annual_income_increase_rate)
+        unrounded.append(income)
+        rounded.append(round(income, 2))
+
+    return (
+        np.array([float(i) for i in unrounded], dtype=np.float64),
+        np.array([float(i) for i in rounded], dtype=np.float64),
+    )
+
+
+RateMatrix = Union[np.ndarray, RatePath]
+
+
+def as_rate_matrix(
+    rates: Optional[RateMatrix], paths: int, months: int
+) -> Optional[np.ndarray]:
+    """
+    Accepts a (months,) row or a `RatePath` shared by every path, or a (paths x months) matrix.
+
+    Returns a month-major (months x paths) array, so every step reads one contiguous row.
+    """
+    if rates is None:
+        return None
+
+    if isinstance(rates, RatePath):
+        rates = rates.as_array(months)
+
+    matrix = np.asarray(rates, dtype=np.float64)
+    if matrix.ndim == 1:
+        matrix = np.broadcast_to(matrix, (paths, matrix.shape[0]))
+
+    if matrix.shape[0] != paths or matrix.shape[1] < months:
+        raise ValueError(
+            f"expected a rate matrix of shape ({paths}, >={months}), got {matrix.shape}"
+        )
+
+    return np.ascontiguousarray(matrix[:, :months].T)
+
+
+def path_parameters(
+    init: FireSimulation, parameters: Mapping[str, Sequence[Any]], paths: int
+) -> dict[str, Any]:
+    """
+    The `PATH_PARAMETERS` of every path as float arrays, or as the float of `init` when not given per path.
+
+    The rates are divided by 12 in Decimal first, so a path gets the same monthly rate a run of its own would.
+    """
+    unknown = set(parameters) - set(PATH_PARAMETERS)
+    if unknown:
+        raise ValueError(f"fields that can't be set per path: {sorted(unknown)}")
+    for name, values in parameters.items():
+        if len(values) != paths:
+            raise ValueError(f"expected {paths} values of {name}, got {len(values)}")
+
+    def values(name: str, convert: Callable[[Any], float]) -> Any:
+        if name not in parameters:
+            return convert(getattr(init, name))
+        # a sweep repeats the same few values over many paths
+        converted: dict[Any, float] = {}
+        return np.array(
+            [
+                converted[v] if v in converted else converted.setdefault(v, convert(v))
+                for v in parameters[name]
+            ],
+            dtype=np.float64,
+        )
+
+    def monthly(rate: Any) -> float:
+        return float(Decimal(rate) / Decimal("12"))
+
+    def shares(strategy: str) -> np.ndarray:
+        return np.array(SURPLUS_STRATEGIES.get(strategy, (0.0, 0.0)))
+
+    strategies = parameters.get("invest_cash_surplus_strategy")
+    return dict(
+        stock_investments=values("stock_investments", float),
+        bonds_investments=values("bonds_investments", float),
+        cash=values("cash", float),
+        monthly_expenses=values("monthly_expenses", float),
+        stock_return_rate=values("stock_return_rate", monthly),
+        bonds_return_rate=values("bonds_return_rate", monthly),
+        annual_inflation_rate=values("annual_inflation_rate", monthly),
+        invest_cash_surplus=values("invest_cash_surplus", float),
+        invest_cash_threshold=values("invest_cash_threshold", float),
+        surplus_shares=(
+            shares(init.invest_cash_surplus_strategy)
+            if strategies is None
+            else np.array([shares(v) for v in strategies]).T
+        ),
+    )
+
+
+def _paths_from_rates(*rates: Optional[RateMatrix]) -> int:
+    for r in rates:
+        if r is not None and not isinstance(r, RatePath) and np.ndim(r) == 2:
+            return np.shape(r)[0]
+    return 1
+
+
+@decimal_context
+def run_batch_simulation(
+    init: FireSimulation,
+    months: int,
+    inflation_rates: Optional[RateMatrix] = None,
+    stock_returns: Optional[RateMatrix] = None,
+    paths: Optional[int] = None,
+    record: Sequence[str] = ("liquid_wealth", "wealth_inc_properties"),
+    engine: Literal["float", "cents"] = "float",
+    summary: Sequence[Statistic] = (),
+    parameters: Optional[Mapping[str, Sequence[Any]]] = None,
+    retire_after: Optional[Sequence[int]] = None,
+    sketch: Sequence[str] = (),
+) -> BatchSimulation:
+    """
+    Runs the same scenario as `run_simulation` for many rate paths at once.
+
+    `inflation_rates` and `stock_returns` are monthly rates, either a (paths x months) matrix
+    or a single (months,) row or `RatePath` shared by all paths. When not given, the fixed annual rates
+    from `init` are used, the same way `simulate_next` does without generators.
+
+    Every path follows the cash -> bonds -> stocks -> property waterfall of `simulate_next`, with float64 math
+    rounded to cents every month, half cent ties the way Decimal rounds them, see `round_cents`.
+    A path stops when its wealth including properties goes negative.
+
+    The `cents` engine keeps the money in integer cents and gives exactly the results of `run_simulation`
+    for every path, at the cost of computing the few ambiguous months with Decimal.
+
+    The `summary` statistics are reduced month by month, with `record=()` a run keeps no month
+    of any path besides the last one. The `sketch` fields are added to a `QuantileSketch` every month,
+    their percentile bands take memory for the months but not for the paths.
+
+    `parameters` gives the float engine one value per path for the `PATH_PARAMETERS` fields of `init`,
+    e.g. a different monthly expenses for every path, see `finsim.sweep`.
+    `retire_after` stops the salary of every path after it worked that many months + 1,
+    the same way a candidate of `run_fire_simulation` does, see `finsim.fire_curve`. Such a path
+    also stops like the candidate, once its wealth including properties is no longer positive.
+    """
+    if paths is None:
+        paths = _paths_from_rates(inflation_rates, stock_returns)
+        if parameters:
+            paths = len(next(iter(parameters.values())))
+
+    unknown = set(record) - set(BATCH_FIELDS)
+    if unknown:
+        raise ValueError(f"unknown fields to record: {sorted(unknown)}")
+    check_statistics(summary, BATCH_FIELDS)
+    unknown = set(sketch) - set(BATCH_FIELDS)
+    if unknown:
+        raise ValueError(f"unknown fields to sketch: {sorted(unknown)}")
+
+    if engine == "cents":
+        if parameters or retire_after is not None:
+            raise ValueError("the cents engine takes its parameters from init")
+        from finsim.cents import run_cents_batch_simulation
+
+        return run_cents_batch_simulation(
+            init,
+            months,
+            inflation_rates,
+            stock_returns,
+            paths,
+            record,
+            summary,
+            sketch,
+        )
+    if engine != "float":
+        raise ValueError(f"unknown engine: {engine}")
+    from finsim.fast import round_cents_array
+
+    inflation = as_rate_matrix(inflation_rates, paths, months)
+    stocks = as_rate_matrix(stock_returns, paths, months)
+
+    dates = month_dates(init.date, months)
+    income_unrounded, income_rounded = income_schedule(init, dates)
+    props = _PropertyArrays.from_init(init, dates)
+    props_net = props.net_cash_value
+    has_props = props_net.shape[1] > 0
+
+    params = path_parameters(init, parameters or {}, paths)
+    fixed_monthly_inflation = params["annual_inflation_rate"]
+    fixed_stock_return = params["stock_return_rate"]
+    bonds_monthly_rate = params["bonds_return_rate"]
+    threshold = params["invest_cash_threshold"]
+    invest_surplus = params["invest_cash_surplus"]
+    stock_share, bonds_share = params["surplus_shares"]
+
+    # the last month every path earns its salary
+    last_salary = None if retire_after is None else np.asarray(retire_after) + 1
+    if last_salary is not None and last_salary.shape != (paths,):
+        raise ValueError(f"expected {paths} retirement months, got {last_salary.shape}")
+
+    stock = np.full(paths, params["stock_investments"])
+    bonds = np.full(paths, params["bonds_investments"])
+    cash = np.full(paths, params["cash"])
+    expenses = np.full(paths, params["monthly_expenses"])
+    income = np.full(paths, float(init.monthly_income))
+    # kept as floats so the per path property totals are a single matrix product
+    alive = np.ones((paths, props_net.shape[1]), dtype=np.float64)
+    months_survived = np.zeros(paths, dtype=np.int64)
+    active = np.ones(paths, dtype=bool)
+
+    # month-major, so recording a month writes one contiguous row
+    history = {name: np.full((months + 1, paths), np.nan) for name in record}
+    statistics = BatchStatistics(summary, paths)
+    sketches = {name: QuantileSketch(months + 1) for name in sketch}
+    summarized = {stat.field for stat in summary} | set(sketch)
+
+    def record_state(k: int, mask: np.ndarray, props_net_value: np.ndarray) -> None:
+        state = dict(
+            stock_investments=stock,
+            bonds_investments=bonds,
+            cash=cash,
+            monthly_expenses=expenses,
+            monthly_income=income,
+            properties_net_cash_value=props_net_value,
+        )
+        values = {
+            name: field_values(name, k, state, alive, props)
+            for name in summarized | set(history)
+        }
+        for name, column in history.items():
+            np.copyto(column[k], values[name], where=mask)
+        statistics.add(values, mask)
+        for name, quantiles in sketches.items():
+            quantiles.add(k, values[name], mask)
+
+    props_net_value = alive @ props_net[0] if has_props else np.zeros(paths)
+    record_state(0, active, props_net_value)
+
+    for k in range(1, months + 1):
+        if inflation is not None:
+            monthly_inflation = inflation[k - 1]
+        else:
+            monthly_inflation = fixed_monthly_inflation
+
+        if stocks is not None:
+            new_stock = stock * (1 + stocks[k - 1])
+        else:
+            new_stock = stock * (1 + fixed_stock_return)
+
+        month_income: Any = income_unrounded[k]
+        next_income: Any = income_rounded[k]
+        if last_salary is not None:
+            working = k <= last_salary
+            month_income = np.where(working, month_income, 0.0)
+            next_income = np.where(working, next_income, 0.0)
+
+        total_expenses = expenses * (1 + monthly_inflation)
+        total_cash = cash + month_income
+        if has_props:
+            total_cash += alive @ props.monthly_income[k - 1]
+            props_net_value = alive @ props_net[k]
+
+        new_bonds = bonds + bonds * bonds_monthly_rate
+
+        # what is left after paying the expenses from cash, then bonds, then stocks
+        after_cash = total_cash - total_expenses
+        after_bonds = after_cash + new_bonds
+        after_stock = after_bonds + new_stock
+
+        new_cash = np.where(after_cash > 0, after_cash, np.minimum(after_stock, 0))
+        next_bonds = np.where(after_cash > 0, new_bonds, np.maximum(after_bonds, 0))
+        next_stock = np.where(after_bonds > 0, new_stock, np.maximum(after_stock, 0))
+
+        sold_lanes = np.empty(0, dtype=np.int64)
+        if has_props:
+            sold_lanes = np.flatnonzero(
+                active & (after_stock <= 0) & (after_stock + props_net_value > 0)
+            )
+        if len(sold_lanes):
+            alive_before_sale = alive[sold_lanes].copy()
+            # sell the property with the lowest net cash value
+            candidates = np.where(alive_before_sale > 0, props_net[k], np.inf)
+            to_sell = np.argmin(candidates, axis=1)
+            alive[sold_lanes, to_sell] = 0.0
+            new_cash[sold_lanes] = props_net[k, to_sell] + after_stock[sold_lanes]
+            # selling a property leaves bonds untouched, same as simulate_next
+            next_bonds[sold_lanes] = new_bonds[sold_lanes]
+            props_net_value = alive @ props_net[k]
+
+        if np.any(invest_surplus):
+            amount_over_threshold = np.maximum(new_cash - threshold, 0) * invest_surplus
+            next_stock += amount_over_threshold * stock_share
+            next_bonds += amount_over_threshold * bonds_share
+            new_cash -= amount_over_threshold
+
+        round_cents_array(next_stock)
+        round_cents_array(next_bonds)
+        round_cents_array(new_cash)
+        next_expenses = round_cents_array(total_expenses)
+
+        wealth = next_stock + next_bonds + props_net_value + new_cash
+        # a fire candidate stops once its wealth is gone, `run_simulation` only once it goes negative
+        solvent = wealth >= 0 if last_salary is None else wealth > 0
+        update = active & solvent
+
+        if update.all():
+            stock, bonds, cash = next_stock, next_bonds, new_cash
+            expenses = next_expenses
+            income = np.broadcast_to(next_income, paths).copy()
+        else:
+            if len(sold_lanes):
+                revert = ~update[sold_lanes]
+                alive[sold_lanes[revert]] = alive_before_sale[revert]
+                props_net_value = alive @ props_net[k]
+
+            stock = np.where(update, next_stock, stock)
+            bonds = np.where(update, next_bonds, bonds)
+            cash = np.where(update, new_cash, cash)
+            expenses = np.where(update, next_expenses, expenses)
+            income = np.where(update, next_income, income)
+
+        months_survived[update] = k
+        active = update
+
+        record_state(k, active, props_net_value)
+
+        if not active.any():
+            break
+
+    return BatchSimulation(
+        dates=dates,
+        months_survived=months_survived,
+        stock_investments=stock,
+        bonds_investments=bonds,
+        cash=cash,
+        monthly_expenses=expenses,
+        monthly_income=income,
+        properties_alive=alive > 0,
+        history={name: column.T for name, column in history.items()},
+        summary=statistics.result(),
+        sketches=sketches,
+    )
@@ -0,0 +1,734 @@
+from dataclasses import replace
+from datetime import date
+from itertools import chain
+from decimal import Decimal
+from typing import Iterator, NamedTuple, Optional, Sequence
+
+import numpy as np
+
+from finsim.batch import (
+    SURPLUS_STRATEGIES,
+    BatchSimulation,
+    RateMatrix,
+    _PropertyArrays,
+    as_rate_matrix,
+    field_values,
+    income_schedule,
+)
+from finsim.context import decimal_context
+from finsim.frame import STATE_COLUMNS, SimulationFrame, inflation_columns
+from finsim.instrumentation import count, timed
+from finsim.properties import InvestmentProperty, property_timeline
+from finsim.rates import RatePath
+from finsim.simulations import (
+    FireSimulation,
+    _rate_at,
+    lasts_long_enough,
+    month_dates,
+    simulate_next,
+)
+from finsim.sketch import QuantileSketch
+from finsim.summary import BatchStatistics, Statistic
+
+# float64 keeps about 16 significant digits, a value closer than this to a rounding or branch boundary,
+# relative to the money moved in the month, is settled with Decimal
+RELATIVE_BAND = 1e-12
+# in cents
+ABSOLUTE_BAND = 1e-9
+
+
+class CentsState(NamedTuple):
+    """Money in integer cents, the state `simulate_next` keeps after rounding to 2 places."""
+
+    stock_investments: int
+    bonds_investments: int
+    cash: int
+    monthly_expenses: int
+    monthly_income: int
+    # indexes of the initial properties that weren't sold yet
+    properties: tuple[int, ...]
+
+
+class _Ambiguous(Exception):
+    """Float math can't tell which side of a rounding or branch boundary the Decimal engine lands on."""
+
+
+def to_cents(value: Decimal) -> int:
+    return int(value.scaleb(2))
+
+
+def from_cents(cents: int) -> Decimal:
+    return Decimal(cents).scaleb(-2)
+
+
+def is_cents(value: Decimal) -> bool:
+    return value == value.quantize(Decimal("0.01"))
+
+
+class CentsEngine:
+    """
+    The `simulate_next` rules with the money kept in integer cents.
+
+    Every month is computed in float64 from the integer state and rounded half to even back to cents.
+    That gives the same cents as Decimal whenever the float result is clearly away from a tie
+    or from a branch of the waterfall. The few months that aren't are computed with `simulate_next` itself,
+    so the results are exactly the ones of the Decimal engine.
+    """
+
+    @decimal_context
+    def __init__(
+        self,
+        init: FireSimulation,
+        months: int,
+        inflation_rates: Optional[RatePath] = None,
+        stock_returns: Optional[RatePath] = None,
+        dates: Optional[list[date]] = None,
+        timeline: Optional[list[list[InvestmentProperty]]] = None,
+    ):
+        self.init = init
+        self.months = months
+        self.inflation_rates = inflation_rates
+        self.stock_returns = stock_returns
+        self.dates = dates if dates is not None else month_dates(init.date, months)
+        self.timeline = (
+            timeline
+            if timeline is not None
+            else property_timeline(
+                init.investment_properties,
+                init.annual_property_appreciation_rate,
+                self.dates,
+            )
+        )
+
+        self._rent = [[float(p.monthly_income * 100) for p in m] for m in self.timeline]
+        self._net = [
+            [float(p.net_cash_value() * 100) for p in m] for m in self.timeline
+        ]
+        self._january = [d.month == 1 for d in self.dates]
+
+        self._inflation = (
+            inflation_rates.as_array(months).tolist()
+            if inflation_rates is not None
+            else None
+        )
+        self._stock_returns = (
+            stock_returns.as_array(months).tolist()
+            if stock_returns is not None
+            else None
+        )
+        self._fixed_monthly_inflation = float(
+            init.annual_inflation_rate / Decimal("12")
+        )
+        self._fixed_stock_return = float(init.stock_return_rate / Decimal("12"))
+        self._bonds_monthly_rate = float(init.bonds_return_rate / Decimal("12"))
+        self._income_increase = float(init.annual_income_increase_rate)
+        self._threshold = float(init.invest_cash_threshold * 100)
+        self._surplus_split = (
+            SURPLUS_STRATEGIES.get(init.invest_cash_surplus_strategy, (0.0, 0.0))
+            if init.invest_cash_surplus
+            else None
+        )
+        # the first month starts from the unrounded init, so it's only exact in cents when init is
+        self._exact_first_month = not all(
+            is_cents(v)
+            for v in (
+                init.stock_investments,
+                init.bonds_investments,
+                init.cash,
+                init.monthly_expenses,
+                init.monthly_income,
+            )
+        )
+
+    def initial_state(self) -> CentsState:
+        init = self.init
+        return CentsState(
+            stock_investments=to_cents(round(init.stock_investments, 2)),
+            bonds_investments=to_cents(round(init.bonds_investments, 2)),
+            cash=to_cents(round(init.cash, 2)),
+            monthly_expenses=to_cents(round(init.monthly_expenses, 2)),
+            monthly_income=to_cents(round(init.monthly_income, 2)),
+            properties=tuple(range(len(init.investment_properties))),
+        )
+
+    def step(
+        self, prev: CentsState, month: int, zero_income: bool = False
+    ) -> CentsState:
+        """Simulates month `month` of the run, the state it returns is at index `month + 1`."""
+        count("fast_steps")
+        if month == 0 and self._exact_first_month:
+            return self.exact_step(prev, month, zero_income)
+
+        try:
+            return self._float_step(prev, month, zero_income)
+        except _Ambiguous:
+            return self.exact_step(prev, month, zero_income)
+
+    def _float_step(
+        self, prev: CentsState, month: int, zero_income: bool
+    ) -> CentsState:
+        k = month + 1
+        properties = prev.properties
+
+        if self._inflation is not None:
+            monthly_inflation_rate = self._inflation[month]
+        else:
+            monthly_inflation_rate = self._fixed_monthly_inflation
+        total_monthly_expenses = prev.monthly_expenses * (1 + monthly_inflation_rate)
+
+        new_monthly_income = 0 if zero_income else prev.monthly_income
+        january = self._january[k]
+        if january:
+            new_monthly_income = new_monthly_income * (1 + self._income_increase)
+
+        total_monthly_cash = prev.cash + new_monthly_income
+        net = self._net[k]
+        new_properties_net_cash_value = 0.0
+        if properties:
+            rent = self._rent[k - 1]
+            total_monthly_cash += sum([rent[p] for p in properties])
+            new_properties_net_cash_value = sum([net[p] for p in properties])
+
+        new_bonds = prev.bonds_investments * (1 + self._bonds_monthly_rate)
+        if self._stock_returns is not None:
+            new_stock = prev.stock_investments * (1 + self._stock_returns[month])
+        else:
+            new_stock = prev.stock_investments * (1 + self._fixed_stock_return)
+
+        band = ABSOLUTE_BAND + RELATIVE_BAND * (
+            abs(total_monthly_cash)
+            + total_monthly_expenses
+            + abs(new_bonds)
+            + abs(new_stock)
+            + abs(new_properties_net_cash_value)
+        )
+
+        # what is left after paying the expenses from cash, then bonds, then stocks, like simulate_next
+        after_cash = _decided(total_monthly_cash - total_monthly_expenses, band)
+        drained = False
+        if after_cash > 0:
+            new_cash = after_cash
+        else:
+            after_bonds = _decided(after_cash + new_bonds, band)
+            if after_bonds > 0:
+                new_cash = 0.0
+                drained = True
+                new_bonds = after_bonds
+            else:
+                after_stock = _decided(after_bonds + new_stock, band)
+                if after_stock > 0:
+                    new_cash = 0.0
+                    drained = True
+                    new_stock = after_stock
+                    new_bonds = 0.0
+                elif (
+                    properties
+                    and _decided(after_stock + new_properties_net_cash_value, band) > 0
+                ):
+                    # sell the property with the lowest net cash value, bonds stay untouched
+                    to_sell = _lowest(properties, net, band)
+                    properties = tuple(p for p in properties if p != to_sell)
+                    new_stock = 0.0
+                    new_cash = net[to_sell] + after_stock
+                else:
+                    new_cash = after_stock
+                    new_bonds = 0.0
+                    new_stock = 0.0
+
+        if self._surplus_split is not None:
+            amount_over_threshold = new_cash - self._threshold
+            # the zero cash of the waterfall is exact, only computed cash can be on the wrong side
+            if not drained:
+                amount_over_threshold = _decided(amount_over_threshold, band)
+            if amount_over_threshold > 0:
+                stock_share, bonds_share = self._surplus_split
+                new_stock += amount_over_threshold * stock_share
+                new_bonds += amount_over_threshold * bonds_share
+                new_cash -= amount_over_threshold
+
+        return CentsState(
+            stock_investments=_round(new_stock, band),
+            bonds_investments=_round(new_bonds, band),
+            cash=_round(new_cash, band),
+            monthly_expenses=_round(total_monthly_expenses, band),
+            monthly_income=(
+                _round(new_monthly_income, band) if january else new_monthly_income
+            ),
+            properties=properties,
+        )
+
+    @decimal_context
+    def exact_step(
+        self, prev: CentsState, month: int, zero_income: bool = False
+    ) -> CentsState:
+        """The month computed by `simulate_next`."""
+        return self.simulate_exact(
+            prev,
+            month,
+            _rate_at(self.inflation_rates, month),
+            _rate_at(self.stock_returns, month),
+            zero_income,
+        )
+
+    @decimal_context
+    def simulate_exact(
+        self,
+        prev: CentsState,
+        month: int,
+        inflation_rate: Optional[Decimal],
+        stock_return: Optional[Decimal],
+        zero_income: bool = False,
+    ) -> CentsState:
+        """`exact_step` with the rates of the month given, for callers that keep their own rates."""
+        count("cents.exact_steps")
+        prev_sim = self.to_simulation(prev, month)
+        if zero_income:
+            prev_sim = replace(prev_sim, monthly_income=Decimal("0"))
+
+        next_sim = simulate_next(
+            prev_sim, inflation_rate=inflation_rate, stock_return=stock_return
+        )
+
+        properties = prev.properties
+        if len(next_sim.investment_properties) < len(properties):
+            current = self.timeline[month + 1]
+            sold = next(
+                (
+                    p
+                    for p, kept in zip(properties, next_sim.investment_properties)
+                    if current[p] != kept
+                ),
+                properties[-1],
+            )
+            properties = tuple(p for p in properties if p != sold)
+
+        return CentsState(
+            stock_investments=to_cents(next_sim.stock_investments),
+            bonds_investments=to_cents(next_sim.bonds_investments),
+            cash=to_cents(next_sim.cash),
+            monthly_expenses=to_cents(next_sim.monthly_expenses),
+            monthly_income=to_cents(next_sim.monthly_income),
+            properties=properties,
+        )
+
+    @decimal_context
+    def wealth_sign(self, state: CentsState, k: int) -> int:
+        """The sign of the wealth including properties of the state at index `k`."""
+        liquid = state.stock_investments + state.bonds_investments + state.cash
+        net = self._net[k]
+        wealth = liquid + sum([net[p] for p in state.properties])
+        band = ABSOLUTE_BAND + RELATIVE_BAND * (abs(liquid) + abs(wealth))
+        if abs(wealth) > band:
+            return 1 if wealth > 0 else -1
+
+        exact = from_cents(liquid) + sum(
+            [self.timeline[k][p].net_cash_value() for p in state.properties],
+            Decimal("0"),
+        )
+        return (exact > 0) - (exact < 0)
+
+    @decimal_context
+    def to_simulation(self, state: CentsState, k: int) -> FireSimulation:
+        """Converts the state at index `k` of the run to the Decimal dataclass."""
+        init = self.init
+        if k == 0:
+            return init
+
+        annual_inflation_rate = init.annual_inflation_rate
+        monthly_inflation_rate = annual_inflation_rate / Decimal("12")
+        if self.inflation_rates is not None:
+            monthly_inflation_rate = self.inflation_rates[k - 1]
+            annual_inflation_rate = monthly_inflation_rate * Decimal("12")
+
+        return FireSimulation(
+            stock_investments=from_cents(state.stock_investments),
+            investment_properties=[self.timeline[k][p] for p in state.properties],
+            bonds_investments=from_cents(state.bonds_investments),
+            cash=from_cents(state.cash),
+            stock_return_rate=init.stock_return_rate,
+            bonds_return_rate=init.bonds_return_rate,
+            monthly_expenses=from_cents(state.monthly_expenses),
+            monthly_income=from_cents(state.monthly_income),
+            annual_inflation_rate=annual_inflation_rate,
+            monthly_inflation_rate=monthly_inflation_rate,
+            annual_property_appreciation_rate=init.annual_property_appreciation_rate,
+            invest_cash_surplus=init.invest_cash_surplus,
+            invest_cash_threshold=init.invest_cash_threshold,
+            invest_cash_surplus_strategy=init.invest_cash_surplus_strategy,
+            annual_income_increase_rate=init.annual_income_increase_rate,
+            date=self.dates[k],
+        )
+
+    def to_simulations(
+        self, states: list[CentsState], first: int = 0
+    ) -> list[FireSimulation]:
+        return [self.to_simulation(s, first + i) for i, s in enumerate(states)]
+
+    @timed("frame.build")
+    def to_frame(self, states: list[CentsState]) -> SimulationFrame:
+        """Writes the states of the months from the first one into a `SimulationFrame`."""
+        frame = SimulationFrame.allocate(
+            self.dates[: len(states)],
+            self.init.investment_properties,
+            self.timeline[: len(states)],
+            self.init,
+        )
+        for k, state in enumerate(states):
+            frame.write(k, [cents / 100 for cents in state[:5]], state.properties)
+        # the initial state isn't rounded to cents
+        frame.write(0, [float(getattr(self.init, name)) for name in STATE_COLUMNS], [])
+        frame.write_inflation(
+            *inflation_columns(self.init, self._inflation, self.months)
+        )
+        return frame.finish()
+
+    def simulate(self) -> list[CentsState]:
+        """The states of `run_simulation`, until the wealth including properties goes negative."""
+        return list(self.iter_states())
+
+    def iter_states(self) -> Iterator[CentsState]:
+        """`simulate` one month at a time, only the last state is kept."""
+        state = self.initial_state()
+        yield state
+        for month in range(self.months):
+            next_state = self.step(state, month)
+            if self.wealth_sign(next_state, month + 1) < 0:
+                return
+
+            state = next_state
+            yield state
+
+
+def _decided(value: float, band: float) -> float:
+    if abs(value) < band:
+        raise _Ambiguous
+    return value
+
+
+def _round(value: float, band: float) -> int:
+    rounded = round(value)
+    if abs(abs(value - rounded) - 0.5) < band:
+        raise _Ambiguous
+    return rounded
+
+
+def _lowest(properties: tuple[int, ...], net: list[float], band: float) -> int:
+    lowest = min(properties, key=net.__getitem__)
+    if any(p != lowest and net[p] - net[lowest] < band for p in properties):
+        raise _Ambiguous
+    return lowest
+
+
+@decimal_context
+def run_cents_simulation(
+    init: FireSimulation,
+    months: int,
+    inflation_rates: Optional[RatePath] = None,
+    stock_returns: Optional[RatePath] = None,
+) -> list[FireSimulation]:
+    engine = CentsEngine(init, months, inflation_rates, stock_returns)
+    return engine.to_simulations(engine.simulate())
+
+
+class CentsFireCandidates:
+    """The candidate runs of the fire search on the cents engine, see `_FireCandidates`."""
+
+    @decimal_context
+    def __init__(
+        self,
+        init: FireSimulation,
+        expected_number_of_months: int,
+        inflation_rates: Optional[RatePath],
+        stock_returns: Optional[RatePath],
+    ):
+        self.expected_number_of_months = expected_number_of_months
+        self.engine = CentsEngine(
+            init, expected_number_of_months, inflation_rates, stock_returns
+        )
+
+        self.working = [self.engine.initial_state()]
+        for month in range(expected_number_of_months):
+            next_state = self.engine.step(self.working[-1], month)
+            if self.engine.wealth_sign(next_state, month + 1) <= 0:
+                break
+
+            self.working.append(next_state)
+
+    def run_retirement(self, retire_after: int) -> list[CentsState]:
+        if len(self.working) < retire_after + 2:
+            # the money ran out before retirement
+            return []
+
+        states = [self.working[retire_after + 1]]
+        for month in range(retire_after + 1, self.expected_number_of_months):
+            next_state = self.engine.step(states[-1], month, zero_income=True)
+            if self.engine.wealth_sign(next_state, month + 1) <= 0:
+                break
+
+            states.append(next_state)
+
+        return states[1:]
+
+    def join(
+        self, retire_after: int, retirement: list[CentsState]
+    ) -> list[FireSimulation]:
+        working = self.working[: retire_after + 2]
+        return self.engine.to_simulations(working) + self.engine.to_simulations(
+            retirement, first=len(working)
+        )
+
+    def iter_join(
+        self, retire_after: int, retirement: list[CentsState]
+    ) -> Iterator[FireSimulation]:
+        """`join` one month at a time."""
+        states = chain(self.working[: retire_after + 2], retirement)
+        return (self.engine.to_simulation(s, k) for k, s in enumerate(states))
+
+    def join_frame(
+        self, retire_after: int, retirement: list[CentsState]
+    ) -> SimulationFrame:
+        return self.engine.to_frame(self.working[: retire_after + 2] + retirement)
+
+    def is_sustainable(self, retire_after: int, retirement: list[CentsState]) -> bool:
+        length = min(len(self.working), retire_after + 2) + len(retirement)
+        return lasts_long_enough(length, self.expected_number_of_months)
+
+
+@decimal_context
+def run_cents_batch_simulation(
+    init: FireSimulation,
+    months: int,
+    inflation_rates: Optional[RateMatrix],
+    stock_returns: Optional[RateMatrix],
+    paths: int,
+    record: Sequence[str],
+    summary: Sequence[Statistic] = (),
+    sketch: Sequence[str] = (),
+) -> BatchSimulation:
+    """
+    `run_batch_simulation` with integer cents, every path gives exactly the `run_simulation` results.
+
+    The months are computed for all paths at once in float64, the paths with an ambiguous month
+    compute that month with `simulate_next`.
+    """
+    inflation = as_rate_matrix(inflation_rates, paths, months)
+    stocks = as_rate_matrix(stock_returns, paths, months)
+
+    dates = month_dates(init.date, months)
+    timeline = property_timeline(
+        init.investment_properties, init.annual_property_appreciation_rate, dates
+    )
+    props = _PropertyArrays.from_timeline(timeline)
+    props_net = props.net_cash_value
+    rent_cents = props.monthly_income * 100
+    net_cents = props_net * 100
+    has_props = props_net.shape[1] > 0
+
+    income_unrounded, income_rounded = income_schedule(init, dates)
+    income_unrounded_cents = income_unrounded * 100
+    income_cents = np.rint(income_rounded * 100).astype(np.int64)
+
+    # only computes the ambiguous months, with the rates of their path
+    engine = CentsEngine(init, months, dates=dates, timeline=timeline)
+    initial = engine.initial_state()
+    fixed_monthly_inflation = engine._fixed_monthly_inflation
+    fixed_stock_return = engine._fixed_stock_return
+    bonds_monthly_rate = engine._bonds_monthly_rate
+    threshold = engine._threshold
+    stock_share, bonds_share = SURPLUS_STRATEGIES.get(
+        init.invest_cash_surplus_strategy, (0.0, 0.0)
+    )
+
+    stock = np.full(paths, initial.stock_investments, dtype=np.int64)
+    bonds = np.full(paths, initial.bonds_investments, dtype=np.int64)
+    cash = np.full(paths, initial.cash, dtype=np.int64)
+    expenses = np.full(paths, initial.monthly_expenses, dtype=np.int64)
+    income = np.full(paths, initial.monthly_income, dtype=np.int64)
+    alive = np.ones((paths, props_net.shape[1]), dtype=np.float64)
+    months_survived = np.zeros(paths, dtype=np.int64)
+    active = np.ones(paths, dtype=bool)
+
+    history = {name: np.full((months + 1, paths), np.nan) for name in record}
+    statistics = BatchStatistics(summary, paths)
+    sketches = {name: QuantileSketch(months + 1) for name in sketch}
+    summarized = {stat.field for stat in summary} | set(sketch)
+
+    def dollars(k: int) -> dict[str, np.ndarray]:
+        # the initial state isn't rounded to cents by simulate_next, it's kept as given
+        exact_init = k == 0 or months_survived == 0
+        return {
+            name: np.where(exact_init, float(getattr(init, name)), cents / 100)
+            for name, cents in (
+                ("stock_investments", stock),
+                ("bonds_investments", bonds),
+                ("cash", cash),
+                ("monthly_expenses", expenses),
+                ("monthly_income", income),
+            )
+        }
+
+    def record_state(k: int, mask: np.ndarray) -> None:
+        state = dollars(k) | dict(
+            properties_net_cash_value=(
+                alive @ props_net[k] if has_props else np.zeros(paths)
+            ),
+        )
+        values = {
+            name: field_values(name, k, state, alive, props)
+            for name in summarized | set(history)
+        }
+        for name, column in history.items():
+            np.copyto(column[k], values[name], where=mask)
+        statistics.add(values, mask)
+        for name, quantiles in sketches.items():
+            quantiles.add(k, values[name], mask)
+
+    record_state(0, active)
+
+    for k in range(1, months + 1):
+        alive_before = alive.copy()
+
+        if inflation is not None:
+            monthly_inflation = inflation[k - 1]
+        else:
+            monthly_inflation = fixed_monthly_inflation
+
+        if stocks is not None:
+            new_stock = stock * (1 + stocks[k - 1])
+        else:
+            new_stock = stock * (1 + fixed_stock_return)
+
+        total_expenses = expenses * (1 + monthly_inflation)
+        total_cash = cash + income_unrounded_cents[k]
+        props_net_value = np.zeros(paths)
+        if has_props:
+            total_cash += alive @ rent_cents[k - 1]
+            props_net_value = alive @ net_cents[k]
+
+        new_bonds = bonds * (1 + bonds_monthly_rate)
+
+        band = ABSOLUTE_BAND + RELATIVE_BAND * (
+            np.abs(total_cash)
+            + total_expenses
+            + np.abs(new_bonds)
+            + np.abs(new_stock)
+            + np.abs(props_net_value)
+        )
+
+        after_cash = total_cash - total_expenses
+        after_bonds = after_cash + new_bonds
+        after_stock = after_bonds + new_stock
+        ambiguous = (
+            (np.abs(after_cash) < band)
+            | ((after_cash <= 0) & (np.abs(after_bonds) < band))
+            | ((after_bonds <= 0) & (np.abs(after_stock) < band))
+        )
+
+        new_cash = np.where(after_cash > 0, after_cash, np.minimum(after_stock, 0))
+        # the paying from bonds or stocks leaves exactly no cash
+        drained = (after_cash <= 0) & (after_stock > 0)
+        next_bonds = np.where(after_cash > 0, new_bonds, np.maximum(after_bonds, 0))
+        next_stock = np.where(after_bonds > 0, new_stock, np.maximum(after_stock, 0))
+
+        if has_props:
+            after_props = after_stock + props_net_value
+            ambiguous |= (after_stock <= 0) & (np.abs(after_props) < band)
+            sold_lanes = np.flatnonzero(active & (after_stock <= 0) & (after_props > 0))
+            if len(sold_lanes):
+                candidates = np.where(alive[sold_lanes] > 0, net_cents[k], np.inf)
+                to_sell = np.argmin(candidates, axis=1)
+                if candidates.shape[1] > 1:
+                    lowest_two = np.partition(candidates, 1, axis=1)
+                    ambiguous[sold_lanes] |= (
+                        lowest_two[:, 1] - lowest_two[:, 0] < band[sold_lanes]
+                    )
+                alive[sold_lanes, to_sell] = 0.0
+                new_cash[sold_lanes] = net_cents[k, to_sell] + after_stock[sold_lanes]
+                next_bonds[sold_lanes] = new_bonds[sold_lanes]
+                props_net_value = alive @ net_cents[k]
+
+        if init.invest_cash_surplus:
+            amount_over_threshold = new_cash - threshold
+            # the zero cash of the waterfall is exact, only computed cash can be on the wrong side
+            ambiguous |= ~drained & (np.abs(amount_over_threshold) < band)
+            np.maximum(amount_over_threshold, 0, out=amount_over_threshold)
+            next_stock += amount_over_threshold * stock_share
+            next_bonds += amount_over_threshold * bonds_share
+            new_cash -= amount_over_threshold
+
+        rounded = []
+        for value in (next_stock, next_bonds, new_cash, total_expenses):
+            cents = np.rint(value)
+            ambiguous |= np.abs(np.abs(value - cents) - 0.5) < band
+            rounded.append(cents.astype(np.int64))
+        next_stock, next_bonds, new_cash, next_expenses = rounded
+
+        wealth = next_stock + next_bonds + new_cash + props_net_value
+        ambiguous |= np.abs(wealth) < band
+        solvent = wealth >= 0
+
+        if k == 1 and engine._exact_first_month:
+            ambiguous[:] = True
+
+        for lane in np.flatnonzero(active & ambiguous):
+            prev = CentsState(
+                stock_investments=int(stock[lane]),
+                bonds_investments=int(bonds[lane]),
+                cash=int(cash[lane]),
+                monthly_expenses=int(expenses[lane]),
+                monthly_income=int(income[lane]),
+                properties=tuple(np.flatnonzero(alive_before[lane]).tolist()),
+            )
+            exact = engine.simulate_exact(
+                prev,
+                k - 1,
+                _lane_rate(inflation_rates, inflation, lane, k - 1),
+                _lane_rate(stock_returns, stocks, lane, k - 1),
+            )
+            next_stock[lane] = exact.stock_investments
+            next_bonds[lane] = exact.bonds_investments
+            new_cash[lane] = exact.cash
+            next_expenses[lane] = exact.monthly_expenses
+            if has_props:
+                alive[lane] = 0.0
+                alive[lane, list(exact.properties)] = 1.0
+            solvent[lane] = engine.wealth_sign(exact, k) >= 0
+
+        update = active & solvent
+        if has_props:
+            alive[~update] = alive_before[~update]
+
+        stock = np.where(update, next_stock, stock)
+        bonds = np.where(update, next_bonds, bonds)
+        cash = np.where(update, new_cash, cash)
+        expenses = np.where(update, next_expenses, expenses)
+        income = np.where(update, income_cents[k], income)
+
+        months_survived[update] = k
+        active = update
+
+        record_state(k, active)
+
+        if not active.any():
+            break
+
+    return BatchSimulation(
+        dates=dates,
+        months_survived=months_survived,
+        properties_alive=alive > 0,
+        history={name: column.T for name, column in history.items()},
+        summary=statistics.result(),
+        sketches=sketches,
+        **dollars(months),
+    )
+
+
+def _lane_rate(
+    rates: Optional[RateMatrix], matrix: Optional[np.ndarray], lane: int, month: int
+) -> Optional[Decimal]:
+    """The Decimal rate of one path, the same one `RatePath` gives for the float."""
+    if rates is None or matrix is None:
+        return None
+    if isinstance(rates, RatePath):
+        return rates[month]
+    return Decimal(repr(float(matrix[month, lane])))
@@ -0,0 +1,37 @@
+from contextvars import ContextVar
+from decimal import Context, getcontext, localcontext
+from functools import wraps
+from typing import Callable, Optional, TypeVar
+
+# the arithmetic of every Decimal computation of the engine, whatever the context of the calling thread
+DECIMAL_CONTEXT = Context(prec=26)
+
+# the context installed by the outermost engine call of the current thread or task
+_active: ContextVar[Optional[Context]] = ContextVar(
+    "finsim_decimal_context", default=None
+)
+
+F = TypeVar("F", bound=Callable)
+
+
+def decimal_context(fn: F) -> F:
+    """
+    Runs `fn` in a copy of `DECIMAL_CONTEXT` that is local to the calling thread.
+
+    The caller's context is never read nor changed, so the results are the same in any thread.
+    Engine functions called from inside another one are already in the context and don't switch it again.
+    """
+
+    @wraps(fn)
+    def wrapper(*args, **kwargs):
+        if getcontext() is _active.get():
+            return fn(*args, **kwargs)
+
+        with localcontext(DECIMAL_CONTEXT) as ctx:
+            token = _active.set(ctx)
+            try:
+                return fn(*args, **kwargs)
+            finally:
+                _active.reset(token)
+
+    return wrapper  # type: ignore
@@ -0,0 +1,494 @@
+import math
+from datetime import date
+from itertools import chain
+from decimal import Decimal
+from typing import Iterator, NamedTuple, Optional
+
+import numpy as np
+
+from finsim.batch import SURPLUS_STRATEGIES
+from finsim.context import decimal_context
+from finsim.properties import InvestmentProperty
+from finsim.instrumentation import count, timed
+from finsim.frame import SimulationFrame, inflation_columns
+from finsim.rates import RatePath
+from finsim.simulations import FireSimulation, lasts_long_enough, month_dates
+
+
+class FloatState(NamedTuple):
+    stock_investments: float
+    bonds_investments: float
+    cash: float
+    monthly_expenses: float
+    monthly_income: float
+    # indexes of the initial properties that weren't sold yet
+    properties: tuple[int, ...]
+    wealth_inc_properties: float
+
+
+# how close to half a cent a value has to be to be taken for a decimal tie, in units
+TIE_TOLERANCE = 1e-8
+
+
+def is_near_tie(value: float) -> bool:
+    """Whether the value is within `TIE_TOLERANCE` of half a cent, where float and Decimal rounding can disagree."""
+    return abs(abs(value - round(value, 2)) - 0.005) < TIE_TOLERANCE
+
+
+def round_cents(value: float) -> float:
+    """
+    Rounds to cents half to even, like `round` on a Decimal.
+
+    Values like 12.345 aren't exact in binary, so `round(12.345, 2)` rounds whatever side of the tie
+    the float happens to be on, values near half a cent are rounded as the decimal tie they stand for.
+    """
+    rounded = round(value, 2)
+    if abs(abs(value - rounded) - 0.005) >= TIE_TOLERANCE:
+        return rounded
+
+    floor = math.floor(value * 100 + 0.25)
+    return (floor if floor % 2 == 0 else floor + 1) / 100
+
+
+def round_cents_array(values: np.ndarray) -> np.ndarray:
+    """`round_cents` of every value, in place."""
+    rounded = np.round(values, 2)
+    # a value is never further than half a cent from its rounding, only the near side needs a check
+    ties = np.abs(values - rounded) > 0.005 - TIE_TOLERANCE
+    if ties.any():
+        floor = np.floor(values[ties] * 100 + 0.25)
+        rounded[ties] = (floor + floor % 2) / 100
+    values[...] = rounded
+    return values
+
+
+class FloatProperty(NamedTuple):
+    market_value: float
+    monthly_income: float
+    mortgage_left: float
+    mortgage_months: int
+    monthly_payment: float
+    monthly_interest: float
+
+    @property
+    def net_cash_value(self) -> float:
+        return self.market_value - self.mortgage_left
+
+
+def float_property(prop: InvestmentProperty) -> FloatProperty:
+    return FloatProperty(
+        market_value=float(prop.market_value),
+        monthly_income=float(prop.monthly_income),
+        mortgage_left=float(prop.mortgage_left),
+        mortgage_months=prop.mortgage_months,
+        monthly_payment=float(prop.monthly_payment),
+        monthly_interest=float(prop.monthly_interest),
+    )
+
+
+@decimal_context
+def float_property_timeline(
+    properties: list[InvestmentProperty],
+    annual_property_appreciation_rate: Decimal,
+    dates: list[date],
+) -> list[list[FloatProperty]]:
+    """`property_timeline` with floats, following `simulate_next_property_month` and `calculate_monthly_payment`."""
+    appreciation = float(annual_property_appreciation_rate / Decimal("12"))
+    rent_increases = [float(p.annual_rent_increase_rate) for p in properties]
+    # the rate used by calculate_monthly_payment, it doesn't change over time
+    mortgage_rates = [float(p.mortgage_rate / Decimal(100) / 12) for p in properties]
+
+    timeline = [[float_property(p) for p in properties]]
+    for sim_date in dates[1:]:
+        current = []
+        for i, prev in enumerate(timeline[-1]):
+            market_value = round_cents(
+                prev.market_value + prev.market_value * appreciation
+            )
+            rate = mortgage_rates[i]
+            if not (prev.mortgage_left > 0 and prev.mortgage_months > 0 and rate > 0):
+                current.append(prev._replace(market_value=market_value))
+                continue
+
+            monthly_income = prev.monthly_income
+            if sim_date.month == 1:
+                monthly_income = monthly_income * (1 + rent_increases[i])
+
+            mortgage_left = prev.mortgage_left - (
+                prev.monthly_payment - prev.monthly_interest
+            )
+            mortgage_months = prev.mortgage_months - 1
+            monthly_payment, monthly_interest = 0.0, 0.0
+            if mortgage_left > 0 and mortgage_months > 0:
+                growth = (1 + rate) ** mortgage_months
+                monthly_payment = round_cents(
+                    mortgage_left * (rate * growth / (growth - 1))
+                )
+                monthly_interest = round_cents(mortgage_left * rate)
+
+            current.append(
+                FloatProperty(
+                    market_value=market_value,
+                    monthly_income=monthly_income,
+                    mortgage_left=mortgage_left,
+                    mortgage_months=mortgage_months,
+                    monthly_payment=monthly_payment,
+                    monthly_interest=monthly_interest,
+                )
+            )
+        timeline.append(current)
+
+    return timeline
+
+
+class FloatEngine:
+    """
+    The `simulate_next` rules with native floats instead of Decimal.
+
+    Money is still rounded to cents every month, so the results only differ from the Decimal engine
+    where float rounding tips a value to the neighbouring cent. The expenses and the income carry
+    over every month, so near a tie they are computed exactly with Decimal.
+    Properties don't depend on the market, their timeline is computed once for the run.
+    """
+
+    @decimal_context
+    def __init__(
+        self,
+        init: FireSimulation,
+        months: int,
+        inflation_rates: Optional[RatePath] = None,
+        stock_returns: Optional[RatePath] = None,
+    ):
+        self.init = init
+        self.months = months
+        self.inflation_rates = inflation_rates
+        self.dates = month_dates(init.date, months)
+        self.timeline = float_property_timeline(
+            init.investment_properties,
+            init.annual_property_appreciation_rate,
+            self.dates,
+        )
+
+        self._rent = [[p.monthly_income for p in m] for m in self.timeline]
+        self._net = [[p.net_cash_value for p in m] for m in self.timeline]
+        self._january = [d.month == 1 for d in self.dates]
+
+        self._inflation = (
+            inflation_rates.as_array(months).tolist()
+            if inflation_rates is not None
+            else None
+        )
+        self._stock_returns = (
+            stock_returns.as_array(months).tolist()
+            if stock_returns is not None
+            else None
+        )
+        self._fixed_monthly_inflation_decimal = init.annual_inflation_rate / Decimal(
+            "12"
+        )
+        self._fixed_monthly_inflation = float(self._fixed_monthly_inflation_decimal)
+        self._fixed_stock_return = float(init.stock_return_rate / Decimal("12"))
+        self._bonds_monthly_rate = float(init.bonds_return_rate / Decimal("12"))
+        self._income_increase = float(init.annual_income_increase_rate)
+        self._threshold = float(init.invest_cash_threshold)
+        self._surplus_split = (
+            SURPLUS_STRATEGIES.get(init.invest_cash_surplus_strategy, (0.0, 0.0))
+            if init.invest_cash_surplus
+            else None
+        )
+
+    def initial_state(self) -> FloatState:
+        init = self.init
+        properties = tuple(range(len(init.investment_properties)))
+        stock = float(init.stock_investments)
+        bonds = float(init.bonds_investments)
+        cash = float(init.cash)
+        return FloatState(
+            stock_investments=stock,
+            bonds_investments=bonds,
+            cash=cash,
+            monthly_expenses=float(init.monthly_expenses),
+            monthly_income=float(init.monthly_income),
+            properties=properties,
+            wealth_inc_properties=stock
+            + bonds
+            + cash
+            + sum(self._net[0][p] for p in properties),
+        )
+
+    def step(
+        self, prev: FloatState, month: int, zero_income: bool = False
+    ) -> FloatState:
+        """Simulates month `month` of the run, the state it returns is at index `month + 1`."""
+        count("fast_steps")
+        k = month + 1
+        properties = prev.properties
+
+        if self._inflation is not None:
+            monthly_inflation_rate = self._inflation[month]
+        else:
+            monthly_inflation_rate = self._fixed_monthly_inflation
+
+        total_monthly_expenses = prev.monthly_expenses * (1 + monthly_inflation_rate)
+
+        new_monthly_income = 0.0 if zero_income else prev.monthly_income
+        january = self._january[k]
+        if january:
+            new_monthly_income = new_monthly_income * (1 + self._income_increase)
+
+        total_monthly_cash = prev.cash + new_monthly_income
+        net = self._net[k]
+        new_properties_net_cash_value = 0.0
+        if properties:
+            rent = self._rent[k - 1]
+            total_monthly_cash += sum([rent[p] for p in properties])
+            new_properties_net_cash_value = sum([net[p] for p in properties])
+
+        new_bonds = prev.bonds_investments * (1 + self._bonds_monthly_rate)
+        if self._stock_returns is not None:
+            new_stock = prev.stock_investments * (1 + self._stock_returns[month])
+        else:
+            new_stock = prev.stock_investments * (1 + self._fixed_stock_return)
+
+        if total_monthly_cash > total_monthly_expenses:
+            new_cash = total_monthly_cash - total_monthly_expenses
+        elif (total_monthly_cash + new_bonds) > total_monthly_expenses:
+            new_cash = 0.0
+            new_bonds -= total_monthly_expenses - total_monthly_cash
+        elif (total_monthly_cash + new_bonds + new_stock) > total_monthly_expenses:
+            new_cash = 0.0
+            new_stock -= total_monthly_expenses - total_monthly_cash - new_bonds
+            new_bonds = 0.0
+        elif (
+            total_monthly_cash + new_stock + new_bonds + new_properties_net_cash_value
+        ) > total_monthly_expenses:
+            # sell the property with the lowest net cash value, bonds stay untouched like in simulate_next
+            to_sell = min(properties, key=net.__getitem__)
+            properties = tuple(p for p in properties if p != to_sell)
+            new_properties_net_cash_value -= net[to_sell]
+
+            cash_needed = (
+                total_monthly_expenses - total_monthly_cash - new_stock - new_bonds
+            )
+            new_stock = 0.0
+            new_cash = net[to_sell] - cash_needed
+        else:
+            new_cash = -(
+                total_monthly_expenses - total_monthly_cash - new_stock - new_bonds
+            )
+            new_bonds = 0.0
+            new_stock = 0.0
+
+        if self._surplus_split is not None:
+            amount_over_threshold = new_cash - self._threshold
+            if amount_over_threshold > 0:
+                stock_share, bonds_share = self._surplus_split
+                new_stock += amount_over_threshold * stock_share
+                new_bonds += amount_over_threshold * bonds_share
+                new_cash -= amount_over_threshold
+
+        new_stock = round_cents(new_stock)
+        new_bonds = round_cents(new_bonds)
+        new_cash = round_cents(new_cash)
+
+        new_monthly_expenses = round(total_monthly_expenses, 2)
+        if is_near_tie(total_monthly_expenses):
+            new_monthly_expenses = self._exact_expenses(prev, month)
+
+        # the income only changes in january, the rest of the year it's already in cents
+        if january:
+            if is_near_tie(new_monthly_income):
+                new_monthly_income = self._exact_income(prev, k, zero_income)
+            else:
+                new_monthly_income = round(new_monthly_income, 2)
+
+        return FloatState(
+            new_stock,
+            new_bonds,
+            new_cash,
+            new_monthly_expenses,
+            new_monthly_income,
+            properties,
+            new_stock + new_bonds + new_cash + new_properties_net_cash_value,
+        )
+
+    @decimal_context
+    def _exact_expenses(self, prev: FloatState, month: int) -> float:
+        if self.inflation_rates is not None:
+            monthly_inflation_rate = self.inflation_rates[month]
+        else:
+            monthly_inflation_rate = self._fixed_monthly_inflation_decimal
+
+        expenses = _to_decimal(prev.monthly_expenses) * (1 + monthly_inflation_rate)
+        return float(round(expenses, 2))
+
+    @decimal_context
+    def _exact_income(self, prev: FloatState, k: int, zero_income: bool) -> float:
+        income = Decimal("0") if zero_income else _to_decimal(prev.monthly_income)
+        if self._january[k]:
+            income = income * (1 + self.init.annual_income_increase_rate)
+        return float(round(income, 2))
+
+    @decimal_context
+    def to_simulation(self, state: FloatState, k: int) -> FireSimulation:
+        """Converts the state at index `k` of the run to the Decimal dataclass."""
+        init = self.init
+        if k == 0:
+            return init
+
+        annual_inflation_rate = init.annual_inflation_rate
+        monthly_inflation_rate = annual_inflation_rate / Decimal("12")
+        if self.inflation_rates is not None:
+            monthly_inflation_rate = self.inflation_rates[k - 1]
+            annual_inflation_rate = monthly_inflation_rate * Decimal("12")
+
+        return FireSimulation(
+            stock_investments=_to_decimal(state.stock_investments),
+            investment_properties=[
+                self._investment_property(p, k) for p in state.properties
+            ],
+            bonds_investments=_to_decimal(state.bonds_investments),
+            cash=_to_decimal(state.cash),
+            stock_return_rate=init.stock_return_rate,
+            bonds_return_rate=init.bonds_return_rate,
+            monthly_expenses=_to_decimal(state.monthly_expenses),
+            monthly_income=_to_decimal(state.monthly_income),
+            annual_inflation_rate=annual_inflation_rate,
+            monthly_inflation_rate=monthly_inflation_rate,
+            annual_property_appreciation_rate=init.annual_property_appreciation_rate,
+            invest_cash_surplus=init.invest_cash_surplus,
+            invest_cash_threshold=init.invest_cash_threshold,
+            invest_cash_surplus_strategy=init.invest_cash_surplus_strategy,
+            annual_income_increase_rate=init.annual_income_increase_rate,
+            date=self.dates[k],
+        )
+
+    def _investment_property(self, index: int, k: int) -> InvestmentProperty:
+        prop = self.timeline[k][index]
+        original = self.init.investment_properties[index]
+        return InvestmentProperty(
+            market_value=_to_decimal(prop.market_value),
+            monthly_income=Decimal(repr(prop.monthly_income)),
+            mortgage_left=_to_decimal(prop.mortgage_left),
+            mortgage_rate=original.mortgage_rate,
+            mortgage_months=prop.mortgage_months,
+            monthly_interest=_to_decimal(prop.monthly_interest),
+            monthly_payment=_to_decimal(prop.monthly_payment),
+            annual_rent_increase_rate=original.annual_rent_increase_rate,
+        )
+
+    def to_simulations(
+        self, states: list[FloatState], first: int = 0
+    ) -> list[FireSimulation]:
+        return [self.to_simulation(s, first + i) for i, s in enumerate(states)]
+
+    @timed("frame.build")
+    def to_frame(self, states: list[FloatState]) -> SimulationFrame:
+        """Writes the states of the months from the first one into a `SimulationFrame`."""
+        frame = SimulationFrame.allocate(
+            self.dates[: len(states)],
+            self.init.investment_properties,
+            self.timeline[: len(states)],
+            self.init,
+        )
+        for k, state in enumerate(states):
+            frame.write(k, state[:5], state.properties)
+        frame.write_inflation(
+            *inflation_columns(self.init, self._inflation, self.months)
+        )
+        return frame.finish()
+
+    def simulate(self) -> list[FloatState]:
+        """The states of `run_simulation`, until the wealth including properties goes negative."""
+        return list(self.iter_states())
+
+    def iter_states(self) -> Iterator[FloatState]:
+        """`simulate` one month at a time, only the last state is kept."""
+        state = self.initial_state()
+        yield state
+        for month in range(self.months):
+            next_state = self.step(state, month)
+            if next_state.wealth_inc_properties < 0:
+                return
+
+            state = next_state
+            yield state
+
+
+def _to_decimal(value: float) -> Decimal:
+    return Decimal(f"{value:.2f}")
+
+
+@decimal_context
+def run_float_simulation(
+    init: FireSimulation,
+    months: int,
+    inflation_rates: Optional[RatePath] = None,
+    stock_returns: Optional[RatePath] = None,
+) -> list[FireSimulation]:
+    engine = FloatEngine(init, months, inflation_rates, stock_returns)
+    return engine.to_simulations(engine.simulate())
+
+
+class FloatFireCandidates:
+    """The candidate runs of the fire search on the float engine, see `_FireCandidates`."""
+
+    @decimal_context
+    def __init__(
+        self,
+        init: FireSimulation,
+        expected_number_of_months: int,
+        inflation_rates: Optional[RatePath],
+        stock_returns: Optional[RatePath],
+    ):
+        self.expected_number_of_months = expected_number_of_months
+        self.engine = FloatEngine(
+            init, expected_number_of_months, inflation_rates, stock_returns
+        )
+
+        self.working = [self.engine.initial_state()]
+        for month in range(expected_number_of_months):
+            next_state = self.engine.step(self.working[-1], month)
+            if next_state.wealth_inc_properties <= 0:
+                break
+
+            self.working.append(next_state)
+
+    def run_retirement(self, retire_after: int) -> list[FloatState]:
+        if len(self.working) < retire_after + 2:
+            # the money ran out before retirement
+            return []
+
+        states = [self.working[retire_after + 1]]
+        for month in range(retire_after + 1, self.expected_number_of_months):
+            next_state = self.engine.step(states[-1], month, zero_income=True)
+            if next_state.wealth_inc_properties <= 0:
+                break
+
+            states.append(next_state)
+
+        return states[1:]
+
+    def join(
+        self, retire_after: int, retirement: list[FloatState]
+    ) -> list[FireSimulation]:
+        working = self.working[: retire_after + 2]
+        return self.engine.to_simulations(working) + self.engine.to_simulations(
+            retirement, first=len(working)
+        )
+
+    def iter_join(
+        self, retire_after: int, retirement: list[FloatState]
+    ) -> Iterator[FireSimulation]:
+        """`join` one month at a time."""
+        states = chain(self.working[: retire_after + 2], retirement)
+        return (self.engine.to_simulation(s, k) for k, s in enumerate(states))
+
+    def join_frame(
+        self, retire_after: int, retirement: list[FloatState]
+    ) -> SimulationFrame:
+        return self.engine.to_frame(self.working[: retire_after + 2] + retirement)
+
+    def is_sustainable(self, retire_after: int, retirement: list[FloatState]) -> bool:
+        length = min(len(self.working), retire_after + 2) + len(retirement)
+        return lasts_long_enough(length, self.expected_number_of_months)
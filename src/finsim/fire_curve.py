@@ -0,0 +1,124 @@
+from dataclasses import dataclass
+from logging import getLogger
+from typing import Optional
+
+import numpy as np
+
+from finsim.batch import (
+    RateMatrix,
+    _paths_from_rates,
+    as_rate_matrix,
+    run_batch_simulation,
+)
+from finsim.instrumentation import count, timed
+from finsim.montecarlo import RateModel, sample_rates
+from finsim.simulations import FireSimulation, lasts_long_enough
+
+logger = getLogger(__name__)
+
+
+@dataclass
+class FireSuccessCurve:
+    """
+    How likely retiring after every month is to last, across the rate paths.
+
+    `success[r]` is the share of paths that stay solvent until the expected number of months
+    when the salary stops after `r + 1` months, the months `run_fire_simulation` would return.
+    `earliest` holds the earliest such `r` of every path, the expected number of months
+    for the paths where even working until the end isn't enough.
+    """
+
+    success: np.ndarray
+    earliest: np.ndarray
+
+    @property
+    def expected_number_of_months(self) -> int:
+        return len(self.success)
+
+    def months_to_retire(self, confidence: float) -> Optional[int]:
+        """The fewest months of work that last in at least `confidence` of the paths, None if none does."""
+        reached = np.flatnonzero(self.success >= confidence)
+        return int(reached[0]) + 1 if len(reached) else None
+
+
+@timed("fire.curve")
+def fire_success_curve(
+    init: FireSimulation,
+    expected_number_of_months: int,
+    inflation_rates: Optional[RateMatrix] = None,
+    stock_returns: Optional[RateMatrix] = None,
+) -> FireSuccessCurve:
+    """
+    The `run_fire_simulation` search for every rate path at once, with the float batch engine.
+
+    Like the `bisect` search it relies on working longer never making a path worse, so every path
+    only needs the earliest retirement month that lasts. All paths bisect together, every step is one
+    batch run where each path retires at the middle of its own range, which takes about
+    log2(expected_number_of_months) batch runs whatever the number of paths.
+    """
+    months = expected_number_of_months
+    if months <= 0:
+        raise ValueError("the expected number of months has to be positive")
+
+    paths = _paths_from_rates(inflation_rates, stock_returns)
+    inflation = as_rate_matrix(inflation_rates, paths, months)
+    stocks = as_rate_matrix(stock_returns, paths, months)
+
+    def sustainable(lanes: np.ndarray, retire_after: np.ndarray) -> np.ndarray:
+        count("fire.curve_batches")
+        batch = run_batch_simulation(
+            init,
+            months,
+            None if inflation is None else inflation[:, lanes].T,
+            None if stocks is None else stocks[:, lanes].T,
+            paths=len(lanes),
+            record=(),
+            retire_after=retire_after,
+        )
+        # the months `run_fire_simulation` keeps, the batch stops the lanes the same way it does
+        return lasts_long_enough(batch.months_survived + 1, months)
+
+    # the earliest retirement month lasting is in [low, high] for every path
+    low = np.zeros(paths, dtype=np.int64)
+    high = np.full(paths, months - 1, dtype=np.int64)
+    everyone = np.arange(paths)
+    # paths where even working until the end isn't enough never retire
+    earliest = np.where(sustainable(everyone, high), high, months)
+
+    lanes = np.flatnonzero((earliest < months) & (low < high))
+    while len(lanes):
+        middle = (low[lanes] + high[lanes]) // 2
+        lasts = sustainable(lanes, middle)
+        high[lanes] = np.where(lasts, middle, high[lanes])
+        low[lanes] = np.where(lasts, low[lanes], middle + 1)
+        lanes = lanes[low[lanes] < high[lanes]]
+
+    earliest = np.where(earliest < months, low, months)
+    retired = np.bincount(earliest[earliest < months], minlength=months)
+    return FireSuccessCurve(success=np.cumsum(retired) / paths, earliest=earliest)
+
+
+def run_fire_monte_carlo(
+    init: FireSimulation,
+    expected_number_of_months: int,
+    paths: int,
+    inflation: Optional[RateModel] = None,
+    stocks: Optional[RateModel] = None,
+    seed: int = 0,
+) -> FireSuccessCurve:
+    """
+    `fire_success_curve` over `paths` rate paths drawn from the models, the same paths `run_monte_carlo` draws.
+
+    Every path draws its rates once, every retirement month it tries runs over the same rates.
+    """
+    if inflation is None and stocks is None:
+        logger.warning("without a rate model all the paths are the same")
+        curve = fire_success_curve(init, expected_number_of_months)
+        return FireSuccessCurve(curve.success, np.repeat(curve.earliest, paths))
+
+    inflation_rates, stock_returns = sample_rates(
+        seed, range(paths), expected_number_of_months, inflation, stocks
+    )
+    return fire_success_curve(
+        init, expected_number_of_months, inflation_rates, stock_returns
+    )
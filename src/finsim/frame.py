@@ -0,0 +1,362 @@
+import json
+from datetime import date, datetime
+from decimal import Decimal
+from typing import Any, Iterable, Mapping, Optional, Sequence
+
+import numpy as np
+import pandas as pd
+
+from finsim.context import decimal_context
+from finsim.instrumentation import timed
+from finsim.properties import InvestmentProperty, property_timeline
+
+# the per month money of the simulation, in the order the engines write it
+STATE_COLUMNS = (
+    "stock_investments",
+    "bonds_investments",
+    "cash",
+    "monthly_expenses",
+    "monthly_income",
+)
+
+FRAME_COLUMNS = STATE_COLUMNS + (
+    "annual_inflation_rate",
+    "monthly_inflation_rate",
+    "liquid_wealth",
+    "wealth_inc_properties",
+    "properties_monthly_mortgage",
+    "properties_market_value",
+    "properties_monthly_income",
+    "properties_net_cash_value",
+    "properties_mortgage_left",
+)
+
+# the settings of a run, the same every month, `to_pandas` adds them as columns when asked for
+SETTING_COLUMNS = (
+    "stock_return_rate",
+    "bonds_return_rate",
+    "annual_income_increase_rate",
+    "annual_property_appreciation_rate",
+    "invest_cash_surplus",
+    "invest_cash_threshold",
+    "invest_cash_surplus_strategy",
+)
+
+PROPERTY_COLUMNS = (
+    "market_value",
+    "monthly_income",
+    "mortgage_left",
+    "mortgage_rate",
+    "mortgage_months",
+    "monthly_interest",
+    "monthly_payment",
+    "annual_rent_increase_rate",
+    "net_cash_value",
+)
+
+# what an initial property is made of, the rest is worked out from these
+_INITIAL_PROPERTY_FIELDS = (
+    "market_value",
+    "monthly_income",
+    "mortgage_left",
+    "mortgage_rate",
+    "mortgage_months",
+    "annual_rent_increase_rate",
+)
+
+# properties of the initial list that keep the same value every month
+_CONSTANT_PROPERTY_COLUMNS = ("mortgage_rate", "annual_rent_increase_rate")
+
+
+class SimulationFrame:
+    """
+    Simulation results with one float64 column per field, one row per month.
+
+    The columns live in a single (months + 1 x fields) block, so `to_pandas` wraps it without copying.
+    Engines write the state of every month into the preallocated block with `write`,
+    the totals are derived from it once in `finish`.
+
+    The properties are kept as a timeline of every initial property and a mask of the months
+    they were still owned, `property_table` turns them into a long table when asked for.
+    The `SETTING_COLUMNS` of the run are kept once in `settings`.
+    """
+
+    def __init__(
+        self,
+        dates: Sequence[date],
+        properties: list[InvestmentProperty],
+        property_values: dict[str, np.ndarray],
+        settings: Optional[dict[str, Any]] = None,
+    ):
+        self.dates = list(dates)
+        self.properties = properties
+        self.property_values = property_values
+        self.settings = settings or {}
+        self.values = np.full((len(self.dates), len(FRAME_COLUMNS)), np.nan)
+        self.alive = np.zeros((len(self.dates), len(properties)), dtype=bool)
+        self._length = 0
+
+    @classmethod
+    def allocate(
+        cls,
+        dates: Sequence[date],
+        properties: list[InvestmentProperty],
+        timeline: Sequence[Sequence[Any]],
+        init: Any = None,
+    ) -> "SimulationFrame":
+        """
+        A frame for the given months, with the property timeline of the run and the settings of `init`.
+
+        The timeline holds the state of every initial property for every month, either `InvestmentProperty`
+        or anything with the same attributes, like the float properties of the float engine.
+        """
+        return cls(
+            dates,
+            properties,
+            property_columns(properties, timeline),
+            settings_of(init) if init is not None else None,
+        )
+
+    def write(self, k: int, state: Sequence[float], properties: Iterable[int]) -> None:
+        """Writes the `STATE_COLUMNS` values of month `k` and the indexes of the properties still owned."""
+        self.values[k, : len(STATE_COLUMNS)] = state
+        self.alive[k, list(properties)] = True
+        self._length = max(self._length, k + 1)
+
+    def write_inflation(self, annual: np.ndarray, monthly: np.ndarray) -> None:
+        """Writes the inflation columns of every month at once."""
+        self["annual_inflation_rate"][:] = annual[: len(self.values)]
+        self["monthly_inflation_rate"][:] = monthly[: len(self.values)]
+
+    def finish(self) -> "SimulationFrame":
+        """Drops the months that weren't simulated and computes the totals."""
+        self.dates = self.dates[: self._length]
+        self.values = self.values[: self._length]
+        self.alive = self.alive[: self._length]
+
+        owned = self.alive.astype(np.float64)
+        values = self.property_values
+        with_mortgage = (
+            (values["mortgage_left"] > 0)
+            & (values["mortgage_months"] > 0)
+            & (values["mortgage_rate"] > 0)
+        )
+        totals = {
+            "properties_monthly_mortgage": values["monthly_payment"] * with_mortgage,
+            "properties_market_value": values["market_value"],
+            "properties_monthly_income": values["monthly_income"],
+            "properties_net_cash_value": values["net_cash_value"],
+            "properties_mortgage_left": values["mortgage_left"],
+        }
+        for name, per_property in totals.items():
+            self[name][:] = (owned * per_property[: self._length]).sum(axis=1)
+
+        self["liquid_wealth"][:] = (
+            self["stock_investments"] + self["bonds_investments"] + self["cash"]
+        )
+        self["wealth_inc_properties"][:] = (
+            self["liquid_wealth"] + self["properties_net_cash_value"]
+        )
+        return self
+
+    def freeze(self) -> "SimulationFrame":
+        """Makes the arrays read only, for frames shared between callers."""
+        self.values.flags.writeable = False
+        self.alive.flags.writeable = False
+        return self
+
+    @property
+    def nbytes(self) -> int:
+        return (
+            self.values.nbytes
+            + self.alive.nbytes
+            + sum(v.nbytes for v in self.property_values.values() if v.base is None)
+        )
+
+    def __len__(self) -> int:
+        return len(self.dates)
+
+    def __getitem__(self, name: str) -> np.ndarray:
+        """A view of the column."""
+        return self.values[:, FRAME_COLUMNS.index(name)]
+
+    @timed("frame.to_pandas")
+    def to_pandas(self, settings: bool = False) -> pd.DataFrame:
+        """
+        A DataFrame indexed by date over the same memory as the frame.
+
+        With `settings` the settings of the run are added as constant columns, like the `to_dict` rows had,
+        on a copy of the frame.
+        """
+        df = pd.DataFrame(
+            self.values,
+            index=pd.Index(self.dates, name="date"),
+            columns=list(FRAME_COLUMNS),
+            copy=False,
+        )
+        if settings:
+            return df.assign(**self.settings)
+        return df
+
+    def property_table(self) -> pd.DataFrame:
+        """One row per month and owned property, `property` is its index in the initial list."""
+        months, indexes = np.nonzero(self.alive)
+        table = {
+            "date": [self.dates[m] for m in months],
+            "property": indexes,
+        }
+        for name in PROPERTY_COLUMNS:
+            table[name] = self.property_values[name][months, indexes]
+        return pd.DataFrame(table)
+
+    def to_arrays(self) -> dict[str, np.ndarray]:
+        """The frame as named arrays, one per column, e.g. to be saved with `np.savez`."""
+        arrays = {
+            "dates": np.array([d.isoformat() for d in self.dates], dtype=str),
+            "alive": self.alive,
+            "properties": np.array(
+                [
+                    [str(getattr(p, name)) for name in _INITIAL_PROPERTY_FIELDS]
+                    for p in self.properties
+                ],
+                dtype=str,
+            ).reshape(len(self.properties), len(_INITIAL_PROPERTY_FIELDS)),
+            "settings": np.array(json.dumps(self.settings)),
+        }
+        for i, name in enumerate(FRAME_COLUMNS):
+            arrays[name] = self.values[:, i]
+        for name in PROPERTY_COLUMNS:
+            arrays[f"property.{name}"] = self.property_values[name][: len(self)]
+        return arrays
+
+    @classmethod
+    def from_arrays(cls, arrays: Mapping[str, np.ndarray]) -> "SimulationFrame":
+        """The frame saved with `to_arrays`."""
+        dates = [_parse_date(d) for d in arrays["dates"].tolist()]
+        properties = [
+            InvestmentProperty(
+                market_value=Decimal(market_value),
+                monthly_income=Decimal(monthly_income),
+                mortgage_left=Decimal(mortgage_left),
+                mortgage_rate=Decimal(mortgage_rate),
+                mortgage_months=int(mortgage_months),
+                annual_rent_increase_rate=Decimal(annual_rent_increase_rate),
+            )
+            for (
+                market_value,
+                monthly_income,
+                mortgage_left,
+                mortgage_rate,
+                mortgage_months,
+                annual_rent_increase_rate,
+            ) in arrays["properties"].tolist()
+        ]
+        frame = cls(
+            dates,
+            properties,
+            {name: arrays[f"property.{name}"] for name in PROPERTY_COLUMNS},
+            json.loads(str(arrays["settings"])),
+        )
+        frame.values = np.column_stack(
+            [arrays[name] for name in FRAME_COLUMNS]
+        ).reshape(len(dates), len(FRAME_COLUMNS))
+        frame.alive = arrays["alive"].reshape(len(dates), len(properties))
+        frame._length = len(dates)
+        return frame
+
+    @classmethod
+    @timed("frame.build")
+    @decimal_context
+    def from_simulations(cls, simulations: list[Any]) -> "SimulationFrame":
+        """
+        Builds the frame from `FireSimulation` states, for the Decimal engine.
+
+        The property timeline is recomputed from the first state, and the properties of every month
+        are matched against it to tell which ones were sold.
+        """
+        if not simulations:
+            return cls([], [], property_columns([], []))
+
+        first = simulations[0]
+        dates = [s.date for s in simulations]
+        timeline = property_timeline(
+            first.investment_properties,
+            first.annual_property_appreciation_rate,
+            dates,
+        )
+        frame = cls.allocate(dates, first.investment_properties, timeline, first)
+
+        owned = list(range(len(first.investment_properties)))
+        for k, sim in enumerate(simulations):
+            current = sim.investment_properties
+            if len(current) < len(owned):
+                # the properties keep their order, so the sold ones are the ones that don't match
+                kept = []
+                for i in owned:
+                    if (
+                        len(kept) < len(current)
+                        and current[len(kept)] == timeline[k][i]
+                    ):
+                        kept.append(i)
+                owned = kept
+
+            frame.write(k, [float(getattr(sim, name)) for name in STATE_COLUMNS], owned)
+            frame["annual_inflation_rate"][k] = float(sim.annual_inflation_rate)
+            frame["monthly_inflation_rate"][k] = float(sim.monthly_inflation_rate)
+
+        return frame.finish()
+
+
+def settings_of(init: Any) -> dict[str, Any]:
+    """The `SETTING_COLUMNS` of a `FireSimulation`, the rates as floats the way `to_dict` gives them."""
+    return {
+        name: float(value) if isinstance(value, Decimal) else value
+        for name in SETTING_COLUMNS
+        for value in [getattr(init, name)]
+    }
+
+
+def property_columns(
+    properties: list[InvestmentProperty], timeline: Sequence[Sequence[Any]]
+) -> dict[str, np.ndarray]:
+    """The `PROPERTY_COLUMNS` of a property timeline as (months x properties) float arrays."""
+    shape = (len(timeline), len(properties))
+    columns = {}
+    for name in PROPERTY_COLUMNS:
+        if name in _CONSTANT_PROPERTY_COLUMNS:
+            row = np.array([float(getattr(p, name)) for p in properties], dtype=float)
+            columns[name] = np.broadcast_to(row, shape)
+        elif name != "net_cash_value":
+            columns[name] = np.array(
+                [[float(getattr(p, name)) for p in month] for month in timeline],
+                dtype=np.float64,
+            ).reshape(shape)
+
+    columns["net_cash_value"] = columns["market_value"] - columns["mortgage_left"]
+    return columns
+
+
+@decimal_context
+def inflation_columns(
+    init: Any, rates: Optional[np.ndarray], months: int
+) -> tuple[np.ndarray, np.ndarray]:
+    """
+    The annual and monthly inflation of every month of a run from `init`, the way `simulate_next` stores them.
+
+    Month 0 is the initial state, it keeps the rates it was given.
+    """
+    annual = np.full(months + 1, float(init.annual_inflation_rate))
+    monthly = np.full(months + 1, float(init.annual_inflation_rate / Decimal("12")))
+    if rates is not None:
+        monthly[1:] = rates[:months]
+        annual[1:] = monthly[1:] * 12
+
+    annual[0] = float(init.annual_inflation_rate)
+    monthly[0] = float(init.monthly_inflation_rate)
+    return annual, monthly
+
+
+def _parse_date(text: str) -> date:
+    if "T" in text:
+        return datetime.fromisoformat(text)
+    return date.fromisoformat(text)
@@ -1,6 +1,26 @@
+import os
+from datetime import date
 from decimal import Decimal
-from typing import Generator
-from random import randrange
+from hashlib import sha256
+from logging import getLogger
+from pathlib import Path
+from threading import Lock, get_ident
+from typing import Generator, Optional, Union
+from itertools import repeat
+from random import Random, randrange
+
+import numpy as np
+
+from finsim.instrumentation import timed
+from finsim.rates import RatePath
+
+logger = getLogger(__name__)
+
+# where the parsed rate files are kept, by default a .rate_cache directory next to the data
+RATE_CACHE_DIR_ENV = "FINSIM_RATE_CACHE_DIR"
+
+_loaded_rate_paths: dict[tuple[str, bool], tuple[tuple[int, int], RatePath]] = {}
+_loaded_rate_paths_lock = Lock()
 
 
 def random_inflation_gen(range: tuple[int, int]) -> Generator[Decimal, None, None]:
@@ -9,6 +29,17 @@ def random_inflation_gen(range: tuple[int, int]) -> Generator[Decimal, None, Non
         yield Decimal(str(random_between_range))
 
 
+def random_rate_path(
+    range: tuple[int, int], months: int, seed: Optional[int] = None
+) -> RatePath:
+    """Same rates as `random_inflation_gen`, drawn once from a seeded random generator."""
+    rng = Random(seed)
+    return RatePath.from_decimals(
+        Decimal(str(rng.randrange(range[0], range[1]) / 100))
+        for _ in repeat(None, months)
+    )
+
+
 def rate_from_file_gen(
     rate_path: str, monthly: bool = False
 ) -> Generator[Decimal, None, None]:
@@ -47,3 +78,145 @@ def inflation_from_file_gen(
                         yield round(Decimal(inflation_rate) / Decimal("12"), 3)
 
             file.seek(0)
+
+
+def rate_path_from_file(rate_path: str, monthly: bool = False) -> RatePath:
+    """
+    The same rates as `inflation_from_file_gen`, as a cyclic `RatePath`.
+
+    The file is read once, and the path can be replayed for any number of runs.
+    """
+    with open(rate_path, "r") as file:
+        data = file.readlines()
+
+    return RatePath.from_text(_parse_rates(data, monthly), cyclic=True)
+
+
+def rate_dates_from_file(
+    rate_path: Union[str, Path], monthly: bool = False
+) -> list[date]:
+    """
+    The month of every rate of `rate_path_from_file`, from the date column of the file.
+
+    The rates of an annual row are spread over the 12 months starting at its date, a bare year starts in January.
+    """
+    dates = []
+    for row in _row_dates(rate_path):
+        if monthly:
+            dates.append(row)
+        else:
+            dates.extend(
+                date(
+                    row.year + (row.month - 1 + i) // 12,
+                    (row.month - 1 + i) % 12 + 1,
+                    1,
+                )
+                for i in range(12)
+            )
+    return dates
+
+
+def is_monthly_file(rate_path: Union[str, Path]) -> bool:
+    """Whether the rows of `rate_path` are months, dates that are each a month after the previous one."""
+    rows = _row_dates(rate_path)
+    months = [row.year * 12 + row.month for row in rows]
+    return len(months) > 1 and all(b - a == 1 for a, b in zip(months, months[1:]))
+
+
+def _row_dates(rate_path: Union[str, Path]) -> list[date]:
+    with open(rate_path, "r") as file:
+        lines = file.readlines()
+    assert lines[0].strip() == "date,value"
+
+    dates = []
+    for line in lines[1:]:
+        if not line.strip():
+            continue
+        text = line.split(",")[0].strip()
+        dates.append(date.fromisoformat(text) if "-" in text else date(int(text), 1, 1))
+    return dates
+
+
+@timed("rates.load_file")
+def load_rate_path(rate_path: Union[str, Path], monthly: bool = False) -> RatePath:
+    """
+    `rate_path_from_file` that parses every file only once.
+
+    Loaded paths are shared in memory by every caller of the process, e.g. every Streamlit session,
+    until the modification time or the size of the file changes. The parsed rates are also kept in a binary
+    sidecar file keyed by the hash of the file content, so a new process doesn't parse the CSV again.
+    """
+    source = Path(rate_path).resolve()
+    stat = source.stat()
+    version = (stat.st_mtime_ns, stat.st_size)
+    key = (str(source), monthly)
+
+    with _loaded_rate_paths_lock:
+        loaded = _loaded_rate_paths.get(key)
+    if loaded is not None and loaded[0] == version:
+        return loaded[1]
+
+    content = source.read_bytes()
+    sidecar = _sidecar_path(source, sha256(content).hexdigest(), monthly)
+    path = _read_sidecar(sidecar)
+    if path is None:
+        lines = content.decode("utf-8").splitlines()
+        path = RatePath.from_text(_parse_rates(lines, monthly), cyclic=True)
+        _write_sidecar(sidecar, path)
+
+    with _loaded_rate_paths_lock:
+        _loaded_rate_paths[key] = (version, path)
+
+    return path
+
+
+def clear_loaded_rate_paths() -> None:
+    """Forgets the rate paths loaded in memory, the sidecar files stay."""
+    with _loaded_rate_paths_lock:
+        _loaded_rate_paths.clear()
+
+
+def _parse_rates(lines: list[str], monthly: bool) -> np.ndarray:
+    """Returns the monthly rates of the CSV lines as an array of decimal strings."""
+    assert lines[0].strip() == "date,value"
+
+    rates = []
+    for line in lines[1:]:
+        if not line.strip():
+            continue
+        date, rate = map(lambda x: x.strip(), line.split(","))
+
+        if monthly:
+            rates.append(rate)
+        else:
+            # the annual rate is divided once, and repeated for every month of the year
+            rates.extend([str(round(Decimal(rate) / Decimal("12"), 3))] * 12)
+
+    return np.array(rates, dtype=str)
+
+
+def _sidecar_path(source: Path, content_hash: str, monthly: bool) -> Path:
+    cache_dir = os.environ.get(RATE_CACHE_DIR_ENV)
+    directory = Path(cache_dir) if cache_dir else source.parent / ".rate_cache"
+    kind = "monthly" if monthly else "annual"
+    return directory / f"{source.stem}.{kind}.{content_hash[:16]}.npy"
+
+
+def _read_sidecar(sidecar: Path) -> Optional[RatePath]:
+    try:
+        text = np.load(sidecar, allow_pickle=False)
+    except (OSError, ValueError):
+        return None
+
+    return RatePath.from_text(text, cyclic=True)
+
+
+def _write_sidecar(sidecar: Path, path: RatePath) -> None:
+    try:
+        sidecar.parent.mkdir(parents=True, exist_ok=True)
+        tmp = sidecar.with_name(f"{sidecar.name}.{os.getpid()}-{get_ident()}.tmp")
+        with open(tmp, "wb") as f:
+            np.save(f, path.text, allow_pickle=False)
+        os.replace(tmp, sidecar)
+    except OSError as e:
+        logger.warning(f"Failed to write the rate cache {sidecar}: {e}")
@@ -0,0 +1,139 @@
+from collections import Counter
+from contextlib import contextmanager
+from contextvars import ContextVar
+from dataclasses import dataclass, field
+from functools import wraps
+from time import perf_counter_ns
+from typing import Any, Callable, Iterable, Iterator, Optional, TypeVar
+
+
+@dataclass
+class Timer:
+    calls: int = 0
+    nanoseconds: int = 0
+
+
+@dataclass
+class Probe:
+    """
+    The timers and counters of the engine calls made while the probe is active, see `instrument`.
+
+    Timers add up the time spent in a phase, e.g. stepping the properties, counters count events,
+    e.g. the months simulated or the branch of the cash waterfall a month took.
+    """
+
+    counters: Counter = field(default_factory=Counter)
+    timers: dict[str, Timer] = field(default_factory=dict)
+
+    def count(self, name: str, n: int = 1) -> None:
+        self.counters[name] += n
+
+    def add_time(self, name: str, nanoseconds: int, calls: int = 1) -> None:
+        timer = self.timers.get(name)
+        if timer is None:
+            timer = self.timers[name] = Timer()
+        timer.calls += calls
+        timer.nanoseconds += nanoseconds
+
+    @contextmanager
+    def timed(self, name: str) -> Iterator[None]:
+        start = perf_counter_ns()
+        try:
+            yield
+        finally:
+            self.add_time(name, perf_counter_ns() - start)
+
+    def merge(self, other: "Probe") -> None:
+        self.counters.update(other.counters)
+        for name, timer in other.timers.items():
+            self.add_time(name, timer.nanoseconds, timer.calls)
+
+    def records(self, **labels: Any) -> list[dict[str, Any]]:
+        """
+        The timers and counters as flat records, every one tagged with `labels`, e.g. the scenario.
+
+        They can be written as JSON lines and summed across runs with `aggregate`.
+        """
+        records: list[dict[str, Any]] = [
+            {
+                "kind": "timer",
+                "name": name,
+                "calls": t.calls,
+                "seconds": t.nanoseconds / 1e9,
+            }
+            | labels
+            for name, t in sorted(self.timers.items())
+        ]
+        records += [
+            {"kind": "counter", "name": name, "value": value} | labels
+            for name, value in sorted(self.counters.items())
+        ]
+        return records
+
+
+_probe: ContextVar[Optional[Probe]] = ContextVar("finsim_probe", default=None)
+
+# the probe of the current thread or task, None when the engine isn't instrumented
+active_probe = _probe.get
+
+
+@contextmanager
+def instrument(probe: Optional[Probe] = None) -> Iterator[Probe]:
+    """
+    Collects the timers and counters of the engine calls made in the block, into `probe` or a new one.
+
+    Only the calls of the current thread or task are collected, the engine checks a context variable,
+    so it costs next to nothing when nothing is instrumented.
+    """
+    probe = probe if probe is not None else Probe()
+    token = _probe.set(probe)
+    try:
+        yield probe
+    finally:
+        _probe.reset(token)
+
+
+def count(name: str, n: int = 1) -> None:
+    """Counts on the active probe, if there is one."""
+    probe = _probe.get()
+    if probe is not None:
+        probe.count(name, n)
+
+
+F = TypeVar("F", bound=Callable)
+
+
+def timed(name: str) -> Callable[[F], F]:
+    """Adds the time spent in the function to the `name` timer of the active probe."""
+
+    def decorate(fn: F) -> F:
+        @wraps(fn)
+        def wrapper(*args, **kwargs):
+            probe = _probe.get()
+            if probe is None:
+                return fn(*args, **kwargs)
+
+            start = perf_counter_ns()
+            try:
+                return fn(*args, **kwargs)
+            finally:
+                probe.add_time(name, perf_counter_ns() - start)
+
+        return wrapper  # type: ignore
+
+    return decorate
+
+
+def aggregate(records: Iterable[dict[str, Any]]) -> list[dict[str, Any]]:
+    """Sums the records with the same kind, name and labels, e.g. the records of many runs."""
+    totals: dict[tuple, dict[str, Any]] = {}
+    for record in records:
+        labels = {
+            k: v for k, v in record.items() if k not in ("calls", "seconds", "value")
+        }
+        key = tuple(sorted(labels.items()))
+        total = totals.setdefault(key, dict(labels))
+        for k in ("calls", "seconds", "value"):
+            if k in record:
+                total[k] = total.get(k, 0) + record[k]
+    return list(totals.values())
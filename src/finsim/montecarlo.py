@@ -0,0 +1,310 @@
+import os
+from concurrent.futures import FIRST_COMPLETED, Future, ProcessPoolExecutor, wait
+from dataclasses import dataclass
+from datetime import date
+from logging import getLogger
+from threading import Event
+from typing import Callable, Literal, Optional, Protocol, Sequence
+
+import numpy as np
+
+from finsim.batch import BatchSimulation, run_batch_simulation
+from finsim.rates import RatePath
+from finsim.shared import Layout, SharedArrays, Spec, attach
+from finsim.simulations import FireSimulation, month_dates
+from finsim.sketch import QuantileSketch
+from finsim.summary import Statistic
+
+logger = getLogger(__name__)
+
+# paths simulated by a worker at once, big enough to amortize the batch setup
+CHUNK_SIZE = 256
+
+
+class RateModel(Protocol):
+    def sample(self, rng: np.random.Generator, months: int) -> np.ndarray:
+        """The monthly rates of one path."""
+        ...
+
+
+@dataclass(frozen=True)
+class NormalRates:
+    """Independent normal monthly rates, rounded to `decimals` places like the rates in the data files."""
+
+    mean: float
+    std: float
+    decimals: int = 4
+
+    def sample(self, rng: np.random.Generator, months: int) -> np.ndarray:
+        return np.round(rng.normal(self.mean, self.std, months), self.decimals)
+
+
+@dataclass(frozen=True)
+class BootstrapRates:
+    """
+    Blocks of `block` consecutive months of a historical path, starting at random months.
+
+    Keeping the months of a block together keeps the streaks of the history, e.g. a year of high inflation.
+    """
+
+    history: RatePath
+    block: int = 12
+
+    def sample(self, rng: np.random.Generator, months: int) -> np.ndarray:
+        values = self.history.values
+        blocks = -(-months // self.block)
+        starts = rng.integers(0, len(values), blocks)
+        indexes = (starts[:, None] + np.arange(self.block)) % len(values)
+        return values[indexes.ravel()[:months]]
+
+
+class MonteCarloCancelled(Exception):
+    """The run was cancelled before every path was simulated."""
+
+
+# every path draws the rates of each model from its own stream
+INFLATION_STREAM = 0
+STOCKS_STREAM = 1
+
+
+def path_rng(seed: int, path: int, stream: int) -> np.random.Generator:
+    """
+    A random stream of a path, derived from the run seed and the path index only.
+
+    The streams don't depend on how the paths are split between the workers, so the results don't either.
+    """
+    return np.random.default_rng(np.random.SeedSequence(seed, spawn_key=(path, stream)))
+
+
+def sample_rates(
+    seed: int,
+    paths: range,
+    months: int,
+    inflation: Optional[RateModel],
+    stocks: Optional[RateModel],
+) -> tuple[Optional[np.ndarray], Optional[np.ndarray]]:
+    """The (paths x months) inflation and stock return matrices of the given paths, None for fixed rates."""
+    inflation_rates = np.empty((len(paths), months)) if inflation else None
+    stock_returns = np.empty((len(paths), months)) if stocks else None
+    for i, path in enumerate(paths):
+        if inflation_rates is not None and inflation is not None:
+            rng = path_rng(seed, path, INFLATION_STREAM)
+            inflation_rates[i] = inflation.sample(rng, months)
+        if stock_returns is not None and stocks is not None:
+            rng = path_rng(seed, path, STOCKS_STREAM)
+            stock_returns[i] = stocks.sample(rng, months)
+
+    return inflation_rates, stock_returns
+
+
+@dataclass(frozen=True)
+class _Chunk:
+    init: FireSimulation
+    months: int
+    seed: int
+    paths: range
+    inflation: Optional[RateModel]
+    stocks: Optional[RateModel]
+    record: tuple[str, ...]
+    engine: Literal["float", "cents"]
+    summary: tuple[Statistic, ...] = ()
+    sketch: tuple[str, ...] = ()
+
+    def run(self) -> BatchSimulation:
+        inflation_rates, stock_returns = sample_rates(
+            self.seed, self.paths, self.months, self.inflation, self.stocks
+        )
+        return run_batch_simulation(
+            self.init,
+            self.months,
+            inflation_rates,
+            stock_returns,
+            paths=len(self.paths),
+            record=self.record,
+            engine=self.engine,
+            summary=self.summary,
+            sketch=self.sketch,
+        )
+
+
+# the per path arrays of a `BatchSimulation`, the history fields are added as history.<field>
+# and the statistics as summary.<name>
+_STATE_ARRAYS = (
+    "stock_investments",
+    "bonds_investments",
+    "cash",
+    "monthly_expenses",
+    "monthly_income",
+)
+
+
+def _shared_layout(
+    paths: int,
+    months: int,
+    properties: int,
+    record: Sequence[str],
+    summary: Sequence[Statistic],
+) -> Layout:
+    layout: Layout = {"months_survived": ((paths,), "int64")}
+    layout |= {name: ((paths,), "float64") for name in _STATE_ARRAYS}
+    layout["properties_alive"] = ((paths, properties), "bool")
+    layout |= {f"history.{name}": ((paths, months + 1), "float64") for name in record}
+    layout |= {f"summary.{stat.name}": ((paths,), "float64") for stat in summary}
+    return layout
+
+
+def _run_chunk(chunk: _Chunk, spec: Spec) -> tuple[int, dict[str, QuantileSketch]]:
+    """
+    Runs the chunk in a worker and writes its paths into the shared arrays.
+
+    The sketches are sent back to be merged, they only hold the bins the chunk used.
+    """
+    result = chunk.run()
+    rows = slice(chunk.paths.start, chunk.paths.stop)
+    with attach(spec) as arrays:
+        arrays["months_survived"][rows] = result.months_survived
+        for name in _STATE_ARRAYS:
+            arrays[name][rows] = getattr(result, name)
+        arrays["properties_alive"][rows] = result.properties_alive
+        for name, values in result.history.items():
+            arrays[f"history.{name}"][rows] = values
+        for name, values in result.summary.items():
+            arrays[f"summary.{name}"][rows] = values
+    return result.paths, result.sketches
+
+
+def _from_shared(
+    arrays: dict[str, np.ndarray],
+    dates: list[date],
+    record: Sequence[str],
+    summary: Sequence[Statistic],
+    sketches: dict[str, QuantileSketch],
+) -> BatchSimulation:
+    return BatchSimulation(
+        dates=dates,
+        months_survived=arrays["months_survived"],
+        properties_alive=arrays["properties_alive"],
+        history={name: arrays[f"history.{name}"] for name in record},
+        summary={stat.name: arrays[f"summary.{stat.name}"] for stat in summary},
+        sketches=sketches,
+        **{name: arrays[name] for name in _STATE_ARRAYS},
+    )
+
+
+def run_monte_carlo(
+    init: FireSimulation,
+    months: int,
+    paths: int,
+    inflation: Optional[RateModel] = None,
+    stocks: Optional[RateModel] = None,
+    seed: int = 0,
+    workers: Optional[int] = None,
+    chunk_size: int = CHUNK_SIZE,
+    record: Sequence[str] = ("liquid_wealth", "wealth_inc_properties"),
+    engine: Literal["float", "cents"] = "float",
+    summary: Sequence[Statistic] = (),
+    sketch: Sequence[str] = (),
+    cancel: Optional[Event] = None,
+    progress: Optional[Callable[[int], None]] = None,
+) -> BatchSimulation:
+    """
+    Runs `paths` random rate paths of the scenario with `run_batch_simulation`, split over a process pool.
+
+    Every path draws its rates from its own stream seeded by `seed` and its index, so the result is the same
+    for any number of workers and chunk size. Without a model the fixed annual rates of `init` are used.
+
+    The paths are sent to the workers in chunks of `chunk_size`, at most two chunks per worker at a time.
+    Setting `cancel` stops sending chunks, drops the ones waiting and raises `MonteCarloCancelled` once the
+    running ones are done. `progress` is called with the number of paths done after every chunk.
+    The `summary` statistics of every path are reduced as in `run_batch_simulation`, the `sketch` fields
+    are sketched by every chunk and the sketches merged as the chunks finish, so `record=()` with `sketch`
+    gives the percentile bands of any number of paths in bounded memory.
+    With a single worker the chunks run in this process, otherwise the workers write their paths into
+    shared memory that the result arrays map without copying.
+    """
+    if paths < 1 or chunk_size < 1:
+        raise ValueError("paths and chunk_size must be positive")
+
+    workers = workers or os.cpu_count() or 1
+    chunks = [
+        _Chunk(
+            init,
+            months,
+            seed,
+            range(start, min(start + chunk_size, paths)),
+            inflation,
+            stocks,
+            tuple(record),
+            engine,
+            tuple(summary),
+            tuple(sketch),
+        )
+        for start in range(0, paths, chunk_size)
+    ]
+    done_paths = 0
+    sketches: dict[str, QuantileSketch] = {}
+
+    def finished(chunk_paths: int, chunk_sketches: dict[str, QuantileSketch]) -> None:
+        nonlocal done_paths
+        done_paths += chunk_paths
+        for name, chunk_sketch in chunk_sketches.items():
+            if name in sketches:
+                sketches[name].merge(chunk_sketch)
+            else:
+                sketches[name] = chunk_sketch
+        if progress is not None:
+            progress(done_paths)
+
+    def cancelled() -> bool:
+        return cancel is not None and cancel.is_set()
+
+    if workers == 1 or len(chunks) == 1:
+        results = []
+        for chunk in chunks:
+            if cancelled():
+                raise MonteCarloCancelled(f"cancelled after {done_paths} paths")
+            result = chunk.run()
+            # merged as they come, so the chunks don't hold a sketch each
+            finished(result.paths, result.sketches)
+            result.sketches = {}
+            results.append(result)
+        batch = BatchSimulation.concat(results)
+        batch.sketches = sketches
+        return batch
+
+    layout = _shared_layout(
+        paths, months, len(init.investment_properties), record, summary
+    )
+    # the workers write their paths straight into the shared arrays, removed on error or cancellation
+    with SharedArrays(layout) as shared:
+        with ProcessPoolExecutor(max_workers=min(workers, len(chunks))) as pool:
+            pending: set[Future] = set()
+            queue = iter(chunks)
+            try:
+                while True:
+                    while not cancelled() and len(pending) < 2 * workers:
+                        chunk = next(queue, None)
+                        if chunk is None:
+                            break
+                        pending.add(pool.submit(_run_chunk, chunk, shared.spec))
+
+                    if not pending:
+                        break
+
+                    completed, pending = wait(pending, return_when=FIRST_COMPLETED)
+                    for future in completed:
+                        finished(*future.result())
+            except BaseException:
+                pool.shutdown(cancel_futures=True)
+                raise
+
+        if done_paths < paths:
+            raise MonteCarloCancelled(f"cancelled after {done_paths} paths")
+
+        return _from_shared(
+            shared.collect(),
+            month_dates(init.date, months),
+            record,
+            summary,
+            sketches,
+        )
@@ -1,6 +1,13 @@
+from collections import OrderedDict
+from dataclasses import dataclass
 from decimal import Decimal
+from threading import Lock
 
+from finsim.context import decimal_context
+from finsim.instrumentation import count, timed
 
+
+@decimal_context
 def calculate_monthly_payment(
     principal: Decimal,
     rate: Decimal,
@@ -32,3 +39,137 @@ def _calculate_monthly_interest(
 
     # round to 2 decimal places
     return round(monthly_interest, 2)
+
+
+# how many loans keep their amortization schedule in memory
+SCHEDULE_CACHE_SIZE = 512
+
+
+@dataclass(frozen=True)
+class AmortizationSchedule:
+    """
+    The payment, interest, principal and balance of every month of a loan, month 0 being its terms.
+
+    Every month the payment is worked out again from the rounded balance left, the way
+    `InvestmentProperty` does it, so the schedule replays that instead of using a single fixed payment.
+    """
+
+    rate: Decimal
+    months: int
+    payment: tuple[Decimal, ...]
+    interest: tuple[Decimal, ...]
+    principal: tuple[Decimal, ...]
+    balance: tuple[Decimal, ...]
+
+    @classmethod
+    @timed("mortgage.schedule")
+    @decimal_context
+    def compute(
+        cls, principal: Decimal, rate: Decimal, months: int
+    ) -> "AmortizationSchedule":
+        payments, interests, principals, balances = [], [], [], []
+        balance = principal
+        months_left = months
+        while balance > 0 and months_left > 0:
+            payment, interest = calculate_monthly_payment(balance, rate, months_left)
+            payments.append(payment)
+            interests.append(interest)
+            principals.append(payment - interest)
+            balances.append(balance)
+            balance -= payment - interest
+            months_left -= 1
+
+        return cls(
+            rate,
+            months,
+            tuple(payments),
+            tuple(interests),
+            tuple(principals),
+            tuple(balances),
+        )
+
+
+class ScheduleCache:
+    """
+    Bounded LRU cache of amortization schedules, keyed by any month of the loan.
+
+    A property stepped a month ahead has the balance, rate and months left of the next row of its
+    schedule, so looking it up is a dict lookup instead of computing the payment again.
+    """
+
+    def __init__(self, maxsize: int = SCHEDULE_CACHE_SIZE):
+        self.maxsize = maxsize
+        self._schedules: OrderedDict[
+            tuple[Decimal, Decimal, int], AmortizationSchedule
+        ] = OrderedDict()
+        self._rows: dict[
+            tuple[Decimal, Decimal, int],
+            tuple[tuple[Decimal, Decimal, int], int],
+        ] = {}
+        self._lock = Lock()
+
+    def __len__(self) -> int:
+        return len(self._schedules)
+
+    def row(
+        self, balance: Decimal, rate: Decimal, months_left: int
+    ) -> tuple[Decimal, Decimal]:
+        """The monthly payment and interest of a loan with `balance` left over `months_left` months."""
+        with self._lock:
+            found = self._rows.get((balance, rate, months_left))
+            if found is not None:
+                terms, k = found
+                schedule = self._schedules[terms]
+                self._schedules.move_to_end(terms)
+                count("mortgage.schedule_hits")
+                return schedule.payment[k], schedule.interest[k]
+
+        count("mortgage.schedule_misses")
+        schedule = AmortizationSchedule.compute(balance, rate, months_left)
+        self._add(schedule)
+        return schedule.payment[0], schedule.interest[0]
+
+    def schedule(
+        self, principal: Decimal, rate: Decimal, months: int
+    ) -> AmortizationSchedule:
+        """The schedule of a loan from its terms."""
+        with self._lock:
+            terms = (principal, rate, months)
+            if terms in self._schedules:
+                self._schedules.move_to_end(terms)
+                return self._schedules[terms]
+
+        schedule = AmortizationSchedule.compute(principal, rate, months)
+        self._add(schedule)
+        return schedule
+
+    def clear(self) -> None:
+        with self._lock:
+            self._schedules.clear()
+            self._rows.clear()
+
+    def _add(self, schedule: AmortizationSchedule) -> None:
+        if not schedule.balance:
+            return
+
+        terms = (schedule.balance[0], schedule.rate, schedule.months)
+        with self._lock:
+            if terms in self._schedules:
+                return
+
+            self._schedules[terms] = schedule
+            for k, balance in enumerate(schedule.balance):
+                # a row of an older schedule with the same state gives the same payments
+                self._rows.setdefault(
+                    (balance, schedule.rate, schedule.months - k), (terms, k)
+                )
+
+            while len(self._schedules) > self.maxsize:
+                old_terms, old = self._schedules.popitem(last=False)
+                for k, balance in enumerate(old.balance):
+                    key = (balance, old.rate, old.months - k)
+                    if self._rows.get(key, (None,))[0] == old_terms:
+                        del self._rows[key]
+
+
+schedules = ScheduleCache()
@@ -1,5 +1,7 @@
 from datetime import date
-from finsim.mortgage import calculate_monthly_payment
+from finsim.context import decimal_context
+from finsim.instrumentation import timed
+from finsim.mortgage import AmortizationSchedule, schedules
 
 
 from dataclasses import asdict, dataclass, replace
@@ -24,24 +26,79 @@ class InvestmentProperty:
             and self.mortgage_rate > 0
         )
 
+    @decimal_context
     def net_cash_value(self) -> Decimal:
         return self.market_value - self.mortgage_left
 
     def to_dict(self):
         return asdict(self) | {"net_cash_value": self.net_cash_value()}
 
+    def amortization_schedule(self) -> AmortizationSchedule:
+        """The schedule of the mortgage left, shared with every property on the same loan."""
+        return schedules.schedule(
+            self.mortgage_left, self.mortgage_rate, self.mortgage_months
+        )
+
+    @decimal_context
     def __post_init__(self):
         if self.is_with_mortgage():
-            monthly_payment, monthly_interest = calculate_monthly_payment(
-                principal=self.mortgage_left,
-                rate=self.mortgage_rate,
-                number_of_months_left=self.mortgage_months,
+            # a property stepped a month ahead is the next row of the cached schedule
+            monthly_payment, monthly_interest = schedules.row(
+                self.mortgage_left, self.mortgage_rate, self.mortgage_months
             )
 
             self.monthly_interest = monthly_interest
             self.monthly_payment = monthly_payment
 
 
+@dataclass(frozen=True)
+class PropertyTotals:
+    """
+    The totals of a list of properties, summed in list order so they match summing the list.
+    """
+
+    market_value: Decimal = Decimal("0")
+    monthly_income: Decimal = Decimal("0")
+    net_cash_value: Decimal = Decimal("0")
+    mortgage_left: Decimal = Decimal("0")
+    monthly_mortgage: Decimal = Decimal("0")
+
+    @classmethod
+    @decimal_context
+    def of(cls, properties: list[InvestmentProperty]) -> "PropertyTotals":
+        """Sums every total in a single pass over the properties."""
+        market_value = monthly_income = net_cash_value = Decimal("0")
+        mortgage_left = monthly_mortgage = Decimal("0")
+        for p in properties:
+            market_value += p.market_value
+            monthly_income += p.monthly_income
+            net_cash_value += p.net_cash_value()
+            mortgage_left += p.mortgage_left
+            if p.is_with_mortgage():
+                monthly_mortgage += p.monthly_payment
+
+        return cls(
+            market_value,
+            monthly_income,
+            net_cash_value,
+            mortgage_left,
+            monthly_mortgage,
+        )
+
+    @decimal_context
+    def add(self, prop: InvestmentProperty) -> "PropertyTotals":
+        """The totals with `prop` appended to the end of the list."""
+        return PropertyTotals(
+            market_value=self.market_value + prop.market_value,
+            monthly_income=self.monthly_income + prop.monthly_income,
+            net_cash_value=self.net_cash_value + prop.net_cash_value(),
+            mortgage_left=self.mortgage_left + prop.mortgage_left,
+            monthly_mortgage=self.monthly_mortgage
+            + (prop.monthly_payment if prop.is_with_mortgage() else Decimal("0")),
+        )
+
+
+@decimal_context
 def simulate_next_property_month(
     prev: InvestmentProperty, annual_property_appreciation_rate: Decimal, sim_date: date
 ) -> InvestmentProperty:
@@ -72,3 +129,30 @@ def simulate_next_property_month(
         mortgage_months=new_mortgage_months,
         annual_rent_increase_rate=prev.annual_rent_increase_rate,
     )
+
+
+@timed("properties.timeline")
+@decimal_context
+def property_timeline(
+    properties: list[InvestmentProperty],
+    annual_property_appreciation_rate: Decimal,
+    dates: list[date],
+) -> list[list[InvestmentProperty]]:
+    """
+    Returns the state of every property for each of the given dates, the first date being the initial state.
+
+    A property evolves the same way no matter what happens on the market, so the timeline can be
+    computed once and shared by every path of a batch simulation.
+    """
+    timeline = [list(properties)]
+    for sim_date in dates[1:]:
+        timeline.append(
+            [
+                simulate_next_property_month(
+                    prop, annual_property_appreciation_rate, sim_date=sim_date
+                )
+                for prop in timeline[-1]
+            ]
+        )
+
+    return timeline
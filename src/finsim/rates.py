@@ -0,0 +1,147 @@
+from decimal import Decimal
+from hashlib import sha256
+from itertools import islice
+from typing import Iterable, Iterator, Optional, Union
+
+import numpy as np
+
+from finsim.instrumentation import timed
+
+
+class RatePath:
+    """
+    Monthly rates with random access by month index, backed by a contiguous float64 array.
+
+    Unlike a generator, a rate path can be read any number of times, so every run over the same
+    path sees the same rates. A cyclic path starts again from the beginning once it runs out,
+    the same way the file generators loop over the data.
+    """
+
+    def __init__(
+        self,
+        values: Union[np.ndarray, Iterable[float]],
+        cyclic: bool = False,
+        decimals: Optional[tuple[Decimal, ...]] = None,
+    ):
+        array = np.array(values, dtype=np.float64)
+        if array.ndim != 1:
+            raise ValueError("a rate path needs a 1-d sequence of rates")
+        if cyclic and len(array) == 0:
+            raise ValueError("a cyclic rate path can't be empty")
+        array.flags.writeable = False
+
+        self._values = array
+        self._decimals = decimals
+        self._text: Optional[np.ndarray] = None
+        self.cyclic = cyclic
+
+    @classmethod
+    def from_decimals(
+        cls, values: Iterable[Decimal], cyclic: bool = False
+    ) -> "RatePath":
+        """Keeps the exact Decimal values for the Decimal engine."""
+        decimals = tuple(values)
+        return cls([float(v) for v in decimals], cyclic=cyclic, decimals=decimals)
+
+    @classmethod
+    def from_text(
+        cls,
+        text: np.ndarray,
+        cyclic: bool = False,
+    ) -> "RatePath":
+        """
+        Builds the path from an array of decimal strings, e.g. parsed from a CSV file.
+
+        The exact Decimal values are only created when the Decimal engine asks for them.
+        """
+        path = cls(text.astype(np.float64), cyclic=cyclic)
+        path._text = text
+        return path
+
+    @classmethod
+    @timed("rates.read_generator")
+    def from_iterator(cls, rates: Iterator[Decimal], months: int) -> "RatePath":
+        """Materializes the first `months` rates of a generator."""
+        return cls.from_decimals(islice(rates, months))
+
+    @property
+    def values(self) -> np.ndarray:
+        return self._values
+
+    @property
+    def text(self) -> np.ndarray:
+        """The rates as decimal strings."""
+        if self._text is None:
+            self._text = np.array([str(d) for d in self.decimals], dtype=str)
+        return self._text
+
+    @property
+    def decimals(self) -> tuple[Decimal, ...]:
+        if self._decimals is None and self._text is not None:
+            self._decimals = tuple(Decimal(t) for t in self._text.tolist())
+        elif self._decimals is None:
+            # repr gives the shortest string that round trips, so 0.0013 stays Decimal("0.0013")
+            self._decimals = tuple(Decimal(repr(v)) for v in self._values.tolist())
+        return self._decimals
+
+    @property
+    def digest(self) -> str:
+        """Identifies the content of the path, two paths with the same digest give the same results."""
+        content = self._values.tobytes() + (b"cyclic" if self.cyclic else b"")
+        return sha256(content).hexdigest()
+
+    def __len__(self) -> int:
+        return len(self._values)
+
+    def __getitem__(self, month: int) -> Decimal:
+        if self.cyclic:
+            month %= len(self._values)
+        return self.decimals[month]
+
+    def __eq__(self, other: object) -> bool:
+        if not isinstance(other, RatePath):
+            return NotImplemented
+        return self.cyclic == other.cyclic and np.array_equal(
+            self._values, other._values
+        )
+
+    def __hash__(self) -> int:
+        return hash(self.digest)
+
+    def __repr__(self) -> str:
+        return f"RatePath(months={len(self)}, cyclic={self.cyclic})"
+
+    def as_array(self, months: int) -> np.ndarray:
+        """The rates for the first `months` months as a float array, a cyclic path is repeated as needed."""
+        if months <= len(self._values):
+            return self._values[:months]
+
+        if not self.cyclic:
+            raise IndexError(
+                f"the rate path has {len(self)} months, {months} were requested"
+            )
+
+        repeats = -(-months // len(self._values))
+        return np.tile(self._values, repeats)[:months]
+
+
+RateSource = Union[RatePath, Iterator[Decimal]]
+
+
+def as_rate_path(rates: Optional[RateSource], months: int) -> Optional[RatePath]:
+    """
+    Rate paths are used as they are, generators are read once for the given number of months.
+
+    A path that isn't cyclic needs a rate for every month, a shorter one is refused before the run starts.
+    """
+    if rates is None:
+        return None
+
+    path = (
+        rates if isinstance(rates, RatePath) else RatePath.from_iterator(rates, months)
+    )
+    if not path.cyclic and len(path) < months:
+        raise ValueError(
+            f"the rate path has {len(path)} months, {months} were requested"
+        )
+    return path
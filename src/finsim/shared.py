@@ -0,0 +1,108 @@
+from contextlib import contextmanager
+from logging import getLogger
+from multiprocessing.shared_memory import SharedMemory
+from pathlib import Path
+from typing import Iterator
+
+import numpy as np
+
+logger = getLogger(__name__)
+
+# where POSIX shared memory segments show up as files on Linux
+_SHM_DIR = Path("/dev/shm")
+
+# name -> (shape, dtype) of every array
+Layout = dict[str, tuple[tuple[int, ...], str]]
+# name -> (segment name, shape, dtype), what a worker needs to attach
+Spec = dict[str, tuple[str, tuple[int, ...], str]]
+
+
+class SharedArrays:
+    """
+    Arrays in shared memory segments, created by the parent process and filled by the workers.
+
+    Workers attach by segment name with `attach` and write their rows in place, nothing is pickled back.
+    `collect` hands the arrays to the parent and removes the segments, on error `unlink` removes them.
+    Use it as a context manager, so the segments never outlive the run.
+    """
+
+    def __init__(self, layout: Layout):
+        self.layout = layout
+        self._segments: dict[str, SharedMemory] = {}
+        try:
+            for name, (shape, dtype) in layout.items():
+                nbytes = int(np.prod(shape)) * np.dtype(dtype).itemsize
+                self._segments[name] = SharedMemory(create=True, size=max(nbytes, 1))
+        except BaseException:
+            self.unlink()
+            raise
+
+    def __enter__(self) -> "SharedArrays":
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.unlink()
+
+    @property
+    def spec(self) -> Spec:
+        return {
+            name: (self._segments[name].name, shape, dtype)
+            for name, (shape, dtype) in self.layout.items()
+        }
+
+    def collect(self) -> dict[str, np.ndarray]:
+        """
+        The arrays written by the workers, then the segments are removed.
+
+        On Linux the segment files are mapped again by the arrays, so they are not copied and the memory
+        is freed with the last array. Elsewhere they are copied out of the segments.
+        """
+        arrays = {}
+        for name, (shape, dtype) in self.layout.items():
+            segment = self._segments[name]
+            path = _SHM_DIR / segment.name.lstrip("/")
+            if int(np.prod(shape)) == 0:
+                arrays[name] = np.empty(shape, dtype=dtype)
+            elif path.exists():
+                arrays[name] = np.asarray(
+                    np.memmap(path, dtype=dtype, mode="r+", shape=shape)
+                )
+            else:
+                view = np.ndarray(shape, dtype=dtype, buffer=segment.buf)
+                arrays[name] = view.copy()
+                del view
+
+        self.unlink()
+        return arrays
+
+    def unlink(self) -> None:
+        """Closes and removes every segment, the workers' views stay valid until they close them."""
+        for segment in self._segments.values():
+            try:
+                segment.close()
+                segment.unlink()
+            except FileNotFoundError:
+                pass
+            except (OSError, BufferError) as e:
+                logger.warning(
+                    f"Failed to remove the shared memory {segment.name}: {e}"
+                )
+        self._segments.clear()
+
+
+@contextmanager
+def attach(spec: Spec) -> Iterator[dict[str, np.ndarray]]:
+    """The arrays of a `SharedArrays` in a worker, the segments are closed when the block ends."""
+    segments = {
+        name: SharedMemory(name=segment) for name, (segment, _, _) in spec.items()
+    }
+    arrays = {
+        name: np.ndarray(shape, dtype=dtype, buffer=segments[name].buf)
+        for name, (_, shape, dtype) in spec.items()
+    }
+    try:
+        yield arrays
+    finally:
+        arrays.clear()
+        for segment in segments.values():
+            segment.close()
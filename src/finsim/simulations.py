@@ -1,15 +1,45 @@
+from collections import deque
 from dataclasses import dataclass, asdict, field, replace
 from datetime import date
-from typing import Generator, Literal, Optional
-
-from finsim.properties import InvestmentProperty, simulate_next_property_month
-from decimal import Decimal, getcontext
+from itertools import chain
+from typing import (
+    Any,
+    Callable,
+    Iterable,
+    Iterator,
+    Literal,
+    Optional,
+    Sequence,
+    TypeVar,
+    Union,
+)
+
+from finsim.context import decimal_context
+from finsim.frame import SimulationFrame
+from finsim.instrumentation import active_probe, count, timed
+from finsim.properties import (
+    InvestmentProperty,
+    PropertyTotals,
+    simulate_next_property_month,
+)
+from finsim.rates import RatePath, RateSource, as_rate_path
+from finsim.summary import (
+    DEFAULT_STATISTICS,
+    SimulationSummary,
+    Statistic,
+    check_statistics,
+    summarize,
+)
+from decimal import Decimal
 from logging import getLogger
-
-getcontext().prec = 26
+from time import perf_counter_ns
 
 logger = getLogger(__name__)
 
+Engine = Literal["decimal", "float", "cents"]
+
+T = TypeVar("T")
+
 
 @dataclass
 class FireSimulation:
@@ -35,27 +65,72 @@ class FireSimulation:
     invest_cash_threshold: Decimal = Decimal(0)
     invest_cash_surplus_strategy: Literal["80-20", "100", "60-40", "50-50"] = "80-20"
 
+    # totals of `investment_properties`, kept up to date by `simulate_next`, `add_property` and `sell_property`
+    _property_totals: Optional[PropertyTotals] = field(
+        default=None, init=False, repr=False, compare=False
+    )
+    # the list and the length the totals are of, a list changed some other way is summed again
+    _property_totals_of: Optional[tuple[list[InvestmentProperty], int]] = field(
+        default=None, init=False, repr=False, compare=False
+    )
+
+    @property
+    def property_totals(self) -> PropertyTotals:
+        totals = self._cached_property_totals()
+        if totals is None:
+            totals = PropertyTotals.of(self.investment_properties)
+            self._cache_property_totals(totals)
+        return totals
+
+    def _cached_property_totals(self) -> Optional[PropertyTotals]:
+        if self._property_totals_of is None:
+            return None
+        properties, length = self._property_totals_of
+        if properties is not self.investment_properties or length != len(properties):
+            return None
+        return self._property_totals
+
+    def _cache_property_totals(self, totals: PropertyTotals) -> None:
+        self._property_totals = totals
+        self._property_totals_of = (
+            self.investment_properties,
+            len(self.investment_properties),
+        )
+
+    def add_property(self, prop: InvestmentProperty) -> None:
+        totals = self._cached_property_totals()
+        self.investment_properties.append(prop)
+        if totals is not None:
+            self._cache_property_totals(totals.add(prop))
+
+    def sell_property(self, prop: InvestmentProperty) -> None:
+        self.investment_properties.remove(prop)
+        # summed again in list order, a subtraction could round differently than the sum did
+        self._cache_property_totals(PropertyTotals.of(self.investment_properties))
+
     @property
     def properties_market_value(self) -> Decimal:
-        return Decimal(sum([p.market_value for p in self.investment_properties]))
+        return self.property_totals.market_value
 
     @property
     def properties_monthly_income(self) -> Decimal:
-        return Decimal(sum([p.monthly_income for p in self.investment_properties]))
+        return self.property_totals.monthly_income
 
     @property
     def properties_net_cash_value(self) -> Decimal:
-        return Decimal(sum([p.net_cash_value() for p in self.investment_properties]))
+        return self.property_totals.net_cash_value
 
     @property
     def properties_mortgage_left(self) -> Decimal:
-        return Decimal(sum([p.mortgage_left for p in self.investment_properties]))
+        return self.property_totals.mortgage_left
 
     @property
+    @decimal_context
     def liquid_wealth(self) -> Decimal:
         return self.stock_investments + self.bonds_investments + self.cash
 
     @property
+    @decimal_context
     def wealth_inc_properties(self) -> Decimal:
         return (
             self.stock_investments
@@ -66,19 +141,14 @@ class FireSimulation:
 
     @property
     def properties_monthly_mortgage(self) -> Decimal:
-        return Decimal(
-            sum(
-                [
-                    p.monthly_payment
-                    for p in self.investment_properties
-                    if p.is_with_mortgage()
-                ]
-            )
-        )
+        return self.property_totals.monthly_mortgage
 
     def to_dict(self) -> dict:
 
-        to_return = asdict(self) | {
+        to_return = asdict(self)
+        del to_return["_property_totals"]
+        del to_return["_property_totals_of"]
+        to_return |= {
             "liquid_wealth": self.liquid_wealth,
             "wealth_inc_properties": self.wealth_inc_properties,
             "properties_monthly_mortgage": self.properties_monthly_mortgage,
@@ -95,78 +165,496 @@ class FireSimulation:
         return to_return
 
 
+# decides after a month whether the run stops, the month it holds for is the last one of the run
+StopCondition = Callable[[FireSimulation], bool]
+# the months a run keeps: all of them, only the last one, or every k-th one and the last one
+Retention = Union[Literal["all", "last"], int]
+
+
+def liquid_wealth_below(amount: Union[Decimal, int]) -> StopCondition:
+    """Stops once the stocks, bonds and cash are worth less than `amount`."""
+    return lambda sim: sim.liquid_wealth < amount
+
+
+def income_is_zero() -> StopCondition:
+    """Stops on the first month without a salary."""
+    return lambda sim: sim.monthly_income == 0
+
+
+def net_worth_reached(target: Union[Decimal, int]) -> StopCondition:
+    """Stops once the wealth including the properties reaches `target`."""
+    return lambda sim: sim.wealth_inc_properties >= target
+
+
+@timed("run_simulation")
+@decimal_context
 def run_simulation(
     init: FireSimulation,
     months: int,
-    inflation_rate_gen: Optional[Generator[Decimal, None, None]] = None,
-    stock_gen: Optional[Generator[Decimal, None, None]] = None,
+    inflation_rates: Optional[RateSource] = None,
+    stock_returns: Optional[RateSource] = None,
+    engine: Engine = "decimal",
+    stop: Sequence[StopCondition] = (),
+    keep: Retention = "all",
 ) -> list[FireSimulation]:
-    simulations = [init]
-    for _ in range(months):
-        next_sim = simulate_next(
-            simulations[-1], inflation_rate_gen=inflation_rate_gen, stock_gen=stock_gen
+    """
+    Simulates the given number of months, or until the wealth including properties goes negative.
+
+    `inflation_rates` and `stock_returns` are monthly rates indexed by the month of the simulation,
+    generators are read once into a `RatePath`. Without them the fixed annual rates from `init` are used.
+
+    The `float` engine follows the same rules with native floats, its results stay within a few cents
+    of the exact `decimal` engine. The `cents` engine keeps the money in integer cents and gives exactly
+    the results of the `decimal` engine.
+
+    The run also ends on the first month any of the `stop` conditions holds for, see `iter_simulation`.
+    `keep` chooses the months that are returned, see `retain`.
+    """
+    return retain(
+        iter_simulation(init, months, inflation_rates, stock_returns, engine, stop),
+        keep,
+    )
+
+
+def iter_simulation(
+    init: FireSimulation,
+    months: int,
+    inflation_rates: Optional[RateSource] = None,
+    stock_returns: Optional[RateSource] = None,
+    engine: Engine = "decimal",
+    stop: Sequence[StopCondition] = (),
+) -> Iterator[FireSimulation]:
+    """
+    Yields the months of `run_simulation` one by one, starting with `init`, and holds on to none of them.
+
+    After every month the `stop` conditions are checked, the run ends with the first month one of them holds for.
+    Nothing is simulated past the month the caller stops reading at.
+    """
+    inflation_path = as_rate_path(inflation_rates, months)
+    stock_path = as_rate_path(stock_returns, months)
+
+    if engine == "float":
+        from finsim.fast import FloatEngine
+
+        months_of_run = _engine_months(
+            FloatEngine(init, months, inflation_path, stock_path)
         )
-        if next_sim.wealth_inc_properties < 0:
-            break
+    elif engine == "cents":
+        from finsim.cents import CentsEngine
+
+        months_of_run = _engine_months(
+            CentsEngine(init, months, inflation_path, stock_path)
+        )
+    elif engine == "decimal":
+        months_of_run = _decimal_months(init, months, inflation_path, stock_path)
+    else:
+        raise ValueError(f"unknown engine: {engine}")
+
+    return _until(months_of_run, stop)
+
+
+def _decimal_months(
+    init: FireSimulation,
+    months: int,
+    inflation_path: Optional[RatePath],
+    stock_path: Optional[RatePath],
+) -> Iterator[FireSimulation]:
+    sim = init
+    yield sim
+    for month in range(months):
+        sim = simulate_next(
+            sim,
+            inflation_rate=_rate_at(inflation_path, month),
+            stock_return=_rate_at(stock_path, month),
+        )
+        if sim.wealth_inc_properties < 0:
+            return
 
-        simulations.append(next_sim)
-    return simulations
+        yield sim
 
 
+def _engine_months(engine: Any) -> Iterator[FireSimulation]:
+    for k, state in enumerate(engine.iter_states()):
+        yield engine.to_simulation(state, k)
+
+
+def _until(
+    simulations: Iterator[FireSimulation], stop: Sequence[StopCondition]
+) -> Iterator[FireSimulation]:
+    for sim in simulations:
+        yield sim
+        if any(condition(sim) for condition in stop):
+            return
+
+
+def retain(simulations: Iterable[T], keep: Retention = "all") -> list[T]:
+    """
+    The months of a run that `keep` asks for, read once without holding on to the others.
+
+    With every k-th month the last month is kept as well, so the outcome of the run is never lost.
+    """
+    if keep == "all":
+        return list(simulations)
+    if keep == "last":
+        return list(deque(simulations, maxlen=1))
+    if isinstance(keep, bool) or not isinstance(keep, int) or keep < 1:
+        raise ValueError(f"unknown retention: {keep!r}")
+
+    kept: list[T] = []
+    last = None
+    for i, sim in enumerate(simulations):
+        if i % keep == 0:
+            kept.append(sim)
+        last = (i, sim)
+    if last is not None and last[0] % keep != 0:
+        kept.append(last[1])
+    return kept
+
+
+@timed("run_fire_simulation")
+@decimal_context
 def run_fire_simulation(
     init: FireSimulation,
     expected_number_of_months: int,
-    inflation_rate_gen: Optional[Generator[Decimal, None, None]] = None,
-    stock_gen: Optional[Generator[Decimal, None, None]] = None,
+    inflation_rates: Optional[RateSource] = None,
+    stock_returns: Optional[RateSource] = None,
+    search: Literal["bisect", "exhaustive"] = "bisect",
+    engine: Engine = "decimal",
 ) -> tuple[list[FireSimulation], int]:
     """
     The fire simulation tries to find a point when the wealth is enough to sustain the monthly expenses for the expected number of months.
 
     On every month, try to zero out the income and break when the simulation reaches the expected number of months
+
+    Every candidate retirement month is simulated over the same rate path, month `x` of every candidate
+    uses the rates at index `x`.
+
+    With deterministic rates, working longer never makes the outcome worse, so the default `bisect` search
+    finds the earliest sustainable month with a binary search over the retirement month.
+    `exhaustive` tries every month in order, it's slower but doesn't rely on that assumption.
+
+    `engine` selects the arithmetic of the candidate runs, see `run_simulation`. With `float` and `cents`
+    the candidates that aren't returned never become Decimal dataclasses, which makes the search several times faster.
+    """
+    if expected_number_of_months <= 0:
+        return [], 0
+
+    candidates = _fire_candidates(
+        init, expected_number_of_months, inflation_rates, stock_returns, engine
+    )
+    retire_after, retirement = _fire_search(candidates, search)
+    return candidates.join(retire_after, retirement), retire_after + 1
+
+
+@decimal_context
+def run_simulation_frame(
+    init: FireSimulation,
+    months: int,
+    inflation_rates: Optional[RateSource] = None,
+    stock_returns: Optional[RateSource] = None,
+    engine: Engine = "decimal",
+) -> SimulationFrame:
+    """
+    `run_simulation` returning the columnar `SimulationFrame`.
+
+    The `float` and `cents` engines write their states straight into the frame columns,
+    without creating a `FireSimulation` for every month.
     """
-    final_sim = []
-    number_of_months = 0
-
-    for i in range(expected_number_of_months):
-        number_of_months += 1
-        simulations = [init]
-        for x in range(expected_number_of_months):
-            if x > i:
-                # update income to 0
-                prev = replace(simulations[-1], monthly_income=Decimal("0"))
-                next_sim = simulate_next(
-                    prev, inflation_rate_gen=inflation_rate_gen, stock_gen=stock_gen
-                )
-            else:
-                next_sim = simulate_next(
-                    simulations[-1],
-                    inflation_rate_gen=inflation_rate_gen,
-                    stock_gen=stock_gen,
-                )
+    inflation_path = as_rate_path(inflation_rates, months)
+    stock_path = as_rate_path(stock_returns, months)
+
+    if engine == "decimal":
+        return SimulationFrame.from_simulations(
+            run_simulation(init, months, inflation_path, stock_path)
+        )
+    if engine == "float":
+        from finsim.fast import FloatEngine
+
+        float_engine = FloatEngine(init, months, inflation_path, stock_path)
+        return float_engine.to_frame(float_engine.simulate())
+    if engine == "cents":
+        from finsim.cents import CentsEngine
+
+        cents_engine = CentsEngine(init, months, inflation_path, stock_path)
+        return cents_engine.to_frame(cents_engine.simulate())
+
+    raise ValueError(f"unknown engine: {engine}")
+
+
+@decimal_context
+def run_fire_simulation_frame(
+    init: FireSimulation,
+    expected_number_of_months: int,
+    inflation_rates: Optional[RateSource] = None,
+    stock_returns: Optional[RateSource] = None,
+    search: Literal["bisect", "exhaustive"] = "bisect",
+    engine: Engine = "decimal",
+) -> tuple[SimulationFrame, int]:
+    """`run_fire_simulation` returning the columnar `SimulationFrame`."""
+    if expected_number_of_months <= 0:
+        return SimulationFrame.from_simulations([]), 0
+
+    candidates = _fire_candidates(
+        init, expected_number_of_months, inflation_rates, stock_returns, engine
+    )
+    retire_after, retirement = _fire_search(candidates, search)
+    return candidates.join_frame(retire_after, retirement), retire_after + 1
+
+
+@decimal_context
+def run_simulation_summary(
+    init: FireSimulation,
+    months: int,
+    inflation_rates: Optional[RateSource] = None,
+    stock_returns: Optional[RateSource] = None,
+    engine: Engine = "decimal",
+    statistics: Sequence[Statistic] = DEFAULT_STATISTICS,
+) -> SimulationSummary:
+    """`run_simulation` reduced to a `SimulationSummary` as the months are simulated, none of them is kept."""
+    return summarize(
+        iter_simulation(init, months, inflation_rates, stock_returns, engine),
+        months,
+        statistics,
+    )
+
+
+@decimal_context
+def run_fire_simulation_summary(
+    init: FireSimulation,
+    expected_number_of_months: int,
+    inflation_rates: Optional[RateSource] = None,
+    stock_returns: Optional[RateSource] = None,
+    search: Literal["bisect", "exhaustive"] = "bisect",
+    engine: Engine = "decimal",
+    statistics: Sequence[Statistic] = DEFAULT_STATISTICS,
+) -> tuple[SimulationSummary, int]:
+    """
+    `run_fire_simulation` reduced to a `SimulationSummary`.
+
+    The search still keeps the months before retirement it starts the candidates from,
+    the run it picks is reduced without being put together.
+    """
+    check_statistics(statistics)
+    if expected_number_of_months <= 0:
+        return summarize([init], 0, statistics), 0
+
+    candidates = _fire_candidates(
+        init, expected_number_of_months, inflation_rates, stock_returns, engine
+    )
+    retire_after, retirement = _fire_search(candidates, search)
+    summary = summarize(
+        candidates.iter_join(retire_after, retirement),
+        expected_number_of_months,
+        statistics,
+    )
+    summary.sustainable = candidates.is_sustainable(retire_after, retirement)
+    return summary, retire_after + 1
+
+
+@timed("fire.working")
+def _fire_candidates(
+    init: FireSimulation,
+    expected_number_of_months: int,
+    inflation_rates: Optional[RateSource],
+    stock_returns: Optional[RateSource],
+    engine: Engine,
+) -> "_FireCandidates":
+    inflation_path = as_rate_path(inflation_rates, expected_number_of_months)
+    stock_path = as_rate_path(stock_returns, expected_number_of_months)
+    if engine == "float":
+        from finsim.fast import FloatFireCandidates
+
+        return FloatFireCandidates(
+            init, expected_number_of_months, inflation_path, stock_path
+        )
+    if engine == "cents":
+        from finsim.cents import CentsFireCandidates
+
+        return CentsFireCandidates(
+            init, expected_number_of_months, inflation_path, stock_path
+        )
+    if engine == "decimal":
+        return _FireCandidates(
+            init, expected_number_of_months, inflation_path, stock_path
+        )
+
+    raise ValueError(f"unknown engine: {engine}")
+
+
+@timed("fire.search")
+def _fire_search(
+    candidates: "_FireCandidates", search: str
+) -> tuple[int, list[FireSimulation]]:
+    if search == "exhaustive":
+        return _exhaustive_fire_search(candidates)
+    if search == "bisect":
+        return _bisect_fire_search(candidates)
+
+    raise ValueError(f"unknown search: {search}")
+
+
+def _exhaustive_fire_search(
+    candidates: "_FireCandidates",
+) -> tuple[int, list[FireSimulation]]:
+    for i in range(candidates.expected_number_of_months):
+        count("fire.candidates")
+        retirement = candidates.run_retirement(i)
+        if candidates.is_sustainable(i, retirement):
+            break
+
+    return i, retirement
+
+
+def _bisect_fire_search(
+    candidates: "_FireCandidates",
+) -> tuple[int, list[FireSimulation]]:
+    retirements: dict[int, list[FireSimulation]] = {}
+
+    def is_sustainable(i: int) -> bool:
+        if i not in retirements:
+            count("fire.candidates")
+            retirements[i] = candidates.run_retirement(i)
+        return candidates.is_sustainable(i, retirements[i])
+
+    # when even working until the last month isn't enough, the exhaustive search ends up there too
+    lo, hi = 0, candidates.expected_number_of_months - 1
+    if not is_sustainable(hi):
+        return hi, retirements[hi]
+
+    # find the first sustainable retirement month in [lo, hi]
+    while lo < hi:
+        mid = (lo + hi) // 2
+        if is_sustainable(mid):
+            hi = mid
+        else:
+            lo = mid + 1
+
+    is_sustainable(lo)
+    return lo, retirements[lo]
+
+
+# a fire run still counts as sustainable when its money runs out this many months before the end
+FIRE_SLACK_MONTHS = 2
+
+
+def lasts_long_enough(length: Any, expected_number_of_months: int) -> Any:
+    """Whether a fire run keeping `length` months lasts, works for an array of lengths too."""
+    return length >= expected_number_of_months - FIRE_SLACK_MONTHS
+
+
+class _FireCandidates:
+    """
+    The candidate runs of the fire search.
+
+    The months before retirement are the same for every candidate, so they are simulated once
+    and every candidate starts its retirement from the state checkpointed there.
+    """
+
+    def __init__(
+        self,
+        init: FireSimulation,
+        expected_number_of_months: int,
+        inflation_path: Optional[RatePath],
+        stock_path: Optional[RatePath],
+    ):
+        self.expected_number_of_months = expected_number_of_months
+        self.inflation_path = inflation_path
+        self.stock_path = stock_path
+
+        self.working = [init]
+        for month in range(expected_number_of_months):
+            next_sim = self._simulate_month(self.working[-1], month)
+            if next_sim.wealth_inc_properties <= 0:
+                break
+
+            self.working.append(next_sim)
+
+    def _simulate_month(self, prev: FireSimulation, month: int) -> FireSimulation:
+        return simulate_next(
+            prev,
+            inflation_rate=_rate_at(self.inflation_path, month),
+            stock_return=_rate_at(self.stock_path, month),
+        )
+
+    def run_retirement(self, retire_after: int) -> list[FireSimulation]:
+        """
+        Simulates living from the investments after working for `retire_after` + 1 months.
+
+        Returns only the months after the checkpoint, so the cost is proportional to the remaining horizon.
+        """
+        if len(self.working) < retire_after + 2:
+            # the money ran out before retirement
+            return []
+
+        simulations = [self.working[retire_after + 1]]
+        for month in range(retire_after + 1, self.expected_number_of_months):
+            # update income to 0
+            prev = replace(simulations[-1], monthly_income=Decimal("0"))
+            next_sim = self._simulate_month(prev, month)
 
             if next_sim.wealth_inc_properties <= 0:
                 break
 
             simulations.append(next_sim)
 
-        final_sim = simulations
-        if len(simulations) >= (expected_number_of_months - 2):
-            break
+        return simulations[1:]
+
+    def join(
+        self, retire_after: int, retirement: list[FireSimulation]
+    ) -> list[FireSimulation]:
+        return self.working[: retire_after + 2] + retirement
+
+    def iter_join(
+        self, retire_after: int, retirement: list[FireSimulation]
+    ) -> Iterator[FireSimulation]:
+        return chain(self.working[: retire_after + 2], retirement)
+
+    def join_frame(
+        self, retire_after: int, retirement: list[FireSimulation]
+    ) -> SimulationFrame:
+        return SimulationFrame.from_simulations(self.join(retire_after, retirement))
+
+    def is_sustainable(
+        self, retire_after: int, retirement: list[FireSimulation]
+    ) -> bool:
+        length = min(len(self.working), retire_after + 2) + len(retirement)
+        return lasts_long_enough(length, self.expected_number_of_months)
+
+
+def _rate_at(path: Optional[RatePath], month: int) -> Optional[Decimal]:
+    return path[month] if path is not None else None
 
-    return final_sim, number_of_months
+
+def next_month(current: date) -> date:
+    # add one month to the date, year should change if month is 12
+    return current.replace(
+        month=current.month + 1 if current.month < 12 else 1,
+        year=(current.year + 1 if current.month == 12 else current.year),
+    )
+
+
+def month_dates(start: date, months: int) -> list[date]:
+    dates = [start]
+    for _ in range(months):
+        dates.append(next_month(dates[-1]))
+    return dates
 
 
+@decimal_context
 def simulate_next(
     prev: FireSimulation,
-    inflation_rate_gen: Optional[Generator[Decimal, None, None]] = None,
-    stock_gen: Optional[Generator[Decimal, None, None]] = None,
+    inflation_rate: Optional[Decimal] = None,
+    stock_return: Optional[Decimal] = None,
 ) -> FireSimulation:
-    # add one month to the start date, year should change if month is 12
+    """
+    Simulates the next month, `inflation_rate` and `stock_return` are the monthly rates for that month,
+    when not given the fixed annual rates of `prev` are used.
+    """
+    probe = active_probe()
+    if probe is not None:
+        started = perf_counter_ns()
 
-    new_date = prev.date.replace(
-        month=prev.date.month + 1 if prev.date.month < 12 else 1,
-        year=(prev.date.year + 1 if prev.date.month == 12 else prev.date.year),
-    )
+    new_date = next_month(prev.date)
 
     new_investment_properties = [
         simulate_next_property_month(
@@ -174,11 +662,13 @@ def simulate_next(
         )
         for prop in prev.investment_properties
     ]
+    if probe is not None:
+        probe.add_time("properties.step", perf_counter_ns() - started)
 
     annual_inflation_rate = prev.annual_inflation_rate
     monthly_inflation_rate = annual_inflation_rate / Decimal("12")
-    if inflation_rate_gen:
-        monthly_inflation_rate = next(inflation_rate_gen)
+    if inflation_rate is not None:
+        monthly_inflation_rate = inflation_rate
         annual_inflation_rate = monthly_inflation_rate * Decimal("12")
 
     # total expenses should include inflation rate
@@ -195,29 +685,32 @@ def simulate_next(
     # total income
     total_monthly_cash = prev.cash + new_monthly_income + prev.properties_monthly_income
 
-    new_properties_net_cash_value = sum(
-        [p.net_cash_value() for p in new_investment_properties]
-    )
+    new_property_totals = PropertyTotals.of(new_investment_properties)
+    new_properties_net_cash_value = new_property_totals.net_cash_value
 
     new_bonds_investments = prev.bonds_investments + (
         prev.bonds_investments * prev.bonds_return_rate / Decimal("12")
     )
-    if stock_gen:
-        new_stock_investments = prev.stock_investments * (1 + next(stock_gen))
+    if stock_return is not None:
+        new_stock_investments = prev.stock_investments * (1 + stock_return)
     else:
         new_stock_investments = prev.stock_investments * (
             1 + prev.stock_return_rate / Decimal("12")
         )
 
+    # the last account the expenses are paid from, counted by the instrumentation
     if total_monthly_cash > total_monthly_expenses:
+        paid_from = "cash"
         new_cash = total_monthly_cash - total_monthly_expenses
     elif (total_monthly_cash + new_bonds_investments) > total_monthly_expenses:
+        paid_from = "bonds"
         new_cash = Decimal("0")
         cash_needed = total_monthly_expenses - total_monthly_cash
         new_bonds_investments -= cash_needed
     elif (
         total_monthly_cash + new_bonds_investments + new_stock_investments
     ) > total_monthly_expenses:
+        paid_from = "stocks"
         new_cash = Decimal("0")
         cash_needed = (
             total_monthly_expenses - total_monthly_cash - new_bonds_investments
@@ -233,11 +726,13 @@ def simulate_next(
         # we need to sell a property, if we have one then we sell it
         # if we have more than one, we sell the one with the lowest net cash value
         # then we add the cash to the cash account
+        paid_from = "property_sale"
 
         to_delete_property = min(
             new_investment_properties, key=lambda p: p.net_cash_value()
         )
         new_investment_properties.remove(to_delete_property)
+        new_property_totals = PropertyTotals.of(new_investment_properties)
 
         new_cash = Decimal("0")
         new_cash += to_delete_property.net_cash_value()
@@ -252,6 +747,7 @@ def simulate_next(
         new_stock_investments = Decimal("0")
         new_cash -= cash_needed
     else:
+        paid_from = "nothing_left"
         cash_needed = (
             total_monthly_expenses
             - total_monthly_cash
@@ -281,7 +777,7 @@ def simulate_next(
 
             new_cash -= amount_over_threshold
 
-    return FireSimulation(
+    new = FireSimulation(
         stock_investments=round(new_stock_investments, 2),
         investment_properties=new_investment_properties,
         bonds_investments=round(new_bonds_investments, 2),
@@ -299,3 +795,14 @@ def simulate_next(
         annual_income_increase_rate=prev.annual_income_increase_rate,
         date=new_date,
     )
+    new._cache_property_totals(new_property_totals)
+
+    if probe is not None:
+        probe.count("steps")
+        probe.count(f"waterfall.{paid_from}")
+        if paid_from == "property_sale":
+            probe.count("properties_sold")
+        if prev.invest_cash_surplus and amount_over_threshold > 0:
+            probe.count("surplus_invested")
+        probe.add_time("step", perf_counter_ns() - started)
+    return new
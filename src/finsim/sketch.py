@@ -0,0 +1,144 @@
+from datetime import date
+from typing import Any, Optional, Sequence
+
+import numpy as np
+import pandas as pd
+
+# the quantiles of a fan chart, from the 5th to the 95th percentile
+BAND_QUANTILES = (0.05, 0.25, 0.5, 0.75, 0.95)
+
+# a quantile is off by at most this share of its value
+RELATIVE_ACCURACY = 0.01
+# values closer to zero than a cent count as zero, values beyond the largest one as the largest one
+MIN_VALUE = 0.01
+MAX_VALUE = 1e13
+
+
+class QuantileSketch:
+    """
+    Approximate quantiles of the values added to each row, e.g. of a field on every month of a run.
+
+    The values are counted in logarithmic bins, so a quantile is off by at most `relative_accuracy` of its value,
+    negative values in mirrored bins. The memory depends on the rows and the accuracy only, not on the number
+    of values, and sketches with the same bins merge by adding their counts, e.g. the sketches of the workers.
+    A pickled sketch only holds the bins in use.
+    """
+
+    def __init__(
+        self,
+        rows: int,
+        relative_accuracy: float = RELATIVE_ACCURACY,
+        min_value: float = MIN_VALUE,
+        max_value: float = MAX_VALUE,
+    ):
+        if not 0 < relative_accuracy < 1:
+            raise ValueError(f"not a relative accuracy: {relative_accuracy}")
+        if not 0 < min_value < max_value:
+            raise ValueError("the values need a positive range")
+
+        self.relative_accuracy = relative_accuracy
+        self.min_value = min_value
+        self.max_value = max_value
+        self._log_gamma = np.log((1 + relative_accuracy) / (1 - relative_accuracy))
+        # the bins of each sign, the first one starts at `min_value`
+        self._bins = int(np.ceil(np.log(max_value / min_value) / self._log_gamma))
+        self.counts = np.zeros((rows, 2 * self._bins + 1), dtype=np.uint32)
+
+    @property
+    def rows(self) -> int:
+        return self.counts.shape[0]
+
+    @property
+    def count(self) -> np.ndarray:
+        """The number of values added to every row."""
+        return self.counts.sum(axis=1, dtype=np.int64)
+
+    def add(
+        self, row: int, values: np.ndarray, mask: Optional[np.ndarray] = None
+    ) -> None:
+        """Adds the values to the row, only where `mask` is set when given, NaN is skipped."""
+        values = np.asarray(values, dtype=np.float64)
+        keep = values == values  # not NaN
+        if mask is not None:
+            keep &= mask
+        values = values[keep]
+        if len(values) == 0:
+            return
+
+        # clipped to the range first, so the log never sees a zero
+        magnitude = np.clip(np.abs(values), self.min_value, self.max_value)
+        index = (
+            np.log(magnitude * (1 / self.min_value)) * (1 / self._log_gamma)
+        ).astype(np.int64)
+        np.minimum(index, self._bins - 1, out=index)
+        bins = np.where(values > 0, self._bins + 1 + index, self._bins - 1 - index)
+        bins[np.abs(values) < self.min_value] = self._bins
+
+        # only the span of bins in use, a month of a chunk of paths hits a few of them
+        first = bins.min()
+        used = np.bincount(bins - first).astype(np.uint32)
+        end = first + len(used)
+        self.counts[row, first:end] += used
+
+    def merge(self, other: "QuantileSketch") -> None:
+        if other.counts.shape != self.counts.shape or (
+            other.relative_accuracy,
+            other.min_value,
+            other.max_value,
+        ) != (self.relative_accuracy, self.min_value, self.max_value):
+            raise ValueError("only sketches with the same rows and bins merge")
+        self.counts += other.counts
+
+    def copy(self) -> "QuantileSketch":
+        sketch = QuantileSketch.__new__(QuantileSketch)
+        sketch.__dict__ = self.__dict__ | {"counts": self.counts.copy()}
+        return sketch
+
+    def quantiles(self, quantiles: Sequence[float]) -> np.ndarray:
+        """(quantiles x rows) values, NaN for the rows nothing was added to."""
+        cumulative = self.counts.cumsum(axis=1, dtype=np.int64)
+        total = cumulative[:, -1]
+        values = self._values()
+
+        result = np.full((len(quantiles), self.rows), np.nan)
+        filled = total > 0
+        for i, q in enumerate(quantiles):
+            if not 0 <= q <= 1:
+                raise ValueError(f"not a quantile: {q}")
+            # the bin of the value with the rank q * (n - 1), counted from 0
+            rank = np.floor(q * (total[filled] - 1))
+            position = (cumulative[filled] <= rank[:, None]).sum(axis=1)
+            result[i, filled] = values[position]
+        return result
+
+    def _values(self) -> np.ndarray:
+        """The value every bin stands for, the one with the same relative error to both of its ends."""
+        gamma = np.exp(self._log_gamma)
+        positive = (
+            self.min_value * gamma ** np.arange(self._bins) * 2 * gamma / (gamma + 1)
+        )
+        return np.concatenate([-positive[::-1], [0.0], positive])
+
+    def __getstate__(self) -> dict[str, Any]:
+        rows, bins = np.nonzero(self.counts)
+        state = self.__dict__.copy()
+        state["counts"] = (self.counts.shape, rows, bins, self.counts[rows, bins])
+        return state
+
+    def __setstate__(self, state: dict[str, Any]) -> None:
+        shape, rows, bins, counts = state["counts"]
+        self.__dict__ = state | {"counts": np.zeros(shape, dtype=np.uint32)}
+        self.counts[rows, bins] = counts
+
+
+def quantile_bands(
+    sketch: QuantileSketch,
+    dates: Sequence[date],
+    quantiles: Sequence[float] = BAND_QUANTILES,
+) -> pd.DataFrame:
+    """The quantiles of every month as the p5 ... p95 columns of a fan chart, indexed by date."""
+    values = sketch.quantiles(quantiles)
+    return pd.DataFrame(
+        {f"p{round(q * 100):g}": row for q, row in zip(quantiles, values)},
+        index=pd.Index(dates, name="date"),
+    )
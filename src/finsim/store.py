@@ -0,0 +1,204 @@
+import io
+import json
+import os
+import sqlite3
+import time
+import zipfile
+from contextlib import contextmanager
+from hashlib import sha256
+from logging import getLogger
+from pathlib import Path
+from typing import Any, Iterator, Optional, Union
+
+import numpy as np
+
+from finsim.frame import SimulationFrame
+
+logger = getLogger(__name__)
+
+# where the results are kept across restarts, the store is off when it isn't set
+RESULT_STORE_ENV = "FINSIM_RESULT_STORE"
+# how big the store may grow, in bytes of the saved results
+RESULT_STORE_BYTES_ENV = "FINSIM_RESULT_STORE_BYTES"
+RESULT_STORE_BYTES = 512 * 1024 * 1024
+# how long the results of another engine version are kept after their last use, replicas of a rolling
+# deploy share the store while they run different versions
+STALE_VERSION_SECONDS = 7 * 24 * 60 * 60
+
+# the modules whose code decides the results, relative to `src`, a change to any of them invalidates the stored results
+_ENGINE_MODULES = (
+    "finsim/simulations.py",
+    "finsim/context.py",
+    "finsim/fast.py",
+    "finsim/cents.py",
+    "finsim/batch.py",
+    "finsim/properties.py",
+    "finsim/mortgage.py",
+    "finsim/rates.py",
+    "finsim/inflation.py",
+    "finsim/frame.py",
+    # the scenario of the app and its key
+    "view/results.py",
+)
+_engine_version: Optional[str] = None
+
+
+def engine_version() -> str:
+    """A stamp of the engine code, results stored by another version are never read."""
+    global _engine_version
+    if _engine_version is None:
+        src = Path(__file__).parent.parent
+        digest = sha256()
+        for name in _ENGINE_MODULES:
+            digest.update((src / name).read_bytes())
+        _engine_version = digest.hexdigest()[:16]
+    return _engine_version
+
+
+class ResultStore:
+    """
+    Simulation frames saved in a SQLite file, shared by every process and replica that opens it.
+
+    Every frame is saved as compressed columns with `np.savez_compressed`, next to its key,
+    the engine version and a small JSON `meta`. Only the results of the same engine version are read.
+    Once the saved results go over `max_bytes`, the least recently read ones are deleted, and the results
+    of other versions unused for `stale_after` seconds are deleted on every save.
+    """
+
+    def __init__(
+        self,
+        path: Union[str, Path],
+        max_bytes: int = RESULT_STORE_BYTES,
+        version: Optional[str] = None,
+        stale_after: float = STALE_VERSION_SECONDS,
+    ):
+        self.path = Path(path)
+        self.max_bytes = max_bytes
+        self.stale_after = stale_after
+        self.version = version or engine_version()
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        with self._connect() as db:
+            db.execute("PRAGMA journal_mode=WAL")
+            db.execute("""
+                CREATE TABLE IF NOT EXISTS results (
+                    key TEXT NOT NULL,
+                    version TEXT NOT NULL,
+                    meta TEXT NOT NULL,
+                    data BLOB NOT NULL,
+                    nbytes INTEGER NOT NULL,
+                    used_at REAL NOT NULL,
+                    PRIMARY KEY (key, version)
+                )
+                """)
+            db.execute(
+                "CREATE INDEX IF NOT EXISTS results_used_at ON results (used_at)"
+            )
+
+    @classmethod
+    def from_env(cls) -> Optional["ResultStore"]:
+        """The store configured with `FINSIM_RESULT_STORE`, if any."""
+        path = os.environ.get(RESULT_STORE_ENV)
+        if not path:
+            return None
+
+        max_bytes = int(os.environ.get(RESULT_STORE_BYTES_ENV, RESULT_STORE_BYTES))
+        try:
+            return cls(path, max_bytes=max_bytes)
+        except (OSError, sqlite3.Error) as e:
+            logger.warning(f"Failed to open the result store {path}: {e}")
+            return None
+
+    @contextmanager
+    def _connect(self) -> Iterator[sqlite3.Connection]:
+        db = sqlite3.connect(self.path, timeout=30, isolation_level=None)
+        try:
+            yield db
+        finally:
+            db.close()
+
+    def get(self, key: str) -> Optional[tuple[SimulationFrame, Any]]:
+        """The frame and meta saved under `key`, None when there isn't one."""
+        try:
+            with self._connect() as db:
+                row = db.execute(
+                    "SELECT meta, data FROM results WHERE key = ? AND version = ?",
+                    (key, self.version),
+                ).fetchone()
+                if row is None:
+                    return None
+                db.execute(
+                    "UPDATE results SET used_at = ? WHERE key = ? AND version = ?",
+                    (time.time(), key, self.version),
+                )
+        except sqlite3.Error as e:
+            logger.warning(f"Failed to read the result {key[:12]}: {e}")
+            return None
+
+        meta, data = row
+        try:
+            with np.load(io.BytesIO(data), allow_pickle=False) as arrays:
+                frame = SimulationFrame.from_arrays(arrays)
+            return frame, json.loads(meta)
+        except (OSError, EOFError, ValueError, KeyError, zipfile.BadZipFile) as e:
+            # a truncated or corrupt result is a miss, computed and saved again
+            logger.warning(f"Failed to load the result {key[:12]}: {e}")
+            self._delete(key)
+            return None
+
+    def _delete(self, key: str) -> None:
+        try:
+            with self._connect() as db:
+                db.execute(
+                    "DELETE FROM results WHERE key = ? AND version = ?",
+                    (key, self.version),
+                )
+        except sqlite3.Error as e:
+            logger.warning(f"Failed to delete the result {key[:12]}: {e}")
+
+    def put(self, key: str, frame: SimulationFrame, meta: Any = None) -> None:
+        """Saves the frame under `key`, then evicts the least recently read results over the bound."""
+        buffer = io.BytesIO()
+        np.savez_compressed(buffer, **frame.to_arrays())
+        data = buffer.getvalue()
+        if len(data) > self.max_bytes:
+            return
+
+        try:
+            with self._connect() as db:
+                db.execute(
+                    "INSERT OR REPLACE INTO results VALUES (?, ?, ?, ?, ?, ?)",
+                    (key, self.version, json.dumps(meta), data, len(data), time.time()),
+                )
+                self._evict(db)
+        except sqlite3.Error as e:
+            logger.warning(f"Failed to save the result {key[:12]}: {e}")
+
+    def _evict(self, db: sqlite3.Connection) -> None:
+        db.execute("BEGIN IMMEDIATE")
+        # another version may still be running elsewhere, its results go once nobody uses them
+        db.execute(
+            "DELETE FROM results WHERE version != ? AND used_at < ?",
+            (self.version, time.time() - self.stale_after),
+        )
+        (total,) = db.execute("SELECT COALESCE(SUM(nbytes), 0) FROM results").fetchone()
+        for key, version, nbytes in db.execute(
+            "SELECT key, version, nbytes FROM results ORDER BY used_at"
+        ).fetchall():
+            if total <= self.max_bytes:
+                break
+            db.execute(
+                "DELETE FROM results WHERE key = ? AND version = ?", (key, version)
+            )
+            total -= nbytes
+        db.execute("COMMIT")
+
+    @property
+    def nbytes(self) -> int:
+        with self._connect() as db:
+            return db.execute(
+                "SELECT COALESCE(SUM(nbytes), 0) FROM results"
+            ).fetchone()[0]
+
+    def __len__(self) -> int:
+        with self._connect() as db:
+            return db.execute("SELECT COUNT(*) FROM results").fetchone()[0]
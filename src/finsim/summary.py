@@ -0,0 +1,140 @@
+from dataclasses import dataclass, field
+from typing import Any, Iterable, Literal, Optional, Sequence
+
+import numpy as np
+
+from finsim.context import decimal_context
+
+Reduction = Literal["min", "max", "sum", "mean", "last"]
+
+
+@dataclass(frozen=True)
+class Statistic:
+    """
+    A reduction of a field over the months of a run, e.g. the lowest liquid wealth.
+
+    `last` is the value of the last month the run was solvent, e.g. the final net worth.
+    """
+
+    field: str
+    how: Reduction
+
+    @property
+    def name(self) -> str:
+        return f"{self.how}_{self.field}"
+
+
+# what scoring a scenario usually needs besides the last month
+DEFAULT_STATISTICS = (
+    Statistic("liquid_wealth", "min"),
+    Statistic("wealth_inc_properties", "max"),
+)
+
+
+def check_statistics(
+    statistics: Sequence[Statistic], fields: Optional[Sequence[str]] = None
+) -> None:
+    for stat in statistics:
+        if stat.how not in ("min", "max", "sum", "mean", "last"):
+            raise ValueError(f"unknown reduction: {stat.how}")
+        if fields is not None and stat.field not in fields:
+            raise ValueError(f"unknown field to summarize: {stat.field}")
+
+
+@dataclass
+class SimulationSummary:
+    """
+    The outcome of a run without its months: the last month, how long the money lasted and the statistics.
+
+    `months_survived` is the number of months simulated before the wealth went negative,
+    it equals `months` when the money never ran out.
+    `sustainable` is set by the fire search, whose run lasts with a few months of slack.
+    """
+
+    final: Any
+    months: int
+    months_survived: int
+    statistics: dict[str, Any] = field(default_factory=dict)
+    sustainable: Optional[bool] = None
+
+    @property
+    def depleted(self) -> bool:
+        if self.sustainable is not None:
+            return not self.sustainable
+        return self.months_survived < self.months
+
+
+@decimal_context
+def summarize(
+    simulations: Iterable[Any],
+    months: int,
+    statistics: Sequence[Statistic] = DEFAULT_STATISTICS,
+) -> SimulationSummary:
+    """Reduces the months of a run as they come, only the last one is held on to."""
+    check_statistics(statistics)
+
+    values: list[Any] = [None] * len(statistics)
+    final = None
+    count = 0
+    for sim in simulations:
+        for i, stat in enumerate(statistics):
+            value = getattr(sim, stat.field)
+            current = values[i]
+            if current is None or stat.how == "last":
+                values[i] = value
+            elif stat.how == "min":
+                values[i] = min(current, value)
+            elif stat.how == "max":
+                values[i] = max(current, value)
+            else:
+                values[i] = current + value
+        final = sim
+        count += 1
+
+    if final is None:
+        raise ValueError("a run has at least its initial month")
+
+    reduced = {
+        stat.name: value / count if stat.how == "mean" else value
+        for stat, value in zip(statistics, values)
+    }
+    return SimulationSummary(final, months, count - 1, reduced)
+
+
+class BatchStatistics:
+    """The statistics of every path of a batch run, updated with the paths still running every month."""
+
+    def __init__(self, statistics: Sequence[Statistic], paths: int):
+        self.statistics = tuple(statistics)
+        self.count = np.zeros(paths, dtype=np.int64)
+        self.values = {
+            stat.name: np.full(paths, _START[stat.how]) for stat in self.statistics
+        }
+
+    def add(self, values: dict[str, np.ndarray], mask: np.ndarray) -> None:
+        """`values` holds the month of every field, `mask` the paths it counts for."""
+        self.count += mask
+        for stat in self.statistics:
+            current = self.values[stat.name]
+            value = values[stat.field]
+            if stat.how == "min":
+                np.minimum(current, value, out=current, where=mask)
+            elif stat.how == "max":
+                np.maximum(current, value, out=current, where=mask)
+            elif stat.how == "last":
+                np.copyto(current, value, where=mask)
+            else:
+                np.add(current, value, out=current, where=mask)
+
+    def result(self) -> dict[str, np.ndarray]:
+        return {
+            stat.name: (
+                self.values[stat.name] / self.count
+                if stat.how == "mean"
+                else self.values[stat.name]
+            )
+            for stat in self.statistics
+        }
+
+
+_START = {"min": np.inf, "max": -np.inf, "sum": 0.0, "mean": 0.0, "last": np.nan}
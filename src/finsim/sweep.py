@@ -0,0 +1,131 @@
+from dataclasses import dataclass, fields, replace
+from itertools import product
+from typing import Any, Mapping, Optional, Sequence
+
+import numpy as np
+import pandas as pd
+
+from finsim.batch import PATH_PARAMETERS, RateMatrix, run_batch_simulation
+from finsim.instrumentation import count, timed
+from finsim.simulations import FireSimulation
+from finsim.summary import Statistic
+
+# the final net worth, the wealth including properties of the last month a grid point was solvent
+DEFAULT_SWEEP_STATISTICS = (Statistic("wealth_inc_properties", "last"),)
+
+# fields the engine works out from others instead of reading them, and what to sweep instead
+_DERIVED_FIELDS = {"monthly_inflation_rate": "annual_inflation_rate"}
+
+
+@dataclass
+class SweepResult:
+    """
+    The outcome of every point of a parameter grid, as arrays with one dimension per axis.
+
+    `axes` holds the swept values in the order of the dimensions, `values` holds `months_survived`,
+    `depleted`, the final `liquid_wealth` and the statistics of every point, by name.
+    """
+
+    axes: dict[str, list[Any]]
+    values: dict[str, np.ndarray]
+
+    @property
+    def shape(self) -> tuple[int, ...]:
+        return tuple(len(values) for values in self.axes.values())
+
+    def __getitem__(self, name: str) -> np.ndarray:
+        return self.values[name]
+
+    def to_pandas(self, name: str) -> pd.Series:
+        """
+        One output as a series indexed by the swept values, `.unstack()` turns two axes into a heatmap table.
+        """
+        index = pd.MultiIndex.from_product(
+            [[_label(v) for v in values] for values in self.axes.values()],
+            names=list(self.axes),
+        )
+        return pd.Series(self.values[name].reshape(-1), index=index, name=name)
+
+
+def _label(value: Any) -> Any:
+    # lists of properties can't be index labels
+    return tuple(value) if isinstance(value, list) else value
+
+
+@timed("sweep")
+def run_sweep(
+    init: FireSimulation,
+    months: int,
+    axes: Mapping[str, Sequence[Any]],
+    inflation_rates: Optional[RateMatrix] = None,
+    stock_returns: Optional[RateMatrix] = None,
+    statistics: Sequence[Statistic] = DEFAULT_SWEEP_STATISTICS,
+) -> SweepResult:
+    """
+    Runs `init` for every point of the Cartesian grid of `axes`, `FireSimulation` field names and their values.
+    Fields the engine computes itself, like `monthly_inflation_rate`, can't be swept.
+
+    The points are the paths of a float `run_batch_simulation`, so the whole grid is stepped at once.
+    Axes the batch engine can't set per path, e.g. `monthly_income` or `investment_properties`,
+    split the grid into one batch per combination of their values.
+
+    `inflation_rates` and `stock_returns` are shared by every point, a (months,) row or a `RatePath`,
+    they replace the annual rates of `init` so those can't be swept along with them.
+    """
+    names = list(axes)
+    known = {f.name for f in fields(FireSimulation) if f.init}
+    unknown = set(names) - known
+    if unknown:
+        raise ValueError(f"unknown fields to sweep: {sorted(unknown)}")
+    for name in names:
+        if name in _DERIVED_FIELDS:
+            raise ValueError(
+                f"{name} is computed by the engine, sweep {_DERIVED_FIELDS[name]} instead"
+            )
+    for name in names:
+        if len(axes[name]) == 0:
+            raise ValueError(f"nothing to sweep for {name}")
+    if inflation_rates is not None and "annual_inflation_rate" in axes:
+        raise ValueError("annual_inflation_rate is replaced by inflation_rates")
+    if stock_returns is not None and "stock_return_rate" in axes:
+        raise ValueError("stock_return_rate is replaced by stock_returns")
+
+    shape = tuple(len(axes[name]) for name in names)
+    # the axis positions of every point, in C order so the results reshape into the grid
+    points = np.indices(shape).reshape(len(shape), -1).T
+    per_path = [i for i, name in enumerate(names) if name in PATH_PARAMETERS]
+    grouped = [i for i, name in enumerate(names) if name not in PATH_PARAMETERS]
+
+    outputs = ["months_survived", "liquid_wealth"] + [s.name for s in statistics]
+    flat = {name: np.empty(len(points)) for name in outputs}
+
+    for group in product(*(range(shape[i]) for i in grouped)):
+        selected = np.flatnonzero(
+            np.all(points[:, grouped] == np.array(group, dtype=np.int64), axis=1)
+        )
+        group_init = replace(
+            init, **{names[i]: axes[names[i]][j] for i, j in zip(grouped, group)}
+        )
+        batch = run_batch_simulation(
+            group_init,
+            months,
+            inflation_rates,
+            stock_returns,
+            paths=len(selected),
+            record=(),
+            summary=statistics,
+            parameters={
+                names[i]: [axes[names[i]][j] for j in points[selected, i]]
+                for i in per_path
+            },
+        )
+        count("sweep.batches")
+        flat["months_survived"][selected] = batch.months_survived
+        flat["liquid_wealth"][selected] = batch.liquid_wealth
+        for stat in statistics:
+            flat[stat.name][selected] = batch.summary[stat.name]
+
+    values = {name: column.reshape(shape) for name, column in flat.items()}
+    values["months_survived"] = values["months_survived"].astype(np.int64)
+    values["depleted"] = values["months_survived"] < months
+    return SweepResult({name: list(axes[name]) for name in names}, values)
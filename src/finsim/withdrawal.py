@@ -0,0 +1,154 @@
+from dataclasses import dataclass
+from decimal import Decimal
+from logging import getLogger
+from typing import Optional
+
+import numpy as np
+
+from finsim.batch import (
+    RateMatrix,
+    _paths_from_rates,
+    as_rate_matrix,
+    run_batch_simulation,
+)
+from finsim.context import decimal_context
+from finsim.instrumentation import count, timed
+from finsim.simulations import FireSimulation
+
+logger = getLogger(__name__)
+
+# about how many paths a batch month takes before its cost grows with the paths,
+# below that a batch costs about the same however many spending levels it tries
+BATCH_PATHS = 1024
+# how many times the first guess of expenses that run out is doubled before giving up
+MAX_DOUBLINGS = 16
+
+
+@dataclass
+class WithdrawalSolution:
+    """
+    The most `monthly_expenses` that lasts, to the cent, and how often it does across the rate paths.
+
+    `batches` is the number of batch runs the search took, `evaluations` the spending levels it tried.
+    """
+
+    monthly_expenses: Decimal
+    success_rate: float
+    batches: int
+    evaluations: int
+
+
+@timed("withdrawal.solve")
+@decimal_context
+def max_monthly_expenses(
+    init: FireSimulation,
+    months: int,
+    inflation_rates: Optional[RateMatrix] = None,
+    stock_returns: Optional[RateMatrix] = None,
+    success_probability: float = 1.0,
+    candidates: Optional[int] = None,
+) -> WithdrawalSolution:
+    """
+    The highest starting `monthly_expenses` of `init` that lasts `months` in at least `success_probability`
+    of the rate paths, a run lasts when its money never runs out.
+
+    The rates are the same as for `run_batch_simulation`, without them the fixed rates of `init` make
+    a single path. Every batch tries `candidates` spending levels over all the paths, spread evenly
+    between the highest level known to last and the lowest known not to, so each batch narrows the search
+    `candidates + 1` times and it takes at most about log(range in cents) / log(candidates + 1) batches.
+    By default a batch tries as many levels as fit in `BATCH_PATHS` paths.
+    """
+    if months < 1:
+        raise ValueError("the expenses have to last at least one month")
+    if not 0 < success_probability <= 1:
+        raise ValueError(f"not a probability: {success_probability}")
+
+    paths = _paths_from_rates(inflation_rates, stock_returns)
+    inflation = _path_major(inflation_rates, paths, months)
+    stocks = _path_major(stock_returns, paths, months)
+    if candidates is None:
+        candidates = max(1, BATCH_PATHS // paths)
+    if candidates < 1:
+        raise ValueError("a batch has to try at least one spending level")
+
+    batches = 0
+    evaluations = 0
+
+    def success_rates(levels: np.ndarray) -> np.ndarray:
+        """The share of paths that last, for every level of expenses in cents."""
+        nonlocal batches, evaluations
+        batch = run_batch_simulation(
+            init,
+            months,
+            None if inflation is None else np.tile(inflation, (len(levels), 1)),
+            None if stocks is None else np.tile(stocks, (len(levels), 1)),
+            paths=len(levels) * paths,
+            record=(),
+            parameters={
+                "monthly_expenses": [
+                    Decimal(int(c)) / 100 for c in np.repeat(levels, paths)
+                ]
+            },
+        )
+        batches += 1
+        evaluations += len(levels)
+        count("withdrawal.batches")
+        lasted = batch.months_survived.reshape(len(levels), paths) >= months
+        return lasted.mean(axis=1)
+
+    def lasts(rate: float) -> bool:
+        return rate >= success_probability
+
+    # twice the wealth and income runs out in the first month unless prices halve, doubled until it runs out
+    wealth = max(init.wealth_inc_properties, Decimal(0))
+    income = init.monthly_income + init.properties_monthly_income
+    high = int(2 * (wealth + max(income, Decimal(0))) * 100) + 1
+
+    rates = success_rates(np.array([0, high]))
+    for _ in range(MAX_DOUBLINGS):
+        if not lasts(rates[1]):
+            break
+        high *= 2
+        rates[1] = success_rates(np.array([high]))[0]
+    else:
+        raise ValueError(f"no spending level runs out of money in {months} months")
+    if not lasts(rates[0]):
+        raise ValueError(
+            f"the money doesn't last {months} months even without expenses"
+        )
+
+    # `low` is the most known to last, `high` the least known not to
+    low, low_rate = 0, rates[0]
+    while high - low > 1:
+        inner = high - low - 1
+        if inner <= candidates:
+            levels = np.arange(low + 1, high, dtype=np.int64)
+        else:
+            steps = np.arange(1, candidates + 1, dtype=np.int64)
+            levels = np.unique(low + steps * (high - low) // (candidates + 1))
+        rates = success_rates(levels)
+
+        failed = [i for i, rate in enumerate(rates) if not lasts(rate)]
+        # more spending never lasts longer, the first level that doesn't last bounds the search
+        first = failed[0] if len(failed) else len(levels)
+        if first > 0:
+            low, low_rate = int(levels[first - 1]), rates[first - 1]
+        if first < len(levels):
+            high = int(levels[first])
+
+    logger.debug(
+        "found %s in %s batches of %s levels", low, batches, evaluations // batches
+    )
+    return WithdrawalSolution(
+        monthly_expenses=Decimal(low) / 100,
+        success_rate=float(low_rate),
+        batches=batches,
+        evaluations=evaluations,
+    )
+
+
+def _path_major(
+    rates: Optional[RateMatrix], paths: int, months: int
+) -> Optional[np.ndarray]:
+    matrix = as_rate_matrix(rates, paths, months)
+    return None if matrix is None else matrix.T
@@ -2,11 +2,17 @@ import os
 from babel.support import Translations
 from enum import Enum
 from dataclasses import dataclass
+from threading import Lock
+from typing import Any, Callable, Iterable, Optional
 import streamlit as st
 from logging import getLogger
 
 logger = getLogger(__name__)
 
+# translation catalogs and docs loaded by this process, they don't change while the app runs
+_loaded: dict[tuple[str, str], Any] = {}
+_loaded_lock = Lock()
+
 
 class Lang(Enum):
     pl: str = "pl"
@@ -41,9 +47,49 @@ def set_locale(headers: dict, default_locale: Locale = en):
     return locale
 
 
+def _load_once(kind: str, key: str, load: Callable[[], Any]) -> Any:
+    try:
+        return _loaded[(kind, key)]
+    except KeyError:
+        pass
+
+    with _loaded_lock:
+        if (kind, key) not in _loaded:
+            logger.debug(f"loading {kind} {key}")
+            _loaded[(kind, key)] = load()
+        return _loaded[(kind, key)]
+
+
 def load_translations(locale):
+    """The catalog of the locale code, read from disk once per process."""
     translations_directory = os.path.join(os.getcwd(), "locale")
-    return Translations.load(translations_directory, [locale])
+    return _load_once(
+        "translations",
+        locale,
+        lambda: Translations.load(translations_directory, [locale]),
+    )
+
+
+def load_intro(locale: Locale) -> str:
+    """The intro markdown of the fire page in the language of the locale."""
+    path = os.path.join(os.getcwd(), "docs", f"firesim_intro_{locale.lang}.md")
+
+    def read() -> str:
+        with open(path, "r") as f:
+            return f.read()
+
+    return _load_once("intro", path, read)
+
+
+def prewarm_locales(locales: Optional[Iterable[Locale]] = None) -> None:
+    """Loads the catalogs of all the locales up front, so the first rerun of a language doesn't pay for it."""
+    for locale in VALID_LOCALES if locales is None else locales:
+        load_translations(locale.code)
+
+
+def clear_loaded_locales() -> None:
+    with _loaded_lock:
+        _loaded.clear()
 
 
 def _(text):
@@ -0,0 +1,277 @@
+import json
+from collections import OrderedDict
+from dataclasses import asdict, dataclass
+from datetime import date
+from decimal import Decimal
+from hashlib import sha256
+from logging import getLogger
+from pathlib import Path
+from threading import Lock
+from typing import Any, Callable, Optional
+
+from finsim.frame import SimulationFrame
+from finsim.properties import InvestmentProperty
+from finsim.store import ResultStore
+from finsim.simulations import (
+    Engine,
+    FireSimulation,
+    run_fire_simulation_frame,
+    run_simulation_frame,
+)
+from view.helpers import first_day_of_the_month
+from view.sidebar import get_fire_sidebar_defaults, get_simple_sidebar_defaults
+from view.sidebar_conf import BaseSidebarAttrs, FireSidebarAttrs, SimpleSimSidebarAttrs
+
+logger = getLogger(__name__)
+
+# how much memory the results shared by all the sessions may take
+RESULT_CACHE_BYTES = 256 * 1024 * 1024
+
+# the engine the apps run, exact to the cent like the Decimal engine
+APP_ENGINE: Engine = "cents"
+
+# sidebar attributes that don't change the results, e.g. derived from the current time
+_IGNORED_ATTRS = {"date_of_death"}
+
+
+def result_nbytes(value: Any) -> int:
+    """The memory taken by the arrays of a result, a frame or a tuple holding frames."""
+    if isinstance(value, SimulationFrame):
+        return value.nbytes
+    if isinstance(value, tuple):
+        return sum(result_nbytes(v) for v in value)
+    return 0
+
+
+@dataclass
+class CacheStats:
+    hits: int = 0
+    misses: int = 0
+    evictions: int = 0
+    entries: int = 0
+    nbytes: int = 0
+
+
+class ResultCache:
+    """
+    Bounded LRU cache of simulation results, shared by every session of the process.
+
+    The size of a result is measured with `sizeof`, the least recently used results are evicted
+    once the total goes over `max_bytes`. A result bigger than the whole cache isn't kept.
+    """
+
+    def __init__(
+        self,
+        max_bytes: int = RESULT_CACHE_BYTES,
+        sizeof: Callable[[Any], int] = result_nbytes,
+    ):
+        self.max_bytes = max_bytes
+        self.sizeof = sizeof
+        self.stats = CacheStats()
+        self._entries: OrderedDict[str, tuple[Any, int]] = OrderedDict()
+        self._lock = Lock()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def __contains__(self, key: str) -> bool:
+        return key in self._entries
+
+    def get_or_compute(self, key: str, compute: Callable[[], Any]) -> Any:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                self._entries.move_to_end(key)
+                self.stats.hits += 1
+                return entry[0]
+            self.stats.misses += 1
+
+        value = compute()
+        self.put(key, value)
+        return value
+
+    def put(self, key: str, value: Any) -> None:
+        nbytes = self.sizeof(value)
+        if nbytes > self.max_bytes:
+            logger.info(f"Not caching the result {key[:12]}, {nbytes} bytes")
+            return
+
+        with self._lock:
+            if key in self._entries:
+                self.stats.nbytes -= self._entries.pop(key)[1]
+            self._entries[key] = (value, nbytes)
+            self.stats.nbytes += nbytes
+
+            while self.stats.nbytes > self.max_bytes:
+                _, (_, evicted) = self._entries.popitem(last=False)
+                self.stats.nbytes -= evicted
+                self.stats.evictions += 1
+            self.stats.entries = len(self._entries)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+            self.stats = CacheStats()
+
+
+results = ResultCache()
+# results kept across restarts and replicas, when FINSIM_RESULT_STORE is set
+store = ResultStore.from_env()
+_prewarmed = False
+
+
+class _KeyEncoder(json.JSONEncoder):
+    def default(self, obj):
+        if isinstance(obj, Decimal):
+            return str(obj)
+
+        if isinstance(obj, date):
+            return obj.isoformat()
+
+        return super().default(obj)
+
+
+def scenario_key(
+    attrs: BaseSidebarAttrs, start: date, root_path: Path, engine: Engine = APP_ENGINE
+) -> str:
+    """
+    Canonical hash of a scenario, the same inputs give the same key in every session and process.
+
+    The simulated rates are identified by their content, so a changed data file gives a new key.
+    """
+    inflation = attrs.inflation_rates(root_path=root_path)
+    stocks = attrs.stock_returns(root_path=root_path)
+    scenario = {
+        "kind": type(attrs).__name__,
+        "attrs": {
+            k: _canonical(v)
+            for k, v in asdict(attrs).items()
+            if k not in _IGNORED_ATTRS
+        },
+        "start": [start.year, start.month],
+        "inflation_rates": inflation.digest if inflation is not None else None,
+        "stock_returns": stocks.digest if stocks is not None else None,
+        "engine": engine,
+    }
+    canonical = json.dumps(scenario, cls=_KeyEncoder, sort_keys=True)
+    return sha256(canonical.encode("utf-8")).hexdigest()
+
+
+def _canonical(value: Any) -> Any:
+    # the widgets give floats, the query params give back ints for round values
+    if isinstance(value, (int, float)) and not isinstance(value, bool):
+        return float(value)
+    if isinstance(value, list):
+        return [_canonical(v) for v in value]
+    if isinstance(value, dict):
+        return {k: _canonical(v) for k, v in value.items()}
+    return value
+
+
+def simulation_init(attrs: BaseSidebarAttrs, start: date) -> FireSimulation:
+    def to_d(v: float) -> Decimal:
+        return Decimal(str(v))
+
+    return FireSimulation(
+        stock_investments=to_d(attrs.stock_investment),
+        bonds_investments=to_d(attrs.bond_investment),
+        cash=to_d(attrs.cash),
+        monthly_income=to_d(attrs.monthly_income),
+        monthly_expenses=to_d(attrs.monthly_expenses),
+        investment_properties=[
+            InvestmentProperty(
+                market_value=to_d(i.market_value),
+                mortgage_left=to_d(i.mortgage_left),
+                mortgage_months=i.mortgage_months,
+                monthly_income=to_d(i.monthly_income),
+                mortgage_rate=to_d(i.mortgage_rate),
+            )
+            for i in attrs.investment_properties
+        ],
+        stock_return_rate=to_d(attrs.stock_return_rate),
+        bonds_return_rate=to_d(attrs.bonds_return_rate),
+        annual_inflation_rate=to_d(attrs.annual_inflation_rate),
+        annual_income_increase_rate=to_d(attrs.annual_income_increase_rate),
+        annual_property_appreciation_rate=to_d(attrs.annual_property_appreciation_rate),
+        invest_cash_surplus=attrs.invest_cash_surplus,
+        invest_cash_threshold=to_d(attrs.invest_cash_threshold),
+        invest_cash_surplus_strategy=attrs.invest_cash_surplus_strategy,  # type: ignore
+        date=start,
+    )
+
+
+def simple_simulation(
+    attrs: SimpleSimSidebarAttrs, root_path: Path, start: Optional[date] = None
+) -> SimulationFrame:
+    """The savings simulation of the sidebar, computed once for all the sessions."""
+    start = start or first_day_of_the_month()
+
+    key = scenario_key(attrs, start, root_path)
+
+    def compute() -> tuple[SimulationFrame, Any]:
+        frame = run_simulation_frame(
+            simulation_init(attrs, start),
+            attrs.years * 12,
+            inflation_rates=attrs.inflation_rates(root_path=root_path),
+            stock_returns=attrs.stock_returns(root_path=root_path),
+            engine=APP_ENGINE,
+        )
+        return frame, None
+
+    return results.get_or_compute(
+        key, lambda: _load_or_compute(key, compute)[0].freeze()
+    )
+
+
+def fire_simulation(
+    attrs: FireSidebarAttrs, root_path: Path, start: Optional[date] = None
+) -> tuple[SimulationFrame, int]:
+    """The FIRE simulation of the sidebar and the number of candidates it took, computed once for all the sessions."""
+    start = start or first_day_of_the_month()
+
+    key = scenario_key(attrs, start, root_path)
+
+    def compute() -> tuple[SimulationFrame, int]:
+        return run_fire_simulation_frame(
+            simulation_init(attrs, start),
+            expected_number_of_months=attrs.expected_number_of_months,
+            inflation_rates=attrs.inflation_rates(root_path=root_path),
+            stock_returns=attrs.stock_returns(root_path=root_path),
+            engine=APP_ENGINE,
+        )
+
+    def load() -> tuple[SimulationFrame, int]:
+        frame, months = _load_or_compute(key, compute)
+        return frame.freeze(), months
+
+    return results.get_or_compute(key, load)
+
+
+def _load_or_compute(
+    key: str, compute: Callable[[], tuple[SimulationFrame, Any]]
+) -> tuple[SimulationFrame, Any]:
+    """Reads the result from the persistent store, or computes and saves it there."""
+    if store is not None:
+        found = store.get(key)
+        if found is not None:
+            return found
+
+    frame, meta = compute()
+    if store is not None:
+        store.put(key, frame, meta)
+    return frame, meta
+
+
+def prewarm_default_results(root_path: Path) -> None:
+    """Computes the results of the default sidebars once per process, the scenario most sessions start with."""
+    global _prewarmed
+    if _prewarmed:
+        return
+    _prewarmed = True
+
+    simple_simulation(get_simple_sidebar_defaults(), root_path)  # type: ignore
+
+    fire = get_fire_sidebar_defaults()
+    # the sidebar works the months out from the ages
+    fire.expected_number_of_months = (fire.expected_age - fire.current_age) * 12
+    fire_simulation(fire, root_path)
@@ -1,11 +1,11 @@
 from dataclasses import dataclass
 import datetime
-from decimal import Decimal
 from pathlib import Path
-from typing import Generator
+from typing import Optional
 
-from finsim.inflation import inflation_from_file_gen
+from finsim.inflation import load_rate_path
 from finsim.properties import InvestmentProperty
+from finsim.rates import RatePath
 
 
 @dataclass
@@ -29,25 +29,25 @@ class BaseSidebarAttrs:
     inflation_type_calc: str
     stock_type_calc: str
 
-    def inflation_gen(self, root_path: Path) -> Generator[Decimal, None, None]:
-        gen = None
+    def inflation_rates(self, root_path: Path) -> Optional[RatePath]:
+        rates = None
         if self.inflation_type_calc == "simulated":
-            gen = inflation_from_file_gen(
+            rates = load_rate_path(
                 root_path / "data" / f"monthly_cpi_simulated_{self.currency_code}.csv",
                 monthly=True,
             )
 
-        return gen
+        return rates
 
-    def stock_gen(self, root_path: Path) -> Generator[Decimal, None, None]:
-        gen = None
+    def stock_returns(self, root_path: Path) -> Optional[RatePath]:
+        rates = None
         if self.stock_type_calc == "simulated_acwi":
-            gen = inflation_from_file_gen(
+            rates = load_rate_path(
                 root_path / "data" / "acwi_monthly_simulation.csv",
                 monthly=True,
             )
 
-        return gen
+        return rates
 
 
 @dataclass
@@ -0,0 +1,63 @@
+from dataclasses import replace
+from datetime import date
+from decimal import Decimal
+
+from finsim.properties import InvestmentProperty
+from finsim.simulations import FireSimulation
+
+
+def mortgaged_property(**fields) -> InvestmentProperty:
+    """A rented property with a mortgage, every field can be overridden."""
+    defaults = dict(
+        market_value=Decimal("200_000"),
+        monthly_income=Decimal("900"),
+        mortgage_left=Decimal("120_000"),
+        mortgage_rate=Decimal("5.5"),
+        mortgage_months=180,
+    )
+    return InvestmentProperty(**(defaults | fields))
+
+
+def make_init(**fields) -> FireSimulation:
+    """
+    A scenario with the given money, earning the usual stock and bonds returns from the start of 2024.
+
+    Anything else it doesn't set is the default of `FireSimulation`: no properties, no inflation.
+    """
+    defaults = dict(
+        stock_return_rate=Decimal("0.05"),
+        bonds_return_rate=Decimal("0.02"),
+        date=date(2024, 1, 1),
+    )
+    # every scenario gets properties of its own, like the mortgage schedules they look up when built
+    properties = [replace(p) for p in fields.pop("investment_properties", [])]
+    return FireSimulation(investment_properties=properties, **(defaults | fields))
+
+
+def saver(**fields) -> FireSimulation:
+    """Someone saving a little of their salary, with a mortgaged property and inflation."""
+    defaults = dict(
+        stock_investments=Decimal("120_000"),
+        bonds_investments=Decimal("30_000"),
+        cash=Decimal("15_000"),
+        monthly_expenses=Decimal("3_500"),
+        monthly_income=Decimal("4_000"),
+        annual_inflation_rate=Decimal("0.03"),
+        annual_property_appreciation_rate=Decimal("0.02"),
+    )
+    # built only when used, a property looks up its mortgage schedule
+    if "investment_properties" not in fields:
+        fields["investment_properties"] = [mortgaged_property()]
+    return make_init(**(defaults | fields))
+
+
+def retiree(**fields) -> FireSimulation:
+    """Someone living from their investments, without a salary or properties."""
+    defaults = dict(
+        stock_investments=Decimal("400_000"),
+        bonds_investments=Decimal("100_000"),
+        cash=Decimal("20_000"),
+        monthly_expenses=Decimal("1_800"),
+        monthly_income=Decimal("0"),
+    )
+    return make_init(**(defaults | fields))
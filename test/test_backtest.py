@@ -0,0 +1,124 @@
+from datetime import date
+from decimal import Decimal
+from functools import partial
+from pathlib import Path
+
+import numpy as np
+import pytest
+
+from finsim.backtest import RateHistory, run_backtest
+from finsim.inflation import rate_dates_from_file
+from finsim.rates import RatePath
+from finsim.simulations import month_dates, run_simulation
+
+from helpers import make_init
+
+DATA = Path(__file__).resolve().parent.parent / "data"
+
+
+_init = partial(
+    make_init,
+    stock_investments=Decimal("60_000"),
+    bonds_investments=Decimal("10_000"),
+    cash=Decimal("5_000"),
+    monthly_expenses=Decimal("2_900"),
+    monthly_income=Decimal("0"),
+)
+
+
+def _history(months: int, mean: float, std: float, seed: int) -> RateHistory:
+    rng = np.random.default_rng(seed)
+    rates = [Decimal(str(r)) for r in np.round(rng.normal(mean, std, months), 4)]
+    return RateHistory(
+        month_dates(date(2000, 1, 1), months - 1), RatePath.from_decimals(rates)
+    )
+
+
+def _rolled(history: RateHistory, start: int) -> RatePath:
+    rates = history.rates.decimals
+    start %= len(rates)
+    return RatePath.from_decimals(rates[start:] + rates[:start], cyclic=True)
+
+
+@pytest.mark.parametrize("alignment", ["wrap", "truncate"])
+def test_every_start_is_the_run_of_its_rates(alignment: str) -> None:
+    stocks = _history(48, 0.004, 0.06, seed=1)
+    inflation = _history(36, 0.003, 0.004, seed=2)
+
+    backtest = run_backtest(
+        _init(), 24, stocks, inflation, alignment=alignment, engine="cents"  # type: ignore
+    )
+
+    assert len(backtest.starts) == (48 if alignment == "wrap" else 13)
+    assert backtest.starts[:3] == [date(2000, 1, 1), date(2000, 2, 1), date(2000, 3, 1)]
+    assert 0 < backtest.success_rate < 1
+    for start, label in enumerate(backtest.starts):
+        simulations = run_simulation(
+            _init(),
+            24,
+            inflation_rates=_rolled(inflation, start),
+            stock_returns=_rolled(stocks, start),
+        )
+        assert backtest.months_survived[start] == len(simulations) - 1, label
+        assert backtest.final_wealth[start] == float(
+            simulations[-1].wealth_inc_properties
+        )
+
+
+def test_reports_the_worst_and_median_start() -> None:
+    backtest = run_backtest(_init(), 24, _history(48, 0.004, 0.06, seed=1))
+    table = backtest.to_pandas()
+
+    ranked = table.sort_values(["months_survived", "final_wealth"])
+    assert backtest.worst_start == ranked.index[0]
+    assert backtest.median_start == ranked.index[23]
+    assert table["success"].mean() == backtest.success_rate
+    assert (
+        table.loc[backtest.worst_start, "months_survived"]
+        == table["months_survived"].min()
+    )
+
+
+def test_backtest_over_the_data_files() -> None:
+    stocks = RateHistory.from_file(DATA / "acwi_monthly_simulation.csv")
+    inflation = RateHistory.from_file(DATA / "poland_monthly_cpi.csv")
+
+    wrapped = run_backtest(_init(cash=Decimal("400_000")), 480, stocks, inflation)
+    truncated = run_backtest(
+        _init(cash=Decimal("400_000")), 120, stocks, inflation, alignment="truncate"
+    )
+
+    assert stocks == RateHistory.from_file(
+        DATA / "acwi_monthly_simulation.csv", monthly=True
+    )
+    assert inflation.dates[:2] == [date(2006, 1, 1), date(2006, 2, 1)]
+    assert wrapped.starts == stocks.dates
+    assert len(truncated.starts) == len(inflation) - 120 + 1
+    with pytest.raises(ValueError):
+        run_backtest(_init(), 480, stocks, inflation, alignment="truncate")
+    with pytest.raises(ValueError):
+        run_backtest(_init(), 12)
+
+
+def test_dates_of_an_annual_file(tmp_path: Path) -> None:
+    path = tmp_path / "rates.csv"
+    path.write_text("date,value\n2020,0.024\n2021-07-01,0.08\n")
+
+    dates = rate_dates_from_file(path)
+
+    assert len(dates) == 24
+    assert dates[:2] == [date(2020, 1, 1), date(2020, 2, 1)]
+    assert dates[12:] == month_dates(date(2021, 7, 1), 11)
+
+
+def test_an_annual_file_is_read_as_annual(tmp_path: Path) -> None:
+    path = tmp_path / "rates.csv"
+    path.write_text("date,value\n2020-01-01,0.024\n2021-01-01,0.036\n")
+
+    history = RateHistory.from_file(path)
+
+    assert len(history) == 24
+    assert RateHistory.from_file(path, monthly=True).dates == [
+        date(2020, 1, 1),
+        date(2021, 1, 1),
+    ]
@@ -0,0 +1,134 @@
+from datetime import date
+from decimal import Decimal
+from functools import partial
+
+import numpy as np
+import pytest
+
+from finsim.batch import run_batch_simulation
+from finsim.properties import InvestmentProperty
+from finsim.rates import RatePath
+from finsim.simulations import FireSimulation, run_simulation
+
+from helpers import make_init, mortgaged_property, saver
+
+_init = partial(
+    make_init,
+    stock_investments=Decimal("200_000"),
+    bonds_investments=Decimal("50_000"),
+    cash=Decimal("20_000"),
+    investment_properties=[
+        mortgaged_property(
+            market_value=Decimal("400_000"),
+            mortgage_left=Decimal("150_000"),
+            mortgage_rate=Decimal("7.5"),
+            monthly_income=Decimal("2_000"),
+            annual_rent_increase_rate=Decimal("0.02"),
+        ),
+        InvestmentProperty(
+            market_value=Decimal("250_000"),
+            mortgage_left=Decimal("0"),
+            mortgage_rate=Decimal("0"),
+            mortgage_months=0,
+            monthly_income=Decimal("1_200"),
+        ),
+    ],
+    annual_inflation_rate=Decimal("0.03"),
+    annual_income_increase_rate=Decimal("0.02"),
+    annual_property_appreciation_rate=Decimal("0.02"),
+    monthly_expenses=Decimal("9_000"),
+    monthly_income=Decimal("6_000"),
+    invest_cash_surplus=True,
+    invest_cash_threshold=Decimal("30_000"),
+    invest_cash_surplus_strategy="60-40",
+    date=date(2024, 4, 1),
+)
+
+
+def _wealth(simulations: list[FireSimulation]) -> np.ndarray:
+    return np.array([float(s.wealth_inc_properties) for s in simulations])
+
+
+def test_fixed_rates_match_run_simulation() -> None:
+    init = _init()
+    expected = run_simulation(init, 600)
+
+    batch = run_batch_simulation(init, 600, paths=3)
+
+    months = len(expected) - 1
+    assert list(batch.months_survived) == [months] * 3
+    np.testing.assert_allclose(
+        batch.history["wealth_inc_properties"][:, : months + 1],
+        np.tile(_wealth(expected), (3, 1)),
+        atol=0.02,
+    )
+
+
+def test_half_cent_ties_are_rounded_like_decimal() -> None:
+    # 3_500 growing by 0.25% a month hits ties like 4_818.015, rounded down they drift off by dollars
+    init = saver()
+    expected = run_simulation(init, 400)
+    fields = ("monthly_expenses", "cash", "stock_investments", "bonds_investments")
+
+    batch = run_batch_simulation(init, 400, paths=1, record=fields)
+
+    assert batch.months_survived[0] == len(expected) - 1
+    for name in fields:
+        np.testing.assert_allclose(
+            batch.history[name][0],
+            [float(getattr(s, name)) for s in expected],
+            rtol=0,
+            atol=1e-6,
+            err_msg=name,
+        )
+
+
+def test_every_path_matches_run_simulation_with_the_same_rates() -> None:
+    init = _init(monthly_income=Decimal("0"))
+    rng = np.random.default_rng(7)
+    inflation = np.round(rng.normal(0.003, 0.004, (5, 480)), 4)
+    stocks = np.round(rng.normal(0.005, 0.045, (5, 480)), 4)
+
+    batch = run_batch_simulation(init, 480, inflation, stocks)
+
+    for path in range(5):
+        expected = run_simulation(
+            init,
+            480,
+            inflation_rates=RatePath(inflation[path]),
+            stock_returns=RatePath(stocks[path]),
+        )
+        months = len(expected) - 1
+        assert batch.months_survived[path] == months
+        np.testing.assert_allclose(
+            batch.history["wealth_inc_properties"][path, : months + 1],
+            _wealth(expected),
+            atol=0.05,
+        )
+        after = months + 1
+        assert np.isnan(batch.history["wealth_inc_properties"][path, after:]).all()
+
+
+def test_paths_stop_when_wealth_goes_negative() -> None:
+    init = _init(
+        investment_properties=[],
+        monthly_income=Decimal("0"),
+        stock_return_rate=Decimal("0"),
+        bonds_return_rate=Decimal("0"),
+        annual_inflation_rate=Decimal("0"),
+        monthly_expenses=Decimal("10_000"),
+    )
+
+    batch = run_batch_simulation(init, 100, record=["cash", "liquid_wealth"])
+
+    assert batch.months_survived[0] == len(run_simulation(init, 100)) - 1 == 27
+    assert batch.depleted[0]
+    assert batch.liquid_wealth[0] == pytest.approx(0)
+
+
+def test_rate_matrix_shape_is_validated() -> None:
+    with pytest.raises(ValueError):
+        run_batch_simulation(_init(), 12, inflation_rates=np.zeros((2, 6)))
+
+    with pytest.raises(ValueError):
+        run_batch_simulation(_init(), 12, record=["not_a_field"])
@@ -0,0 +1,91 @@
+from concurrent.futures import ThreadPoolExecutor
+from decimal import Decimal, getcontext, localcontext
+from itertools import count
+
+from finsim.context import DECIMAL_CONTEXT, decimal_context
+from finsim.rates import RatePath
+from finsim.simulations import run_fire_simulation, run_simulation, simulate_next
+
+from helpers import mortgaged_property, saver
+
+INFLATION = RatePath.from_decimals(
+    [Decimal(r) for r in ("0.002", "0.0035", "0.001", "0.004")], cyclic=True
+)
+STOCKS = RatePath.from_decimals(
+    [Decimal(r) for r in ("0.012", "-0.021", "0.007", "0.015", "-0.004")],
+    cyclic=True,
+)
+
+
+def _scenario(args: tuple[str, int, str]) -> list:
+    kind, expenses, engine = args
+    init = saver(
+        monthly_expenses=Decimal(expenses),
+        investment_properties=[
+            mortgaged_property(mortgage_rate=Decimal(f"{3 + expenses % 5}.25"))
+        ],
+    )
+    rates = dict(inflation_rates=INFLATION, stock_returns=STOCKS, engine=engine)
+    if kind == "fire":
+        simulations, months = run_fire_simulation(init, 480, **rates)  # type: ignore
+        return [months] + [s.to_dict() for s in simulations]
+    return [s.to_dict() for s in run_simulation(init, 360, **rates)]  # type: ignore
+
+
+def test_the_engine_leaves_the_callers_context_alone() -> None:
+    with localcontext() as ctx:
+        ctx.prec = 6
+        run_simulation(saver(), 24)
+
+        assert getcontext().prec == 6
+    assert DECIMAL_CONTEXT.prec == 26
+
+
+def test_results_dont_depend_on_the_callers_context() -> None:
+    expected = run_simulation(saver(), 120, INFLATION, STOCKS)
+
+    with localcontext() as ctx:
+        ctx.prec = 6
+        assert run_simulation(saver(), 120, INFLATION, STOCKS) == expected
+        # a single step as well
+        assert simulate_next(expected[0], INFLATION[0], STOCKS[0]) == expected[1]
+
+
+def test_nested_engine_calls_share_the_context() -> None:
+    contexts = []
+
+    @decimal_context
+    def inner():
+        contexts.append(getcontext())
+
+    @decimal_context
+    def outer():
+        contexts.append(getcontext())
+        inner()
+
+    outer()
+
+    assert contexts[0] is contexts[1]
+    assert contexts[0] is not DECIMAL_CONTEXT
+    assert contexts[0].prec == 26
+
+
+def test_concurrent_runs_match_serial_runs() -> None:
+    scenarios = [
+        (kind, expenses, engine)
+        for kind in ("simple", "fire")
+        for expenses in range(2_600, 3_400, 200)
+        for engine in ("decimal", "cents", "float")
+    ]
+    serial = [_scenario(s) for s in scenarios]
+
+    # every thread starts with another precision, none of it may leak into the results
+    precisions = count(5)
+
+    def start() -> None:
+        getcontext().prec = next(precisions)
+
+    with ThreadPoolExecutor(max_workers=8, initializer=start) as pool:
+        concurrent = list(pool.map(_scenario, scenarios * 2))
+
+    assert concurrent == serial * 2
@@ -0,0 +1,241 @@
+import os
+from dataclasses import replace
+from datetime import date
+from decimal import Decimal
+from random import Random
+from typing import Optional
+
+import numpy as np
+import pytest
+
+from finsim.batch import BATCH_FIELDS, run_batch_simulation
+from finsim.instrumentation import instrument
+from finsim.properties import InvestmentProperty
+from finsim.rates import RatePath
+from finsim.simulations import FireSimulation, run_fire_simulation, run_simulation
+
+# how far the float engine may drift from the Decimal engine, in cents
+TOLERANCE = Decimal(os.environ.get("FINSIM_PARITY_TOLERANCE_CENTS", "10")) / 100
+SCENARIOS = int(os.environ.get("FINSIM_PARITY_SCENARIOS", "25"))
+
+MONEY_FIELDS = [
+    "stock_investments",
+    "bonds_investments",
+    "cash",
+    "monthly_expenses",
+    "monthly_income",
+    "properties_net_cash_value",
+    "wealth_inc_properties",
+]
+
+
+def _random_property(rng: Random) -> InvestmentProperty:
+    with_mortgage = rng.random() < 0.5
+    return InvestmentProperty(
+        market_value=Decimal(rng.randrange(100_000, 600_000)),
+        monthly_income=Decimal(rng.randrange(500, 3_000)),
+        mortgage_left=Decimal(rng.randrange(10_000, 90_000) if with_mortgage else 0),
+        mortgage_rate=Decimal(str(rng.randrange(20, 80) / 10) if with_mortgage else 0),
+        mortgage_months=rng.randrange(60, 300) if with_mortgage else 0,
+        annual_rent_increase_rate=Decimal(str(rng.randrange(0, 5) / 100)),
+    )
+
+
+def _random_scenario(
+    seed: int,
+) -> tuple[FireSimulation, int, Optional[RatePath], Optional[RatePath]]:
+    rng = Random(seed)
+    init = FireSimulation(
+        stock_investments=Decimal(rng.randrange(0, 800_000)),
+        bonds_investments=Decimal(rng.randrange(0, 200_000)),
+        cash=Decimal(rng.randrange(0, 60_000)),
+        investment_properties=[_random_property(rng) for _ in range(rng.randint(0, 3))],
+        stock_return_rate=Decimal(str(rng.randrange(0, 10) / 100)),
+        bonds_return_rate=Decimal(str(rng.randrange(0, 5) / 100)),
+        annual_inflation_rate=Decimal(str(rng.randrange(0, 6) / 100)),
+        annual_income_increase_rate=Decimal(str(rng.randrange(0, 4) / 100)),
+        annual_property_appreciation_rate=Decimal(str(rng.randrange(0, 4) / 100)),
+        monthly_expenses=Decimal(rng.randrange(2_000, 12_000)),
+        monthly_income=Decimal(rng.randrange(0, 15_000)),
+        invest_cash_surplus=rng.random() < 0.7,
+        invest_cash_threshold=Decimal(rng.randrange(0, 50_000)),
+        invest_cash_surplus_strategy=rng.choice(["80-20", "100", "60-40", "50-50"]),
+        date=date(2024, rng.randint(1, 12), 1),
+    )
+    months = rng.randrange(240, 600)
+
+    if rng.random() < 0.5:
+        return init, months, None, None
+
+    np_rng = np.random.default_rng(seed)
+    inflation = np.round(np_rng.normal(0.003, 0.004, months), 4)
+    stocks = np.round(np_rng.normal(0.005, 0.045, months), 4)
+    return (
+        init,
+        months,
+        RatePath.from_decimals(Decimal(str(r)) for r in inflation),
+        RatePath.from_decimals(Decimal(str(r)) for r in stocks),
+    )
+
+
+def _assert_parity(
+    expected: list[FireSimulation], actual: list[FireSimulation]
+) -> None:
+    assert len(actual) == len(expected)
+    for exp, act in zip(expected, actual):
+        assert act.date == exp.date
+        assert act.monthly_inflation_rate == exp.monthly_inflation_rate
+        assert len(act.investment_properties) == len(exp.investment_properties)
+        for name in MONEY_FIELDS:
+            drift = abs(getattr(act, name) - getattr(exp, name))
+            assert drift <= TOLERANCE, f"{name} on {exp.date} is off by {drift}"
+
+
+@pytest.mark.parametrize("seed", range(SCENARIOS))
+def test_float_engine_stays_within_tolerance_of_decimal(seed: int) -> None:
+    init, months, inflation, stocks = _random_scenario(seed)
+
+    expected = run_simulation(init, months, inflation, stocks)
+    actual = run_simulation(init, months, inflation, stocks, engine="float")
+
+    _assert_parity(expected, actual)
+
+
+@pytest.mark.parametrize("seed", range(0, SCENARIOS, 5))
+def test_float_engine_finds_the_same_fire_month(seed: int) -> None:
+    init, months, inflation, stocks = _random_scenario(seed)
+
+    expected, expected_month = run_fire_simulation(init, months, inflation, stocks)
+    actual, actual_month = run_fire_simulation(
+        init, months, inflation, stocks, engine="float"
+    )
+
+    assert actual_month == expected_month
+    _assert_parity(expected, actual)
+
+
+@pytest.mark.parametrize("engine", ["float", "cents"])
+def test_half_cent_ties_round_like_decimal(engine: str) -> None:
+    init = FireSimulation(
+        stock_investments=Decimal("0"),
+        bonds_investments=Decimal("0"),
+        cash=Decimal("100_000"),
+        # 1003 * 1.005 = 1008.015 exactly, but it's 1008.0149999999999 in floats
+        monthly_expenses=Decimal("1003"),
+        monthly_income=Decimal("0"),
+        stock_return_rate=Decimal("0"),
+        date=date(2024, 1, 1),
+    )
+    rates = RatePath.from_decimals([Decimal("0.005")] * 12)
+
+    expected = run_simulation(init, 12, inflation_rates=rates)
+    actual = run_simulation(init, 12, inflation_rates=rates, engine=engine)
+
+    assert actual[1].monthly_expenses == Decimal("1008.02")
+    assert [s.monthly_expenses for s in actual] == [
+        s.monthly_expenses for s in expected
+    ]
+    assert [s.cash for s in actual] == [s.cash for s in expected]
+
+
+def test_unknown_engine_raises() -> None:
+    with pytest.raises(ValueError):
+        run_simulation(_random_scenario(0)[0], 12, engine="quad")
+
+    with pytest.raises(ValueError):
+        run_fire_simulation(_random_scenario(0)[0], 12, engine="quad")
+
+    with pytest.raises(ValueError):
+        run_batch_simulation(_random_scenario(0)[0], 12, engine="quad")
+
+
+@pytest.mark.parametrize("seed", range(SCENARIOS))
+def test_cents_engine_matches_decimal_exactly(seed: int) -> None:
+    init, months, inflation, stocks = _random_scenario(seed)
+
+    expected = run_simulation(init, months, inflation, stocks)
+    actual = run_simulation(init, months, inflation, stocks, engine="cents")
+
+    assert actual == expected
+
+
+@pytest.mark.parametrize("seed", range(0, SCENARIOS, 5))
+def test_cents_engine_finds_the_same_fire_month(seed: int) -> None:
+    init, months, inflation, stocks = _random_scenario(seed)
+
+    expected = run_fire_simulation(init, months, inflation, stocks)
+    actual = run_fire_simulation(init, months, inflation, stocks, engine="cents")
+
+    assert actual == expected
+
+
+@pytest.mark.parametrize("seed", range(0, SCENARIOS, 5))
+def test_cents_batch_matches_decimal_for_every_path(seed: int) -> None:
+    init, months, _, _ = _random_scenario(seed)
+    rng = np.random.default_rng(seed)
+    inflation = np.round(rng.normal(0.003, 0.004, (4, months)), 4)
+    stocks = np.round(rng.normal(0.005, 0.045, (4, months)), 4)
+
+    batch = run_batch_simulation(
+        init, months, inflation, stocks, record=BATCH_FIELDS, engine="cents"
+    )
+
+    for path in range(4):
+        expected = run_simulation(
+            init, months, RatePath(inflation[path]), RatePath(stocks[path])
+        )
+        survived = len(expected) - 1
+        assert batch.months_survived[path] == survived
+        for name in MONEY_FIELDS[:5]:
+            assert batch.history[name][path, : survived + 1].tolist() == [
+                float(getattr(s, name)) for s in expected
+            ]
+
+
+def test_cents_engine_keeps_unrounded_init() -> None:
+    init, months, inflation, stocks = _random_scenario(1)
+    init = replace(
+        init, cash=Decimal("1234.5678"), monthly_expenses=Decimal("3000.125")
+    )
+
+    expected = run_simulation(init, 24, inflation, stocks)
+
+    assert run_simulation(init, 24, inflation, stocks, engine="cents") == expected
+    batch = run_batch_simulation(
+        init, 24, inflation, stocks, paths=2, record=["cash"], engine="cents"
+    )
+    assert batch.history["cash"][0].tolist() == [float(s.cash) for s in expected]
+
+
+def test_cents_engine_decides_drained_cash_without_decimal() -> None:
+    # a drawdown investing every surplus, the waterfall leaves exactly the threshold of 0 in cash every month
+    init = replace(
+        _random_scenario(0)[0],
+        stock_investments=Decimal("900_000"),
+        bonds_investments=Decimal("100_000"),
+        cash=Decimal("0"),
+        investment_properties=[],
+        monthly_expenses=Decimal("3_000"),
+        monthly_income=Decimal("0"),
+        invest_cash_surplus=True,
+        invest_cash_threshold=Decimal("0"),
+    )
+    rng = np.random.default_rng(0)
+    inflation = np.round(rng.normal(0.003, 0.004, (4, 600)), 4)
+    stocks = np.round(rng.normal(0.005, 0.045, (4, 600)), 4)
+
+    with instrument() as probe:
+        actual = run_simulation(init, 600, engine="cents")
+    assert actual == run_simulation(init, 600)
+    assert probe.counters["cents.exact_steps"] <= 10
+
+    with instrument() as probe:
+        batch = run_batch_simulation(
+            init, 600, inflation, stocks, record=["cash"], engine="cents"
+        )
+    assert probe.counters["cents.exact_steps"] <= 4 * 10
+    for path in range(4):
+        expected = run_simulation(
+            init, 600, RatePath(inflation[path]), RatePath(stocks[path])
+        )
+        assert batch.months_survived[path] == len(expected) - 1
@@ -0,0 +1,112 @@
+from decimal import Decimal
+from functools import partial
+
+import numpy as np
+import pytest
+
+from finsim.batch import run_batch_simulation
+from finsim.fire_curve import fire_success_curve, run_fire_monte_carlo
+from finsim.montecarlo import NormalRates, sample_rates
+from finsim.rates import RatePath
+from finsim.simulations import run_fire_simulation
+
+from helpers import make_init, mortgaged_property
+
+INFLATION = NormalRates(0.002, 0.003)
+STOCKS = NormalRates(0.005, 0.045)
+
+
+_init = partial(
+    make_init,
+    stock_investments=Decimal("40_000"),
+    bonds_investments=Decimal("10_000"),
+    cash=Decimal("5_000"),
+    investment_properties=[
+        mortgaged_property(
+            market_value=Decimal("150_000"),
+            monthly_income=Decimal("700"),
+            mortgage_left=Decimal("90_000"),
+        )
+    ],
+    monthly_expenses=Decimal("2_500"),
+    monthly_income=Decimal("5_000"),
+    annual_inflation_rate=Decimal("0.03"),
+    annual_income_increase_rate=Decimal("0.02"),
+    invest_cash_surplus=True,
+    invest_cash_threshold=Decimal("10_000"),
+)
+
+
+def test_every_path_retires_when_run_fire_simulation_does() -> None:
+    inflation, stocks = sample_rates(7, range(10), 360, INFLATION, STOCKS)
+
+    curve = fire_success_curve(_init(), 360, inflation, stocks)
+
+    for path in range(10):
+        _, months = run_fire_simulation(
+            _init(),
+            360,
+            RatePath(inflation[path]),  # type: ignore
+            RatePath(stocks[path]),  # type: ignore
+            engine="cents",
+        )
+        assert curve.earliest[path] + 1 == months, path
+
+
+def test_success_grows_with_the_months_worked() -> None:
+    curve = run_fire_monte_carlo(_init(), 360, 200, INFLATION, STOCKS, seed=1)
+
+    assert curve.expected_number_of_months == 360
+    assert (np.diff(curve.success) >= 0).all()
+    assert 0 < curve.success[60] < curve.success[-1]
+    assert curve.success[-1] == (curve.earliest < 360).mean()
+    for confidence in (0.5, 0.9):
+        months = curve.months_to_retire(confidence)
+        assert months is not None
+        assert curve.success[months - 1] >= confidence > curve.success[months - 2]
+    assert curve.months_to_retire(1.01) is None
+
+
+def test_fixed_rates_are_a_single_path() -> None:
+    _, months = run_fire_simulation(_init(), 360, engine="cents")
+
+    curve = run_fire_monte_carlo(_init(), 360, 5)
+
+    assert curve.months_to_retire(1.0) == months
+    assert curve.earliest.tolist() == [months - 1] * 5
+    assert curve.success[months - 2] == 0
+
+
+def test_retire_after_stops_the_salary() -> None:
+    batch = run_batch_simulation(
+        _init(), 24, paths=3, record=("monthly_income",), retire_after=[0, 10, 30]
+    )
+
+    income = batch.history["monthly_income"]
+    assert (income[0, 2:] == 0).all() and income[0, 1] > 0
+    assert (income[1, 12:] == 0).all() and (income[1, :12] > 0).all()
+    assert (income[2] > 0).all()
+    with pytest.raises(ValueError):
+        run_batch_simulation(_init(), 24, retire_after=[1], engine="cents")
+
+
+def test_a_path_whose_wealth_lands_on_zero_stops_like_run_fire_simulation() -> None:
+    # without any returns every month retired takes back one month of savings, the money is exactly 0 at the end
+    init = make_init(
+        stock_investments=Decimal("0"),
+        bonds_investments=Decimal("0"),
+        cash=Decimal("0"),
+        monthly_expenses=Decimal("500"),
+        monthly_income=Decimal("1_000"),
+        stock_return_rate=Decimal("0"),
+        bonds_return_rate=Decimal("0"),
+    )
+    # the month wealth is 0 isn't kept, retiring after 5 months keeps 10 of the 11 months needed
+    _, months = run_fire_simulation(init, 13)
+    assert months == 6
+
+    curve = fire_success_curve(init, 13)
+    batch = run_batch_simulation(init, 13, paths=2, record=(), retire_after=[4, 5])
+
+    assert curve.months_to_retire(1.0) == months
+    assert batch.months_survived.tolist() == [9, 11]
@@ -0,0 +1,146 @@
+from datetime import date
+from decimal import Decimal
+from functools import partial
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from finsim.frame import FRAME_COLUMNS, SETTING_COLUMNS
+from finsim.properties import InvestmentProperty
+from finsim.rates import RatePath
+from finsim.simulations import (
+    FireSimulation,
+    run_fire_simulation,
+    run_fire_simulation_frame,
+    run_simulation,
+    run_simulation_frame,
+)
+
+from helpers import make_init, mortgaged_property
+
+TOLERANCE = {"decimal": 1e-6, "cents": 1e-6, "float": 0.1}
+
+
+_init = partial(
+    make_init,
+    stock_investments=Decimal("20_000"),
+    bonds_investments=Decimal("5_000"),
+    cash=Decimal("2_000"),
+    investment_properties=[
+        mortgaged_property(
+            market_value=Decimal("300_000"),
+            mortgage_left=Decimal("120_000"),
+            mortgage_rate=Decimal("6.5"),
+            monthly_income=Decimal("1_500"),
+            annual_rent_increase_rate=Decimal("0.02"),
+        ),
+        InvestmentProperty(
+            market_value=Decimal("150_000"),
+            mortgage_left=Decimal("0"),
+            mortgage_rate=Decimal("0"),
+            mortgage_months=0,
+            monthly_income=Decimal("800"),
+        ),
+    ],
+    annual_inflation_rate=Decimal("0.03"),
+    annual_income_increase_rate=Decimal("0.02"),
+    annual_property_appreciation_rate=Decimal("0.02"),
+    monthly_expenses=Decimal("6_000"),
+    monthly_income=Decimal("3_000"),
+    date=date(2024, 3, 1),
+)
+
+
+def _rates(months: int) -> tuple[RatePath, RatePath]:
+    rng = np.random.default_rng(7)
+    inflation = np.round(rng.normal(0.003, 0.004, months), 4)
+    stocks = np.round(rng.normal(0.005, 0.045, months), 4)
+    return RatePath(inflation), RatePath(stocks)
+
+
+def _expected(simulations: list[FireSimulation]) -> pd.DataFrame:
+    return pd.DataFrame([s.to_dict() for s in simulations]).set_index("date")
+
+
+@pytest.mark.parametrize("engine", ["decimal", "float", "cents"])
+def test_frame_matches_to_dict_columns(engine: str) -> None:
+    init = _init()
+    inflation, stocks = _rates(360)
+
+    expected = _expected(run_simulation(init, 360, inflation, stocks))
+    df = run_simulation_frame(init, 360, inflation, stocks, engine=engine).to_pandas()
+
+    assert df.index.tolist() == expected.index.tolist()
+    for name in FRAME_COLUMNS:
+        drift = np.abs(df[name].to_numpy() - expected[name].to_numpy(dtype=float))
+        assert drift.max() <= TOLERANCE[engine], name
+
+
+@pytest.mark.parametrize("engine", ["decimal", "float", "cents"])
+def test_settings_columns_match_to_dict(engine: str) -> None:
+    init = _init(invest_cash_surplus=True, invest_cash_threshold=Decimal("10_000"))
+
+    expected = _expected(run_simulation(init, 24))
+    df = run_simulation_frame(init, 24, engine=engine).to_pandas(settings=True)
+
+    assert list(df.columns) == list(FRAME_COLUMNS + SETTING_COLUMNS)
+    for name in SETTING_COLUMNS:
+        assert df[name].tolist() == expected[name].tolist(), name
+
+
+def test_to_pandas_does_not_copy() -> None:
+    frame = run_simulation_frame(_init(), 24, engine="cents")
+
+    df = frame.to_pandas()
+
+    assert np.shares_memory(df.to_numpy(), frame.values)
+    assert np.shares_memory(frame["cash"], frame.values)
+
+
+@pytest.mark.parametrize("engine", ["decimal", "float", "cents"])
+def test_property_table_drops_sold_properties(engine: str) -> None:
+    init = _init()
+    inflation, stocks = _rates(360)
+    simulations = run_simulation(init, 360, inflation, stocks)
+    assert len(simulations[-1].investment_properties) < 2, "no property was sold"
+
+    table = run_simulation_frame(
+        init, 360, inflation, stocks, engine=engine
+    ).property_table()
+
+    assert len(table) == sum(len(s.investment_properties) for s in simulations)
+    for (day, rows), sim in zip(table.groupby("date", sort=False), simulations):
+        assert day == sim.date
+        expected = [float(p.market_value) for p in sim.investment_properties]
+        assert rows["market_value"].tolist() == pytest.approx(expected, abs=0.1)
+
+
+def test_property_table_is_empty_without_properties() -> None:
+    frame = run_simulation_frame(
+        _init(investment_properties=[], cash=Decimal("100_000")), 12
+    )
+
+    assert frame.property_table().empty
+    assert frame["properties_market_value"].tolist() == [0.0] * 13
+
+
+@pytest.mark.parametrize("engine", ["decimal", "float", "cents"])
+def test_fire_frame_matches_fire_simulation(engine: str) -> None:
+    init = _init(
+        stock_investments=Decimal("600_000"),
+        monthly_income=Decimal("9_000"),
+    )
+    inflation, stocks = _rates(480)
+
+    simulations, month = run_fire_simulation(init, 480, inflation, stocks)
+    frame, frame_month = run_fire_simulation_frame(
+        init, 480, inflation, stocks, engine=engine
+    )
+
+    assert frame_month == month
+    assert len(frame) == len(simulations)
+    expected = _expected(simulations)
+    for name in ["monthly_income", "wealth_inc_properties"]:
+        drift = np.abs(frame[name] - expected[name].to_numpy(dtype=float))
+        assert drift.max() <= TOLERANCE[engine], name
@@ -1,5 +1,13 @@
 from decimal import Decimal
-from finsim.inflation import random_inflation_gen, inflation_from_file_gen
+from pathlib import Path
+
+from finsim import inflation
+from finsim.inflation import (
+    inflation_from_file_gen,
+    random_inflation_gen,
+    random_rate_path,
+    rate_path_from_file,
+)
 import tempfile
 
 
@@ -34,3 +42,69 @@ def test_from_file_gen() -> None:
     for _ in range(30):
         # that it doesn't fail
         assert next(gen)
+
+
+def test_rate_path_from_file_matches_the_generator() -> None:
+    inflation_date = """date,value
+2020,0.024
+2021,0.08
+2022,0.14
+"""
+
+    with tempfile.NamedTemporaryFile(mode="w+", delete=False) as temp:
+        temp.write(inflation_date)
+        file_path = temp.name
+
+    for monthly in [False, True]:
+        gen = inflation_from_file_gen(file_path, monthly=monthly)
+        path = rate_path_from_file(file_path, monthly=monthly)
+
+        assert [path[i] for i in range(80)] == [next(gen) for _ in range(80)]
+
+
+def test_random_rate_path_is_reproducible() -> None:
+    path = random_rate_path(range=(1, 5), months=24, seed=42)
+
+    assert path == random_rate_path(range=(1, 5), months=24, seed=42)
+    assert all(Decimal("0.01") <= path[i] < Decimal("0.05") for i in range(24))
+
+
+def _write_rates(path: Path, content: str) -> Path:
+    path.write_text(content)
+    return path
+
+
+def test_load_rate_path_parses_the_file_once(tmp_path: Path, monkeypatch) -> None:
+    monkeypatch.setenv(inflation.RATE_CACHE_DIR_ENV, str(tmp_path / "cache"))
+    inflation.clear_loaded_rate_paths()
+    source = _write_rates(
+        tmp_path / "rates.csv", "date,value\n2024-01-31,0.0031233949082842194\n"
+    )
+
+    path = inflation.load_rate_path(source, monthly=True)
+
+    assert path[0] == Decimal("0.0031233949082842194")
+    assert inflation.load_rate_path(source, monthly=True) is path
+    assert list((tmp_path / "cache").glob("rates.monthly.*.npy"))
+
+    # a new process only reads the sidecar file
+    inflation.clear_loaded_rate_paths()
+    monkeypatch.setattr(inflation, "_parse_rates", None)
+    from_sidecar = inflation.load_rate_path(source, monthly=True)
+
+    assert from_sidecar == path
+    assert from_sidecar[0] == Decimal("0.0031233949082842194")
+
+
+def test_load_rate_path_reloads_a_changed_file(tmp_path: Path, monkeypatch) -> None:
+    monkeypatch.setenv(inflation.RATE_CACHE_DIR_ENV, str(tmp_path / "cache"))
+    inflation.clear_loaded_rate_paths()
+    source = _write_rates(tmp_path / "rates.csv", "date,value\n2020,0.024\n")
+
+    assert inflation.load_rate_path(source)[0] == Decimal("0.002")
+
+    _write_rates(source, "date,value\n2020,0.036\n2021,0.024\n")
+
+    path = inflation.load_rate_path(source)
+    assert len(path) == 24
+    assert path[0] == Decimal("0.003")
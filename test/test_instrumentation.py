@@ -0,0 +1,149 @@
+import json
+from concurrent.futures import ThreadPoolExecutor
+from decimal import Decimal
+from functools import partial
+from itertools import repeat
+
+from finsim.instrumentation import Probe, active_probe, aggregate, instrument
+from finsim.mortgage import schedules
+from finsim.simulations import (
+    run_fire_simulation_frame,
+    run_simulation,
+    run_simulation_frame,
+)
+
+from helpers import make_init, mortgaged_property
+
+_init = partial(
+    make_init,
+    stock_investments=Decimal("20_000"),
+    bonds_investments=Decimal("10_000"),
+    cash=Decimal("5_000"),
+    investment_properties=[
+        mortgaged_property(
+            market_value=Decimal(value),
+            monthly_income=Decimal("600"),
+            mortgage_left=Decimal("50_000"),
+            mortgage_rate=Decimal("6.5"),
+            mortgage_months=240,
+        )
+        for value in ("150_000", "120_000")
+    ],
+    monthly_expenses=Decimal("4_000"),
+    monthly_income=Decimal("0"),
+)
+
+
+def test_nothing_is_collected_without_a_probe() -> None:
+    assert active_probe() is None
+
+    with instrument() as probe:
+        assert active_probe() is probe
+    assert active_probe() is None
+
+    run_simulation(_init(), 12)
+    assert not probe.counters and not probe.timers
+
+
+def test_counts_the_steps_and_the_waterfall() -> None:
+    with instrument() as probe:
+        simulations = run_simulation(_init(), 600)
+
+    # the month that goes negative is simulated too, it just isn't kept
+    steps = len(simulations)
+    waterfall = {
+        name: value
+        for name, value in probe.counters.items()
+        if name.startswith("waterfall.")
+    }
+    assert probe.counters["steps"] == steps
+    assert sum(waterfall.values()) == steps
+    assert waterfall["waterfall.nothing_left"] == 1
+    assert waterfall["waterfall.cash"] > 0 and waterfall["waterfall.stocks"] > 0
+    assert (
+        probe.counters["properties_sold"] == waterfall["waterfall.property_sale"] == 2
+    )
+    assert not simulations[-1].investment_properties
+
+    assert probe.timers["run_simulation"].calls == 1
+    assert probe.timers["step"].calls == steps
+    assert probe.timers["properties.step"].calls == steps
+    assert (
+        probe.timers["step"].nanoseconds >= probe.timers["properties.step"].nanoseconds
+    )
+    assert (
+        probe.timers["run_simulation"].nanoseconds >= probe.timers["step"].nanoseconds
+    )
+
+
+def test_times_the_phases_of_the_fast_engines() -> None:
+    schedules.clear()
+    with instrument() as probe:
+        run_fire_simulation_frame(
+            _init(monthly_income=Decimal("6_000")), 240, engine="cents"
+        )
+        run_simulation_frame(
+            _init(), 120, inflation_rates=repeat(Decimal("0.002")), engine="float"
+        ).to_pandas()
+
+    assert probe.counters["fast_steps"] > 240
+    assert probe.counters["fire.candidates"] > 1
+    # both properties have the same mortgage, so they share the schedule
+    assert probe.counters["mortgage.schedule_misses"] == 1
+    assert probe.counters["mortgage.schedule_hits"] > 0
+    for name in [
+        "fire.working",
+        "fire.search",
+        "frame.build",
+        "frame.to_pandas",
+        "mortgage.schedule",
+        "properties.timeline",
+        "rates.read_generator",
+    ]:
+        assert probe.timers[name].calls > 0, name
+
+
+def test_probes_are_per_thread() -> None:
+    init = _init()
+    with instrument() as probe:
+        with ThreadPoolExecutor(2) as pool:
+            pool.submit(run_simulation, init, 24).result()
+
+    assert not probe.counters
+
+    def run() -> Probe:
+        with instrument() as probe:
+            run_simulation(_init(), 24)
+        return probe
+
+    with ThreadPoolExecutor(2) as pool:
+        probes = list(pool.map(lambda _: run(), range(4)))
+    assert [p.counters["steps"] for p in probes] == [24] * 4
+
+
+def test_records_aggregate_across_runs() -> None:
+    probes = []
+    for months in (12, 24):
+        with instrument() as probe:
+            run_simulation(_init(), months)
+        probes.append(probe)
+
+    records = [r for p in probes for r in p.records(scenario="rental")]
+    # the records are plain JSON
+    records = json.loads(json.dumps(records))
+    totals = {(r["kind"], r["name"]): r for r in aggregate(records)}
+
+    assert totals["counter", "steps"] == {
+        "kind": "counter",
+        "name": "steps",
+        "value": 36,
+        "scenario": "rental",
+    }
+    assert totals["timer", "step"]["calls"] == 36
+    assert totals["timer", "step"]["seconds"] > 0
+
+    merged = Probe()
+    for probe in probes:
+        merged.merge(probe)
+    assert merged.counters["steps"] == 36
+    assert merged.timers["run_simulation"].calls == 2
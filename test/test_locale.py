@@ -0,0 +1,29 @@
+from view import locale
+
+
+def test_catalogs_are_loaded_once(monkeypatch) -> None:
+    loads = []
+    load = locale.Translations.load
+    monkeypatch.setattr(
+        locale.Translations,
+        "load",
+        lambda *args, **kwargs: loads.append(args) or load(*args, **kwargs),
+    )
+    locale.clear_loaded_locales()
+
+    locale.prewarm_locales()
+    for _ in range(3):
+        for valid in locale.VALID_LOCALES:
+            locale.load_translations(valid.code)
+
+    assert len(loads) == len(locale.VALID_LOCALES)
+
+
+def test_intro_is_read_once() -> None:
+    locale.clear_loaded_locales()
+
+    first = locale.load_intro(locale.pl)
+
+    assert "#" in first
+    assert locale.load_intro(locale.pl) is first
+    assert locale.load_intro(locale.en) != first
@@ -0,0 +1,136 @@
+from threading import Event
+
+import numpy as np
+import pytest
+
+from finsim.batch import run_batch_simulation
+from finsim.montecarlo import (
+    BootstrapRates,
+    MonteCarloCancelled,
+    NormalRates,
+    run_monte_carlo,
+    sample_rates,
+)
+from finsim.rates import RatePath
+from finsim.summary import Statistic
+
+from helpers import retiree
+
+INFLATION = NormalRates(0.003, 0.004)
+STOCKS = NormalRates(0.005, 0.045)
+
+
+def _assert_same(a, b) -> None:
+    assert a.months_survived.tolist() == b.months_survived.tolist()
+    for name in a.history:
+        assert np.array_equal(a.history[name], b.history[name], equal_nan=True)
+    assert a.summary.keys() == b.summary.keys()
+    for name in a.summary:
+        assert np.array_equal(a.summary[name], b.summary[name])
+    assert a.sketches.keys() == b.sketches.keys()
+    for name in a.sketches:
+        assert np.array_equal(a.sketches[name].counts, b.sketches[name].counts)
+
+
+def test_results_dont_depend_on_workers_or_chunks() -> None:
+    kwargs = dict(inflation=INFLATION, stocks=STOCKS, seed=3)
+
+    single = run_monte_carlo(retiree(), 360, 50, workers=1, chunk_size=50, **kwargs)
+    pooled = run_monte_carlo(retiree(), 360, 50, workers=3, chunk_size=7, **kwargs)
+
+    _assert_same(single, pooled)
+    assert single.paths == 50
+    assert 0 < single.depleted.sum() < 50
+
+
+def test_pooled_paths_keep_their_summary() -> None:
+    kwargs = dict(inflation=INFLATION, stocks=STOCKS, seed=3, record=())
+    summary = [Statistic("liquid_wealth", "min"), Statistic("cash", "mean")]
+
+    single = run_monte_carlo(retiree(), 360, 20, workers=1, summary=summary, **kwargs)
+    pooled = run_monte_carlo(
+        retiree(), 360, 20, workers=2, chunk_size=6, summary=summary, **kwargs
+    )
+
+    _assert_same(single, pooled)
+    assert pooled.history == {}
+    assert set(pooled.summary) == {"min_liquid_wealth", "mean_cash"}
+
+
+def test_pooled_sketches_merge_into_the_bands_of_every_path() -> None:
+    kwargs = dict(inflation=INFLATION, stocks=STOCKS, seed=3)
+    sketch = ["liquid_wealth", "wealth_inc_properties"]
+
+    recorded = run_monte_carlo(retiree(), 360, 40, workers=1, **kwargs)
+    single = run_monte_carlo(
+        retiree(), 360, 40, workers=1, chunk_size=9, record=(), sketch=sketch, **kwargs
+    )
+    pooled = run_monte_carlo(
+        retiree(), 360, 40, workers=2, chunk_size=9, record=(), sketch=sketch, **kwargs
+    )
+
+    _assert_same(single, pooled)
+    bands = pooled.bands("liquid_wealth")
+    assert bands.columns.tolist() == ["p5", "p25", "p50", "p75", "p95"]
+    assert bands.index.tolist() == recorded.dates
+    exact = np.nanquantile(
+        recorded.history["liquid_wealth"], [0.05, 0.95], axis=0, method="lower"
+    )
+    np.testing.assert_allclose(bands[["p5", "p95"]].to_numpy().T, exact, rtol=0.01)
+    assert (
+        pooled.sketches["liquid_wealth"].count
+        == (~np.isnan(recorded.history["liquid_wealth"])).sum(axis=0)
+    ).all()
+
+
+def test_paths_run_the_sampled_rates() -> None:
+    result = run_monte_carlo(
+        retiree(), 240, 10, inflation=INFLATION, stocks=STOCKS, seed=5, workers=1
+    )
+
+    inflation, stocks = sample_rates(5, range(10), 240, INFLATION, STOCKS)
+    _assert_same(result, run_batch_simulation(retiree(), 240, inflation, stocks))
+    # another seed draws other rates
+    assert not np.array_equal(
+        inflation, sample_rates(6, range(10), 240, INFLATION, STOCKS)[0]
+    )
+
+
+def test_models_draw_from_their_own_streams() -> None:
+    _, with_inflation = sample_rates(1, range(4), 60, INFLATION, STOCKS)
+    _, without_inflation = sample_rates(1, range(4), 60, None, STOCKS)
+
+    assert np.array_equal(with_inflation, without_inflation)  # type: ignore
+
+
+def test_bootstrap_keeps_blocks_of_the_history() -> None:
+    history = RatePath(np.arange(100) / 1000)
+    rates = BootstrapRates(history, block=12).sample(np.random.default_rng(0), 30)
+
+    assert len(rates) == 30
+    steps = np.diff(rates[:12]) * 1000
+    assert set(np.round(steps).tolist()) <= {1.0, -99.0}
+
+
+@pytest.mark.parametrize("workers", [1, 2])
+def test_cancel_stops_sending_chunks(workers: int) -> None:
+    cancel = Event()
+    done = []
+
+    def progress(paths: int) -> None:
+        done.append(paths)
+        cancel.set()
+
+    with pytest.raises(MonteCarloCancelled):
+        run_monte_carlo(
+            retiree(),
+            120,
+            200,
+            stocks=STOCKS,
+            workers=workers,
+            chunk_size=10,
+            cancel=cancel,
+            progress=progress,
+        )
+
+    assert done[-1] < 200
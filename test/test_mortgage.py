@@ -1,6 +1,10 @@
 from decimal import Decimal
 
-from finsim.mortgage import calculate_monthly_payment
+from finsim.mortgage import (
+    AmortizationSchedule,
+    ScheduleCache,
+    calculate_monthly_payment,
+)
 
 
 def test_mortgage() -> None:
@@ -12,3 +16,46 @@ def test_mortgage() -> None:
     )
 
     assert monthly, interest == (Decimal("2204.76"), Decimal("1016.88"))
+
+
+def test_schedule_replays_monthly_payments() -> None:
+    principal, rate, months = Decimal("154275"), Decimal("7.88"), 94
+
+    schedule = AmortizationSchedule.compute(principal, rate, months)
+
+    assert len(schedule.payment) == months
+    balance = principal
+    for k in range(months):
+        payment, interest = calculate_monthly_payment(balance, rate, months - k)
+        assert schedule.balance[k] == balance
+        assert (schedule.payment[k], schedule.interest[k]) == (payment, interest)
+        assert schedule.principal[k] == payment - interest
+        balance -= payment - interest
+
+
+def test_stepped_properties_share_one_schedule() -> None:
+    cache = ScheduleCache(maxsize=2)
+    schedule = cache.schedule(Decimal("100_000"), Decimal("6"), 120)
+
+    for k in range(0, 120, 7):
+        assert cache.row(schedule.balance[k], Decimal("6"), 120 - k) == (
+            schedule.payment[k],
+            schedule.interest[k],
+        )
+    assert len(cache) == 1
+
+
+def test_schedule_cache_is_bounded() -> None:
+    cache = ScheduleCache(maxsize=2)
+    first = cache.schedule(Decimal("100_000"), Decimal("6"), 120)
+
+    cache.schedule(Decimal("200_000"), Decimal("6"), 120)
+    cache.schedule(Decimal("300_000"), Decimal("6"), 120)
+
+    assert len(cache) == 2
+    # evicted, so computed again from that month
+    assert cache.row(first.balance[10], Decimal("6"), 110) == (
+        first.payment[10],
+        first.interest[10],
+    )
+    assert len(cache) == 2
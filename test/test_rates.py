@@ -0,0 +1,77 @@
+from decimal import Decimal
+
+import numpy as np
+import pytest
+
+from finsim.rates import RatePath, as_rate_path
+from finsim.simulations import run_simulation
+
+from helpers import saver
+
+
+def test_rate_path_random_access() -> None:
+    path = RatePath([0.0013, -0.0052, 0.0074], cyclic=True)
+
+    assert path[0] == Decimal("0.0013")
+    assert path[1] == Decimal("-0.0052")
+    assert path[4] == Decimal("-0.0052")
+    assert list(path.as_array(7)) == [0.0013, -0.0052, 0.0074] * 2 + [0.0013]
+
+
+def test_non_cyclic_rate_path_ends() -> None:
+    path = RatePath([0.01, 0.02])
+
+    with pytest.raises(IndexError):
+        path[2]
+
+    with pytest.raises(IndexError):
+        path.as_array(3)
+
+
+def test_rate_path_keeps_exact_decimals() -> None:
+    rates = [Decimal("0.0031233949082842194"), Decimal("0.002")]
+
+    path = RatePath.from_decimals(rates)
+
+    assert path[0] == Decimal("0.0031233949082842194")
+    assert path.values.dtype == np.float64
+
+
+def test_rate_path_is_immutable_and_hashable() -> None:
+    path = RatePath([0.01, 0.02])
+
+    with pytest.raises(ValueError):
+        path.values[0] = 1
+
+    assert path == RatePath(np.array([0.01, 0.02]))
+    assert path.digest == RatePath([0.01, 0.02]).digest
+    assert path.digest != RatePath([0.01, 0.02], cyclic=True).digest
+    assert len({path, RatePath([0.01, 0.02])}) == 1
+
+
+def test_generators_are_materialized_once() -> None:
+    def gen():
+        i = 0
+        while True:
+            i += 1
+            yield Decimal(i)
+
+    path = as_rate_path(gen(), 3)
+
+    assert path is not None
+    assert [path[i] for i in range(3)] == [Decimal(1), Decimal(2), Decimal(3)]
+    assert as_rate_path(path, 3) is path
+    assert as_rate_path(None, 10) is None
+
+
+def test_short_rate_paths_are_refused_up_front() -> None:
+    with pytest.raises(ValueError, match="2 months, 3 were requested"):
+        as_rate_path(RatePath([0.01, 0.02]), 3)
+
+    with pytest.raises(ValueError):
+        as_rate_path(iter([Decimal("0.01")]), 3)
+
+    with pytest.raises(ValueError):
+        run_simulation(saver(), 12, inflation_rates=RatePath([0.01] * 11))
+
+    assert len(as_rate_path(RatePath([0.01], cyclic=True), 3)) == 1
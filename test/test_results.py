@@ -0,0 +1,80 @@
+import datetime
+from dataclasses import replace
+from pathlib import Path
+
+import numpy as np
+import pytest
+
+from view import results
+from view.results import ResultCache, scenario_key
+from view.sidebar import get_fire_sidebar_defaults, get_simple_sidebar_defaults
+
+ROOT = Path(__file__).resolve().parent.parent
+START = datetime.date(2024, 5, 1)
+
+
+def test_cache_counts_hits_misses_and_evictions() -> None:
+    cache = ResultCache(max_bytes=10, sizeof=len)
+
+    assert cache.get_or_compute("a", lambda: "aaaa") == "aaaa"
+    assert cache.get_or_compute("a", lambda: pytest.fail("not cached")) == "aaaa"
+    cache.get_or_compute("b", lambda: "bbbb")
+    cache.get_or_compute("a", lambda: "aaaa")
+    cache.get_or_compute("c", lambda: "cccc")
+
+    assert "b" not in cache
+    assert "a" in cache and "c" in cache
+    assert (cache.stats.hits, cache.stats.misses, cache.stats.evictions) == (2, 3, 1)
+    assert cache.stats.nbytes == 8
+
+
+def test_cache_skips_results_bigger_than_the_bound() -> None:
+    cache = ResultCache(max_bytes=3, sizeof=len)
+
+    cache.get_or_compute("a", lambda: "aaaa")
+
+    assert len(cache) == 0
+
+
+def test_scenario_key_is_canonical() -> None:
+    attrs = get_simple_sidebar_defaults()
+    key = scenario_key(attrs, START, ROOT)
+
+    # query params give back round floats as ints
+    assert scenario_key(replace(attrs, cash=10_000), START, ROOT) == key
+    assert scenario_key(attrs, START.replace(day=20), ROOT) == key
+
+    assert scenario_key(replace(attrs, cash=10_001.0), START, ROOT) != key
+    assert scenario_key(attrs, datetime.date(2024, 6, 1), ROOT) != key
+    assert scenario_key(replace(attrs, years=16), START, ROOT) != key
+
+
+def test_scenario_key_follows_the_rate_sources() -> None:
+    attrs = get_simple_sidebar_defaults()
+    simulated = replace(attrs, inflation_type_calc="simulated")
+
+    assert scenario_key(simulated, START, ROOT) != scenario_key(attrs, START, ROOT)
+    assert scenario_key(
+        replace(simulated, currency_code="USD"), START, ROOT
+    ) != scenario_key(simulated, START, ROOT)
+
+
+def test_fire_key_ignores_the_date_of_death() -> None:
+    attrs = get_fire_sidebar_defaults()
+    later = get_fire_sidebar_defaults()
+    later.date_of_death += datetime.timedelta(seconds=1)
+
+    assert scenario_key(later, START, ROOT) == scenario_key(attrs, START, ROOT)
+
+
+def test_sessions_share_frozen_results(monkeypatch) -> None:
+    monkeypatch.setattr(results, "results", ResultCache())
+    attrs = get_simple_sidebar_defaults()
+
+    first = results.simple_simulation(attrs, ROOT, start=START)
+    second = results.simple_simulation(replace(attrs), ROOT, start=START)
+
+    assert second is first
+    assert results.results.stats.hits == 1
+    assert not first.values.flags.writeable
+    assert np.shares_memory(first.to_pandas().to_numpy(), first.values)
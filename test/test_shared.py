@@ -0,0 +1,82 @@
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+from threading import Event
+
+import numpy as np
+import pytest
+
+from finsim import montecarlo
+from finsim.montecarlo import MonteCarloCancelled, NormalRates, run_monte_carlo
+from finsim.shared import SharedArrays, attach
+
+from helpers import retiree
+
+STOCKS = NormalRates(0.005, 0.045)
+
+
+def _segments() -> set[str]:
+    shm = Path("/dev/shm")
+    return {p.name for p in shm.iterdir()} if shm.exists() else set()
+
+
+def _fill(spec, start: int) -> None:
+    with attach(spec) as arrays:
+        arrays["values"][slice(start, start + 2)] = start
+
+
+def test_workers_write_in_place() -> None:
+    before = _segments()
+    with SharedArrays({"values": ((6, 3), "float64")}) as shared:
+        with ProcessPoolExecutor(2) as pool:
+            list(pool.map(_fill, [shared.spec] * 3, [0, 2, 4]))
+        values = shared.collect()["values"]
+
+    assert values[:, 0].tolist() == [0, 0, 2, 2, 4, 4]
+    assert values.base is not None
+    assert _segments() == before
+
+
+def test_pooled_runs_leave_no_segments() -> None:
+    before = _segments()
+
+    pooled = run_monte_carlo(retiree(), 120, 40, stocks=STOCKS, workers=2, chunk_size=8)
+
+    single = run_monte_carlo(retiree(), 120, 40, stocks=STOCKS, workers=1)
+    assert np.array_equal(
+        pooled.history["liquid_wealth"], single.history["liquid_wealth"]
+    )
+    assert pooled.months_survived.tolist() == single.months_survived.tolist()
+    assert _segments() == before
+
+
+def test_segments_are_removed_on_cancel() -> None:
+    before = _segments()
+    cancel = Event()
+
+    with pytest.raises(MonteCarloCancelled):
+        run_monte_carlo(
+            retiree(),
+            120,
+            200,
+            stocks=STOCKS,
+            workers=2,
+            chunk_size=10,
+            cancel=cancel,
+            progress=lambda _: cancel.set(),
+        )
+
+    assert _segments() == before
+
+
+def _failing_chunk(chunk, spec) -> int:
+    raise RuntimeError("worker failed")
+
+
+def test_segments_are_removed_on_worker_error(monkeypatch) -> None:
+    before = _segments()
+    monkeypatch.setattr(montecarlo, "_run_chunk", _failing_chunk)
+
+    with pytest.raises(RuntimeError):
+        run_monte_carlo(retiree(), 120, 40, stocks=STOCKS, workers=2, chunk_size=8)
+
+    assert _segments() == before
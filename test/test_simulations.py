@@ -1,9 +1,27 @@
+from dataclasses import replace
 from datetime import date
 from decimal import Decimal
-from typing import Generator
+from functools import partial
+from itertools import islice
+from typing import Generator, Optional
+
+import pytest
 from finsim.properties import InvestmentProperty
 
-from finsim.simulations import FireSimulation, simulate_next
+from finsim.rates import RatePath
+from finsim.simulations import (
+    FireSimulation,
+    income_is_zero,
+    iter_simulation,
+    liquid_wealth_below,
+    net_worth_reached,
+    retain,
+    run_fire_simulation,
+    run_simulation,
+    simulate_next,
+)
+
+from helpers import make_init, mortgaged_property
 
 
 def test_simulation_when_enough_not_enough_cash() -> None:
@@ -584,7 +602,7 @@ def test_simulation_when_inflation_generator_is_provided() -> None:
     )
 
     gen = inflation_rate_gen()
-    next_sim = simulate_next(init, inflation_rate_gen=gen)
+    next_sim = simulate_next(init, inflation_rate=next(gen))
 
     assert next_sim.to_dict() == {
         "stock_investments": 0,
@@ -612,6 +630,277 @@ def test_simulation_when_inflation_generator_is_provided() -> None:
         "date": date(2021, 1, 1),
     }
 
-    next_sim_2 = simulate_next(next_sim, inflation_rate_gen=gen)
+    next_sim_2 = simulate_next(next_sim, inflation_rate=next(gen))
     d2 = next_sim_2.to_dict()
     assert d2["annual_inflation_rate"] == 0.24
+
+
+_fire_init = partial(
+    make_init,
+    stock_investments=Decimal("50_000"),
+    bonds_investments=Decimal("20_000"),
+    cash=Decimal("10_000"),
+    investment_properties=[
+        mortgaged_property(
+            mortgage_left=Decimal("150_000"),
+            mortgage_rate=Decimal("7.5"),
+            mortgage_months=120,
+            market_value=Decimal("300_000"),
+            monthly_income=Decimal("1_500"),
+        )
+    ],
+    annual_inflation_rate=Decimal("0.03"),
+    annual_income_increase_rate=Decimal("0.02"),
+    annual_property_appreciation_rate=Decimal("0.02"),
+    monthly_expenses=Decimal("6_000"),
+    monthly_income=Decimal("9_000"),
+    invest_cash_surplus=True,
+    invest_cash_threshold=Decimal("20_000"),
+    invest_cash_surplus_strategy="80-20",
+    date=date(2024, 4, 1),
+)
+
+
+@pytest.mark.parametrize(
+    "init",
+    [
+        _fire_init(),
+        _fire_init(investment_properties=[], monthly_expenses=Decimal("8_500")),
+        _fire_init(monthly_income=Decimal("5_000")),
+    ],
+)
+def test_bisect_fire_search_matches_exhaustive(init: FireSimulation) -> None:
+    expected, expected_months = run_fire_simulation(init, 240, search="exhaustive")
+
+    simulations, months = run_fire_simulation(init, 240, search="bisect")
+
+    assert months == expected_months
+    assert [s.to_dict() for s in simulations] == [s.to_dict() for s in expected]
+
+
+def _rerun_fire_simulation(
+    init: FireSimulation,
+    expected_number_of_months: int,
+    inflation_rates: Optional[RatePath] = None,
+) -> tuple[list[FireSimulation], int]:
+    """Every candidate rerun from the initial state, how run_fire_simulation used to work."""
+    for i in range(expected_number_of_months):
+        simulations = [init]
+        for x in range(expected_number_of_months):
+            prev = simulations[-1]
+            if x > i:
+                prev = replace(prev, monthly_income=Decimal("0"))
+            next_sim = simulate_next(
+                prev, inflation_rate=inflation_rates[x] if inflation_rates else None
+            )
+            if next_sim.wealth_inc_properties <= 0:
+                break
+            simulations.append(next_sim)
+
+        if len(simulations) >= expected_number_of_months - 2:
+            break
+
+    return simulations, i + 1
+
+
+@pytest.mark.parametrize(
+    "init",
+    [
+        _fire_init(),
+        _fire_init(monthly_income=Decimal("5_000")),
+        _fire_init(monthly_income=Decimal("1_000"), cash=Decimal("100")),
+    ],
+)
+def test_checkpointed_fire_search_matches_full_reruns(init: FireSimulation) -> None:
+    expected, expected_months = _rerun_fire_simulation(init, 120)
+
+    simulations, months = run_fire_simulation(init, 120, search="exhaustive")
+
+    assert months == expected_months
+    assert [s.to_dict() for s in simulations] == [s.to_dict() for s in expected]
+
+
+def test_fire_candidates_share_the_rate_path() -> None:
+    init = _fire_init(monthly_income=Decimal("7_000"))
+    rates = RatePath([0.001, 0.004, -0.002, 0.003, 0.006], cyclic=True)
+    expected, expected_months = _rerun_fire_simulation(init, 120, rates)
+
+    for search in ["exhaustive", "bisect"]:
+        simulations, months = run_fire_simulation(
+            init, 120, inflation_rates=rates, search=search  # type: ignore
+        )
+
+        assert months == expected_months
+        assert [s.to_dict() for s in simulations] == [s.to_dict() for s in expected]
+
+
+def test_run_simulation_reads_generators_once() -> None:
+    init = _fire_init()
+
+    def inflation_rate_gen() -> Generator[Decimal, None, None]:
+        while True:
+            yield Decimal("0.004")
+            yield Decimal("0.001")
+
+    from_generator = run_simulation(init, 60, inflation_rates=inflation_rate_gen())
+    from_path = run_simulation(
+        init, 60, inflation_rates=RatePath.from_iterator(inflation_rate_gen(), 60)
+    )
+
+    assert [s.to_dict() for s in from_generator] == [s.to_dict() for s in from_path]
+    assert from_path[2].monthly_inflation_rate == Decimal("0.001")
+
+
+def test_fire_search_must_be_known() -> None:
+    with pytest.raises(ValueError):
+        run_fire_simulation(_fire_init(), 12, search="linear")  # type: ignore
+
+
+def _summed_totals(sim: FireSimulation) -> list[Decimal]:
+    props = sim.investment_properties
+    return [
+        Decimal(sum([p.market_value for p in props])),
+        Decimal(sum([p.monthly_income for p in props])),
+        Decimal(sum([p.net_cash_value() for p in props])),
+        Decimal(sum([p.mortgage_left for p in props])),
+        Decimal(sum([p.monthly_payment for p in props if p.is_with_mortgage()])),
+    ]
+
+
+def _totals(sim: FireSimulation) -> list[Decimal]:
+    return [
+        sim.properties_market_value,
+        sim.properties_monthly_income,
+        sim.properties_net_cash_value,
+        sim.properties_mortgage_left,
+        sim.properties_monthly_mortgage,
+    ]
+
+
+def _rental(value: int, mortgage: int = 0) -> InvestmentProperty:
+    return InvestmentProperty(
+        market_value=Decimal(value),
+        monthly_income=Decimal("1_000"),
+        mortgage_left=Decimal(mortgage),
+        mortgage_rate=Decimal("6") if mortgage else Decimal("0"),
+        mortgage_months=240 if mortgage else 0,
+        annual_rent_increase_rate=Decimal("0.03"),
+    )
+
+
+def test_property_totals_follow_stepped_and_sold_properties() -> None:
+    init = FireSimulation(
+        stock_investments=Decimal("10_000"),
+        bonds_investments=Decimal("0"),
+        cash=Decimal("0"),
+        investment_properties=[
+            _rental(300_000, 150_000),
+            _rental(120_000),
+            _rental(200_000, 50_000),
+        ],
+        monthly_expenses=Decimal("12_000"),
+        monthly_income=Decimal("2_000"),
+        stock_return_rate=Decimal("0.05"),
+        annual_property_appreciation_rate=Decimal("0.02"),
+        date=date(2024, 1, 1),
+    )
+
+    simulations = run_simulation(init, 240)
+
+    assert len(simulations[-1].investment_properties) < 3
+    for sim in simulations:
+        assert _totals(sim) == _summed_totals(sim)
+
+
+def test_property_totals_follow_added_and_sold_properties() -> None:
+    sim = _fire_init()
+    assert _totals(sim) == _summed_totals(sim)
+
+    first, second = _rental(100_000, 40_000), _rental(80_000)
+    sim.add_property(first)
+    sim.add_property(second)
+    assert _totals(sim) == _summed_totals(sim)
+
+    sim.sell_property(first)
+    assert _totals(sim) == _summed_totals(sim)
+    assert sim.properties_market_value == Decimal("380_000")
+    assert "_property_totals" not in sim.to_dict()
+
+
+def test_property_totals_follow_a_list_changed_in_place() -> None:
+    sim = _fire_init()
+    assert _totals(sim) == _summed_totals(sim)
+
+    sim.investment_properties.append(_rental(100_000, 40_000))
+    assert _totals(sim) == _summed_totals(sim)
+
+    sim.investment_properties.pop(0)
+    assert _totals(sim) == _summed_totals(sim)
+
+    sim.investment_properties = [_rental(80_000)]
+    assert _totals(sim) == _summed_totals(sim)
+    assert sim.properties_market_value == Decimal("80_000")
+
+
+@pytest.mark.parametrize("engine", ["decimal", "cents", "float"])
+def test_iter_simulation_yields_the_months_of_run_simulation(engine: str) -> None:
+    init = _fire_init(monthly_income=Decimal("1_000"))
+    expected = run_simulation(init, 240, engine=engine)  # type: ignore
+
+    simulations = list(iter_simulation(init, 240, engine=engine))  # type: ignore
+
+    assert 1 < len(expected) < 241
+    assert [s.to_dict() for s in simulations] == [s.to_dict() for s in expected]
+
+
+def test_iter_simulation_is_lazy() -> None:
+    months = iter_simulation(_fire_init(), 10_000_000)
+
+    first = list(islice(months, 3))
+
+    assert [s.date for s in first] == [
+        date(2024, 4, 1),
+        date(2024, 5, 1),
+        date(2024, 6, 1),
+    ]
+
+
+def test_iter_simulation_stops_on_the_first_condition_that_holds() -> None:
+    init = _fire_init(monthly_income=Decimal("1_000"))
+    full = run_simulation(init, 240)
+
+    below = list(iter_simulation(init, 240, stop=[liquid_wealth_below(60_000)]))
+    reached = run_simulation(
+        _fire_init(), 240, stop=[net_worth_reached(Decimal("500_000"))]
+    )
+
+    assert below[-1].liquid_wealth < 60_000
+    assert all(s.liquid_wealth >= 60_000 for s in below[:-1])
+    assert below == full[: len(below)]
+    assert 1 < len(reached) < 241
+    assert reached[-1].wealth_inc_properties >= 500_000
+    assert all(s.wealth_inc_properties < 500_000 for s in reached[:-1])
+    # the initial state is checked too
+    assert run_simulation(
+        _fire_init(monthly_income=Decimal("0")), 240, stop=[income_is_zero()]
+    ) == [_fire_init(monthly_income=Decimal("0"))]
+
+
+@pytest.mark.parametrize("engine", ["decimal", "cents"])
+def test_run_simulation_keeps_the_months_of_the_retention(engine: str) -> None:
+    init = _fire_init()
+    full = run_simulation(init, 100, engine=engine)  # type: ignore
+    assert len(full) == 101
+
+    assert run_simulation(init, 100, engine=engine, keep="last") == [full[-1]]  # type: ignore
+    assert run_simulation(init, 100, engine=engine, keep=12) == full[::12] + [full[-1]]  # type: ignore
+    assert run_simulation(init, 100, engine=engine, keep=25) == full[::25]  # type: ignore
+    assert run_simulation(init, 100, engine=engine, keep=1) == full  # type: ignore
+
+
+def test_retention_must_be_known() -> None:
+    assert retain([], 5) == []
+
+    for keep in [0, "first", True]:
+        with pytest.raises(ValueError):
+            retain(range(3), keep)  # type: ignore
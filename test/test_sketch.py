@@ -0,0 +1,116 @@
+import pickle
+from datetime import date
+from decimal import Decimal
+
+import numpy as np
+import pytest
+
+from finsim.batch import run_batch_simulation
+from finsim.simulations import month_dates
+from finsim.sketch import QuantileSketch, quantile_bands
+
+from helpers import saver
+
+QUANTILES = [0, 0.05, 0.25, 0.5, 0.75, 0.95, 1]
+
+
+def _values(n: int, seed: int) -> np.ndarray:
+    rng = np.random.default_rng(seed)
+    signs = np.where(rng.random(n) < 0.2, -1, 1)
+    return np.round(rng.lognormal(11, 1.5, n) * signs, 2)
+
+
+def test_quantiles_are_within_the_relative_accuracy() -> None:
+    values = _values(20_000, seed=1)
+    sketch = QuantileSketch(2)
+    sketch.add(0, values)
+
+    quantiles = sketch.quantiles(QUANTILES)
+
+    exact = np.quantile(values, QUANTILES, method="lower")
+    np.testing.assert_allclose(quantiles[:, 0], exact, rtol=0.01)
+    assert np.isnan(quantiles[:, 1]).all()
+    assert sketch.count.tolist() == [20_000, 0]
+
+
+def test_zeros_nan_and_masked_values() -> None:
+    sketch = QuantileSketch(1)
+    sketch.add(0, np.array([0.0, 0.001, np.nan, -5.0, 1e20]))
+    sketch.add(0, np.array([7.0, 8.0]), mask=np.array([False, True]))
+
+    assert sketch.count.tolist() == [5]
+    low, middle, high = sketch.quantiles([0, 0.5, 1])[:, 0]
+    assert low == pytest.approx(-5, rel=0.01)
+    assert middle == 0
+    # beyond the largest value it's counted as the largest one
+    assert high == pytest.approx(1e13, rel=0.01)
+
+
+def test_merged_sketches_are_the_sketch_of_all_the_values() -> None:
+    values = _values(5_000, seed=2)
+    whole = QuantileSketch(1)
+    whole.add(0, values)
+    parts = [QuantileSketch(1) for _ in range(3)]
+    for part, chunk in zip(parts, np.array_split(values, 3)):
+        part.add(0, chunk)
+
+    for part in parts[1:]:
+        parts[0].merge(part)
+
+    np.testing.assert_array_equal(parts[0].counts, whole.counts)
+    with pytest.raises(ValueError):
+        whole.merge(QuantileSketch(1, relative_accuracy=0.02))
+    with pytest.raises(ValueError):
+        whole.merge(QuantileSketch(2))
+
+
+def test_pickles_only_the_bins_in_use() -> None:
+    sketch = QuantileSketch(1_201)
+    sketch.add(3, _values(100, seed=3))
+
+    data = pickle.dumps(sketch)
+
+    assert len(data) < sketch.counts.nbytes / 100
+    np.testing.assert_array_equal(pickle.loads(data).counts, sketch.counts)
+
+
+def test_bands_are_columns_by_date() -> None:
+    sketch = QuantileSketch(3)
+    for row in range(3):
+        sketch.add(row, np.arange(1, 101) * (row + 1.0))
+    dates = month_dates(date(2024, 1, 1), 2)
+
+    bands = quantile_bands(sketch, dates)
+
+    assert bands.columns.tolist() == ["p5", "p25", "p50", "p75", "p95"]
+    assert bands.index.tolist() == dates
+    np.testing.assert_allclose(bands["p50"], [50, 100, 150], rtol=0.01)
+
+
+@pytest.mark.parametrize("engine", ["float", "cents"])
+def test_batch_sketches_the_months_of_the_paths_still_running(engine: str) -> None:
+    rng = np.random.default_rng(11)
+    inflation = np.round(rng.normal(0.003, 0.004, (30, 480)), 4)
+    stocks = np.round(rng.normal(0.005, 0.045, (30, 480)), 4)
+    fields = ["liquid_wealth", "wealth_inc_properties"]
+    init = saver(monthly_income=Decimal("4_500"))
+
+    recorded = run_batch_simulation(init, 480, inflation, stocks, record=fields, engine=engine)  # type: ignore
+    sketched = run_batch_simulation(
+        init, 480, inflation, stocks, record=(), engine=engine, sketch=fields  # type: ignore
+    )
+
+    assert 0 < sketched.depleted.sum() < 30
+    for name in fields:
+        history = recorded.history[name]
+        running = ~np.isnan(history).all(axis=0)
+        exact = np.nanquantile(
+            history[:, running], [0.05, 0.5, 0.95], axis=0, method="lower"
+        )
+        np.testing.assert_allclose(
+            sketched.sketches[name].quantiles([0.05, 0.5, 0.95])[:, running],
+            exact,
+            rtol=0.01,
+        )
+    with pytest.raises(ValueError):
+        run_batch_simulation(init, 12, sketch=["date"])
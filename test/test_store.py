@@ -0,0 +1,105 @@
+import datetime
+from decimal import Decimal
+
+import numpy as np
+import pytest
+
+from finsim.rates import RatePath
+from finsim.simulations import (
+    FireSimulation,
+    run_fire_simulation_frame,
+    run_simulation_frame,
+)
+from finsim.store import ResultStore
+
+from helpers import make_init, mortgaged_property
+
+
+@pytest.fixture
+def init() -> FireSimulation:
+    return make_init(
+        stock_investments=Decimal("20_000"),
+        bonds_investments=Decimal("5_000"),
+        cash=Decimal("2_000"),
+        investment_properties=[
+            mortgaged_property(
+                market_value=Decimal("300_000"),
+                mortgage_rate=Decimal("6.5"),
+                monthly_income=Decimal("1_500"),
+                annual_rent_increase_rate=Decimal("0.02"),
+            ),
+        ],
+        bonds_return_rate=Decimal("0"),
+        annual_inflation_rate=Decimal("0.03"),
+        monthly_expenses=Decimal("4_000"),
+        monthly_income=Decimal("6_000"),
+        date=datetime.datetime(2024, 3, 1, 12, 30),
+    )
+
+
+def test_frames_round_trip(tmp_path, init: FireSimulation) -> None:
+    store = ResultStore(tmp_path / "results.sqlite")
+    rates = RatePath(np.full(240, 0.004))
+    frame, months = run_fire_simulation_frame(init, 240, stock_returns=rates)
+
+    store.put("fire", frame, months)
+    loaded, meta = store.get("fire")  # type: ignore
+
+    assert meta == months
+    assert loaded.dates == frame.dates
+    assert np.array_equal(loaded.values, frame.values)
+    assert loaded.properties == frame.properties
+    assert loaded.property_table().equals(frame.property_table())
+    assert loaded.settings == frame.settings
+    assert store.get("missing") is None
+
+
+def test_other_engine_versions_are_invalidated(tmp_path, init: FireSimulation) -> None:
+    path = tmp_path / "results.sqlite"
+    frame = run_simulation_frame(init, 12)
+    old = ResultStore(path, version="old")
+    old.put("key", frame)
+
+    # a replica of the new version doesn't wipe the results of the old one still running
+    new = ResultStore(path, version="new")
+    assert new.get("key") is None
+    assert old.get("key") is not None
+
+    # they go once they are unused for long enough
+    new.stale_after = 0
+    new.put("other", frame)
+    assert old.get("key") is None
+    assert len(new) == 1
+
+
+def test_least_recently_read_results_are_evicted(
+    tmp_path, init: FireSimulation
+) -> None:
+    frame = run_simulation_frame(init, 120)
+    store = ResultStore(tmp_path / "results.sqlite")
+    store.put("first", frame)
+    one = store.nbytes
+    store.max_bytes = 2 * one
+
+    store.put("second", frame)
+    store.get("first")
+    store.put("third", frame)
+
+    assert len(store) == 2
+    assert store.get("second") is None
+    assert store.get("first") is not None
+    assert store.nbytes <= store.max_bytes
+
+
+@pytest.mark.parametrize(
+    "damage", [lambda data: data[: len(data) // 2], lambda data: b"not a result"]
+)
+def test_corrupt_results_are_a_miss(tmp_path, init: FireSimulation, damage) -> None:
+    store = ResultStore(tmp_path / "results.sqlite")
+    store.put("key", run_simulation_frame(init, 12))
+    with store._connect() as db:
+        (data,) = db.execute("SELECT data FROM results").fetchone()
+        db.execute("UPDATE results SET data = ?", (damage(data),))
+
+    assert store.get("key") is None
+    assert len(store) == 0
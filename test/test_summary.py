@@ -0,0 +1,158 @@
+from dataclasses import replace
+from decimal import Decimal
+
+import numpy as np
+import pytest
+
+from finsim.batch import run_batch_simulation
+from finsim.simulations import (
+    FireSimulation,
+    run_fire_simulation,
+    run_fire_simulation_summary,
+    run_simulation,
+    run_simulation_summary,
+)
+from finsim.summary import Statistic, summarize
+
+from helpers import make_init, saver
+
+STATISTICS = (
+    Statistic("liquid_wealth", "min"),
+    Statistic("wealth_inc_properties", "max"),
+    Statistic("cash", "sum"),
+    Statistic("monthly_expenses", "mean"),
+)
+
+
+def _expected(simulations: list[FireSimulation]) -> dict[str, Decimal]:
+    return {
+        "min_liquid_wealth": min(s.liquid_wealth for s in simulations),
+        "max_wealth_inc_properties": max(s.wealth_inc_properties for s in simulations),
+        "sum_cash": sum((s.cash for s in simulations), Decimal(0)),
+    }
+
+
+@pytest.mark.parametrize("engine", ["decimal", "cents", "float"])
+@pytest.mark.parametrize("income", ["0", "5_000"])
+def test_summary_reduces_the_months_of_run_simulation(engine: str, income: str) -> None:
+    init = saver(monthly_income=Decimal(income))
+    simulations = run_simulation(init, 600, engine=engine)  # type: ignore
+
+    summary = run_simulation_summary(init, 600, engine=engine, statistics=STATISTICS)  # type: ignore
+
+    assert summary.final == simulations[-1]
+    assert summary.months_survived == len(simulations) - 1
+    assert summary.depleted == (income == "0")
+    assert summary.statistics.items() >= _expected(simulations).items()
+    assert float(summary.statistics["mean_monthly_expenses"]) == pytest.approx(
+        float(sum(s.monthly_expenses for s in simulations)) / len(simulations)
+    )
+
+
+@pytest.mark.parametrize("engine", ["decimal", "cents"])
+def test_fire_summary_reduces_the_months_of_run_fire_simulation(engine: str) -> None:
+    simulations, months = run_fire_simulation(saver(), 480, engine=engine)  # type: ignore
+
+    summary, summary_months = run_fire_simulation_summary(
+        saver(), 480, engine=engine, statistics=STATISTICS  # type: ignore
+    )
+
+    assert summary_months == months
+    assert summary.final == simulations[-1]
+    assert summary.months_survived == len(simulations) - 1
+    assert summary.statistics.items() >= _expected(simulations).items()
+
+
+@pytest.mark.parametrize("engine", ["decimal", "cents", "float"])
+def test_fire_summary_is_depleted_only_when_the_search_finds_no_sustainable_run(
+    engine: str,
+) -> None:
+    # without any returns the savings of every month worked pay for one month retired
+    init = make_init(
+        stock_investments=Decimal("0"),
+        bonds_investments=Decimal("0"),
+        cash=Decimal("0"),
+        monthly_expenses=Decimal("500"),
+        monthly_income=Decimal("1_000"),
+        stock_return_rate=Decimal("0"),
+        bonds_return_rate=Decimal("0"),
+    )
+
+    summary, _ = run_fire_simulation_summary(init, 13, engine=engine)  # type: ignore
+    broke, _ = run_fire_simulation_summary(
+        replace(init, monthly_income=Decimal("400")), 13, engine=engine  # type: ignore
+    )
+
+    # the run picked keeps 12 of the 13 months, within the slack of the search
+    assert summary.months_survived == 11
+    assert not summary.depleted
+    assert broke.depleted
+
+
+def test_summary_of_no_months_is_the_initial_state() -> None:
+    summary, months = run_fire_simulation_summary(saver(), 0)
+
+    assert months == 0
+    assert summary.final == saver()
+    assert summary.statistics["min_liquid_wealth"] == Decimal("165_000")
+
+
+def test_statistics_must_be_known() -> None:
+    with pytest.raises(ValueError):
+        summarize([saver()], 0, [Statistic("cash", "median")])  # type: ignore
+    with pytest.raises(ValueError):
+        run_batch_simulation(saver(), 12, summary=[Statistic("date", "min")])
+    with pytest.raises(ValueError):
+        summarize([], 0)
+
+
+@pytest.mark.parametrize("engine", ["float", "cents"])
+def test_batch_summary_reduces_the_months_of_every_path(engine: str) -> None:
+    init = saver(monthly_income=Decimal("4_500"))
+    rng = np.random.default_rng(11)
+    inflation = np.round(rng.normal(0.003, 0.004, (6, 480)), 4)
+    stocks = np.round(rng.normal(0.005, 0.045, (6, 480)), 4)
+    fields = ["liquid_wealth", "wealth_inc_properties", "cash", "monthly_expenses"]
+
+    recorded = run_batch_simulation(init, 480, inflation, stocks, record=fields, engine=engine)  # type: ignore
+    summarized = run_batch_simulation(
+        init, 480, inflation, stocks, record=(), engine=engine, summary=STATISTICS  # type: ignore
+    )
+
+    assert summarized.history == {}
+    assert 0 < summarized.depleted.sum() < 6
+    history = recorded.history
+    np.testing.assert_array_equal(
+        summarized.summary["min_liquid_wealth"],
+        np.nanmin(history["liquid_wealth"], axis=1),
+    )
+    np.testing.assert_array_equal(
+        summarized.summary["max_wealth_inc_properties"],
+        np.nanmax(history["wealth_inc_properties"], axis=1),
+    )
+    np.testing.assert_allclose(
+        summarized.summary["sum_cash"], np.nansum(history["cash"], axis=1)
+    )
+    np.testing.assert_allclose(
+        summarized.summary["mean_monthly_expenses"],
+        np.nanmean(history["monthly_expenses"], axis=1),
+    )
+
+
+@pytest.mark.parametrize("engine", ["float", "cents"])
+def test_last_is_the_last_solvent_month(engine: str) -> None:
+    last = [Statistic("wealth_inc_properties", "last")]
+    init = saver(monthly_income=Decimal("0"))
+    simulations = run_simulation(init, 600)
+
+    summary = run_simulation_summary(init, 600, statistics=last)
+    batch = run_batch_simulation(init, 600, record=(), engine=engine, summary=last)  # type: ignore
+
+    assert summary.depleted
+    assert (
+        summary.statistics["last_wealth_inc_properties"]
+        == simulations[-1].wealth_inc_properties
+    )
+    assert batch.summary["last_wealth_inc_properties"][0] == pytest.approx(
+        float(simulations[-1].wealth_inc_properties)
+    )
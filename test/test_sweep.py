@@ -0,0 +1,138 @@
+from dataclasses import replace
+from decimal import Decimal
+from functools import partial
+from itertools import product
+
+import numpy as np
+import pytest
+
+from finsim.batch import run_batch_simulation
+from finsim.simulations import FireSimulation
+from finsim.summary import Statistic
+from finsim.sweep import run_sweep
+
+from helpers import make_init, mortgaged_property
+
+_init = partial(
+    make_init,
+    stock_investments=Decimal("150_000"),
+    bonds_investments=Decimal("40_000"),
+    cash=Decimal("10_000"),
+    investment_properties=[
+        mortgaged_property(
+            market_value=Decimal("180_000"),
+            monthly_income=Decimal("800"),
+            mortgage_left=Decimal("100_000"),
+        )
+    ],
+    monthly_expenses=Decimal("3_500"),
+    monthly_income=Decimal("2_500"),
+    annual_inflation_rate=Decimal("0.03"),
+    invest_cash_surplus=True,
+    invest_cash_threshold=Decimal("15_000"),
+)
+
+
+def _assert_same_as_batches(init: FireSimulation, months: int, axes: dict) -> None:
+    result = run_sweep(init, months, axes)
+
+    assert result.shape == tuple(len(v) for v in axes.values())
+    assert 0 < result["depleted"].sum() < result["depleted"].size
+    for point in product(*(range(len(v)) for v in axes.values())):
+        values = {name: axes[name][i] for name, i in zip(axes, point)}
+        batch = run_batch_simulation(replace(init, **values), months, record=())
+        last = run_batch_simulation(
+            replace(init, **values),
+            months,
+            record=(),
+            summary=[Statistic("wealth_inc_properties", "last")],
+        )
+
+        assert result["months_survived"][point] == batch.months_survived[0], values
+        assert result["liquid_wealth"][point] == batch.liquid_wealth[0], values
+        assert (
+            result["last_wealth_inc_properties"][point]
+            == last.summary["last_wealth_inc_properties"][0]
+        )
+
+
+def test_every_point_is_the_batch_run_of_its_parameters() -> None:
+    _assert_same_as_batches(
+        _init(),
+        480,
+        {
+            "stock_return_rate": [Decimal("0.01"), Decimal("0.05"), Decimal("0.08")],
+            "annual_inflation_rate": [Decimal("0.02"), Decimal("0.04")],
+            "monthly_expenses": [Decimal("3_000"), Decimal("4_500")],
+            "invest_cash_surplus_strategy": ["80-20", "100"],
+            "invest_cash_surplus": [True, False],
+        },
+    )
+
+
+def test_axes_the_batch_cant_vary_per_path_split_the_grid() -> None:
+    _assert_same_as_batches(
+        _init(),
+        360,
+        {
+            "monthly_income": [Decimal("0"), Decimal("3_000")],
+            "monthly_expenses": [Decimal("3_000"), Decimal("5_000")],
+            "annual_property_appreciation_rate": [Decimal("0"), Decimal("0.03")],
+            "cash": [Decimal("0"), Decimal("50_000")],
+        },
+    )
+
+
+def test_results_are_labeled_by_the_swept_values() -> None:
+    expenses = [Decimal("2_000"), Decimal("4_000"), Decimal("6_000")]
+    returns = [Decimal("0.02"), Decimal("0.07")]
+    result = run_sweep(
+        _init(),
+        240,
+        {"monthly_expenses": expenses, "stock_return_rate": returns},
+        inflation_rates=np.full(240, 0.003),
+    )
+
+    table = result.to_pandas("months_survived").unstack()
+
+    assert table.index.tolist() == expenses
+    assert table.columns.tolist() == returns
+    np.testing.assert_array_equal(table.to_numpy(), result["months_survived"])
+    # spending more never makes the money last longer
+    assert (np.diff(result["months_survived"], axis=0) <= 0).all()
+
+
+def test_sweep_checks_its_axes() -> None:
+    with pytest.raises(ValueError):
+        run_sweep(_init(), 12, {"salary": [1, 2]})
+    with pytest.raises(ValueError):
+        run_sweep(_init(), 12, {"monthly_expenses": []})
+    with pytest.raises(ValueError):
+        run_sweep(
+            _init(),
+            12,
+            {"stock_return_rate": [Decimal("0.05")]},
+            stock_returns=np.zeros(12),
+        )
+    with pytest.raises(ValueError):
+        run_batch_simulation(
+            _init(), 12, parameters={"cash": [Decimal(0)]}, engine="cents"
+        )
+    with pytest.raises(ValueError):
+        run_batch_simulation(
+            _init(), 12, paths=2, parameters={"monthly_expenses": [Decimal(0)]}
+        )
+
+
+def test_fields_the_engine_computes_cant_be_swept() -> None:
+    with pytest.raises(ValueError, match="annual_inflation_rate"):
+        run_sweep(
+            _init(), 12, {"monthly_inflation_rate": [Decimal("0"), Decimal("0.01")]}
+        )
+
+    # the rate it is computed from sweeps
+    result = run_sweep(
+        _init(), 120, {"annual_inflation_rate": [Decimal("0"), Decimal("0.12")]}
+    )
+    low, high = result["liquid_wealth"]
+    assert high != low
@@ -0,0 +1,101 @@
+from dataclasses import replace
+from decimal import Decimal
+from functools import partial
+
+import numpy as np
+import pytest
+
+from finsim.batch import run_batch_simulation
+from finsim.properties import InvestmentProperty
+from finsim.simulations import FireSimulation, run_simulation
+from finsim.withdrawal import max_monthly_expenses
+
+from helpers import saver
+
+CENT = Decimal("0.01")
+
+
+_init = partial(
+    saver,
+    stock_investments=Decimal("300_000"),
+    bonds_investments=Decimal("60_000"),
+    cash=Decimal("20_000"),
+    monthly_expenses=Decimal("3_000"),
+    monthly_income=Decimal("0"),
+    invest_cash_surplus=True,
+    invest_cash_threshold=Decimal("20_000"),
+)
+
+
+def _lasts(init: FireSimulation, expenses: Decimal, months: int) -> bool:
+    return (
+        len(run_simulation(replace(init, monthly_expenses=expenses), months))
+        == months + 1
+    )
+
+
+@pytest.mark.parametrize("candidates", [None, 1, 7])
+def test_finds_the_most_that_lasts_to_the_cent(candidates: int) -> None:
+    solution = max_monthly_expenses(_init(), 360, candidates=candidates)
+
+    assert _lasts(_init(), solution.monthly_expenses, 360)
+    assert not _lasts(_init(), solution.monthly_expenses + CENT, 360)
+    assert solution.success_rate == 1.0
+    if candidates == 1:
+        # a bisection of a range of a few million cents
+        assert 20 < solution.batches < 30
+    else:
+        assert solution.batches <= 12
+
+
+def test_success_probability_across_rate_paths() -> None:
+    rng = np.random.default_rng(5)
+    inflation = np.round(rng.normal(0.002, 0.003, (40, 360)), 4)
+    stocks = np.round(rng.normal(0.005, 0.045, (40, 360)), 4)
+
+    def success_rate(expenses: Decimal) -> float:
+        batch = run_batch_simulation(
+            replace(_init(), monthly_expenses=expenses),
+            360,
+            inflation,
+            stocks,
+            record=(),
+        )
+        return float((~batch.depleted).mean())
+
+    likely = max_monthly_expenses(
+        _init(), 360, inflation, stocks, success_probability=0.75
+    )
+    surely = max_monthly_expenses(_init(), 360, inflation, stocks)
+
+    assert surely.monthly_expenses < likely.monthly_expenses
+    assert success_rate(likely.monthly_expenses) == likely.success_rate >= 0.75
+    assert success_rate(likely.monthly_expenses + CENT) < 0.75
+    assert success_rate(surely.monthly_expenses) == 1.0
+    assert success_rate(surely.monthly_expenses + CENT) < 1.0
+
+
+def test_solver_checks_its_arguments() -> None:
+    with pytest.raises(ValueError):
+        max_monthly_expenses(_init(), 0)
+    with pytest.raises(ValueError):
+        max_monthly_expenses(_init(), 12, success_probability=0)
+    with pytest.raises(ValueError):
+        max_monthly_expenses(_init(), 12, candidates=0)
+    # an underwater property is all there is, the wealth is below zero from the start
+    broke = _init(
+        stock_investments=Decimal(0),
+        bonds_investments=Decimal(0),
+        cash=Decimal(0),
+        investment_properties=[
+            InvestmentProperty(
+                market_value=Decimal("100_000"),
+                monthly_income=Decimal("0"),
+                mortgage_left=Decimal("150_000"),
+                mortgage_rate=Decimal("5.5"),
+                mortgage_months=180,
+            )
+        ],
+    )
+    with pytest.raises(ValueError):
+        max_monthly_expenses(broke, 12)